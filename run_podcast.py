@@ -8,8 +8,9 @@ import sys
 # 确保可以正确导入src目录下的模块
 sys.path.insert(0, os.path.abspath('.'))
 
-from src.news_podcast.main import main
+from src.news_podcast.main import main, parse_args, cache_mode_from_args, llm_cache_mode_from_args
 
 if __name__ == "__main__":
     # 运行主程序
-    asyncio.run(main()) 
\ No newline at end of file
+    args = parse_args()
+    asyncio.run(main(args.config, args.timestamp, cache_mode_from_args(args), llm_cache_mode_from_args(args))) 
\ No newline at end of file
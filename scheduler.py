@@ -1,6 +1,7 @@
 """
 定时任务脚本，在指定时间自动运行播客生成程序
 """
+import json
 import logging
 import os
 import subprocess
@@ -8,7 +9,7 @@ import sys
 import time
 from datetime import datetime
 import schedule
-from flask import Flask
+from flask import Flask, jsonify
 from threading import Thread
 
 # 配置日志
@@ -47,10 +48,25 @@ def status_page():
             <p>已生成播客次数: {podcast_count}</p>
             <p>最近一次运行状态: {last_run_status}</p>
             <p>错误信息: {last_error_message}</p>
+            <p><a href="/metrics">今日运行指标</a></p>
         </body>
     </html>
     """
 
+@app.route('/metrics')
+@app.route('/metrics/<timestamp>')
+def metrics_page(timestamp=None):
+    """返回指定日期（默认为今天）运行生成的各阶段指标{timestamp}/log/metrics.json"""
+    timestamp = timestamp or datetime.now().strftime("%Y%m%d")
+    if not (len(timestamp) == 8 and timestamp.isdigit()):
+        return jsonify({"error": "日期格式应为YYYYMMDD"}), 400
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    metrics_file = os.path.join(current_dir, timestamp, "log", "metrics.json")
+    if not os.path.exists(metrics_file):
+        return jsonify({"error": f"{timestamp}没有运行指标"}), 404
+    with open(metrics_file, "r", encoding="utf-8") as f:
+        return jsonify(json.load(f))
+
 def run_web_server():
     """运行Web服务器"""
     app.run(host='0.0.0.0', port=80)
@@ -0,0 +1,192 @@
+"""
+LLM响应缓存模块，将请求和响应持久化到SQLite，重跑同一天的数据时相同的请求无需再次调用模型
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from src.news_podcast.utils.cache_modes import CACHE_DISABLED, CACHE_ENABLED
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+)
+"""
+
+
+def make_key(model: Optional[str], messages: List[Dict[str, str]], max_tokens: int, **params: Any) -> str:
+    """
+    根据完整请求生成缓存键
+
+    参数:
+        model: 模型名称
+        messages: 对话消息列表
+        max_tokens: 最大输出Token数
+        params: 其他影响输出的请求参数，如temperature、response_format
+
+    返回:
+        str: 请求内容的SHA-256哈希
+    """
+    payload = {"model": model, "messages": messages, "max_tokens": max_tokens, **params}
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    基于SQLite的LLM响应缓存
+
+    按最近访问时间淘汰：超过有效期的条目在写入时清理，总大小超过上限时删除最久未访问的条目。
+    """
+
+    def __init__(self, path: Optional[str] = None, mode: Optional[str] = None,
+                 max_age: Optional[float] = None, max_bytes: Optional[int] = None):
+        """
+        参数:
+            path: SQLite文件路径，默认读取LLM_CACHE_PATH
+            mode: 缓存模式，enabled/refresh/disabled，默认读取LLM_CACHE_MODE
+            max_age: 条目有效期（秒），默认读取LLM_CACHE_MAX_AGE_DAYS
+            max_bytes: 缓存响应总大小上限（字节），默认读取LLM_CACHE_MAX_MB
+        """
+        self.path = path or os.environ.get("LLM_CACHE_PATH", ".cache/llm.sqlite3")
+        self.mode = mode or os.environ.get("LLM_CACHE_MODE", CACHE_ENABLED)
+        self.max_age = max_age or float(os.environ.get("LLM_CACHE_MAX_AGE_DAYS", "30")) * 24 * 3600
+        self.max_bytes = max_bytes or int(float(os.environ.get("LLM_CACHE_MAX_MB", "100")) * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """懒加载数据库连接，多个线程共享同一连接并由锁串行化"""
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(_SCHEMA)
+            self._conn.commit()
+        return self._conn
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        读取缓存的响应
+
+        参数:
+            key: 缓存键
+
+        返回:
+            Optional[str]: 未过期的响应，未命中或缓存未启用时返回None
+        """
+        if self.mode != CACHE_ENABLED:
+            return None
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None or now - row[1] > self.max_age:
+                    self.misses += 1
+                    return None
+                conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                conn.commit()
+                self.hits += 1
+                return row[0]
+            except sqlite3.Error as e:
+                logger.warning(f"读取LLM缓存失败: {e}")
+                self.misses += 1
+                return None
+
+    def put(self, key: str, model: Optional[str], response: str) -> None:
+        """
+        写入响应并按有效期和总大小淘汰旧条目
+
+        参数:
+            key: 缓存键
+            model: 模型名称
+            response: 模型响应
+        """
+        if self.mode == CACHE_DISABLED or not response:
+            return
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, model, response, size, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, model, response, len(response.encode("utf-8")), now, now),
+                )
+                self._evict(conn, now)
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"写入LLM缓存失败: {e}")
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """删除过期条目，并在总大小超过上限时按最近访问时间删除最旧的条目"""
+        conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.max_age,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        removed = 0
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            removed += 1
+        logger.info(f"LLM缓存超过大小上限，淘汰{removed}个条目")
+
+    def stats(self) -> Dict[str, int]:
+        """本次运行的命中和未命中次数"""
+        return {"hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> LLMCache:
+    """获取进程内共享的LLM缓存，首次调用时按环境变量创建"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache()
+        return _cache
+
+
+def configure_cache(cache: LLMCache) -> None:
+    """
+    替换进程内共享的LLM缓存，用于按命令行参数设置缓存模式
+
+    参数:
+        cache: 新的缓存实例
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is not None and _cache is not cache:
+            _cache.close()
+        _cache = cache
@@ -1,15 +1,490 @@
 """
 大语言模型客户端模块，用于与各种LLM API通信
+
+客户端按API地址和密钥懒加载并在进程内复用，保持HTTP连接池和TLS会话；
+异步客户端绑定在创建它的事件循环上，因此按事件循环分别缓存。
 """
+import asyncio
 import os
 import logging
-from typing import Optional, Any, List, Dict
-from openai import OpenAI
+import threading
+import time
+import weakref
+from typing import Optional, Any, Callable, List, Dict, Tuple, Union
+from openai import AsyncOpenAI, BadRequestError, OpenAI, RateLimitError
+
+from src.news_podcast.api.llm_cache import get_cache, make_key
+from src.news_podcast.api.llm_endpoints import LatencyTracker, LLMEndpoint, load_endpoints
+from src.news_podcast.api.rate_limiter import get_rate_limiter
+from src.news_podcast.api.stream_sink import PrintSink, StreamSink, StreamStats, as_sink
+from src.news_podcast.utils.logger import log_payload
+from src.news_podcast.utils.metrics import get_metrics
+from src.news_podcast.utils.retry import RetryPolicy
+from src.news_podcast.utils.token_budget import count_tokens
 
 # 设置日志
 logger = logging.getLogger(__name__)
 
-total_tokens = 0
+# 429由限流器降速后重试，不计入max_retries，但设置上限避免无限等待
+MAX_RATE_LIMIT_RETRIES = 8
+
+_latency = LatencyTracker()
+
+# 拒绝过response_format的端点，本次运行内不再请求JSON输出模式
+_json_unsupported: set = set()
+# 拒绝过stream_options的端点，本次运行内流式请求不再要求返回用量
+_stream_usage_unsupported: set = set()
+
+_clients: Dict[Tuple[Optional[str], Optional[str]], OpenAI] = {}
+_clients_lock = threading.Lock()
+# 事件循环 -> {(api_key, base_url): AsyncOpenAI}，事件循环被回收后对应的客户端也随之释放
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[Optional[str], Optional[str]], AsyncOpenAI]]" = weakref.WeakKeyDictionary()
+
+
+def _resolve_settings(model: Optional[str], api_key: Optional[str], base_url: Optional[str]) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """读取模型名称、API密钥和地址，未指定时使用环境变量"""
+    model = model or os.environ.get("ARK_MODEL")
+    api_key = api_key or os.environ.get("ARK_API_KEY")
+    base_url = base_url or os.environ.get("ARK_BASE_URL")
+    return model, api_key, base_url
+
+
+def get_client(api_key: Optional[str] = None, base_url: Optional[str] = None) -> OpenAI:
+    """
+    获取复用连接池的同步客户端
+
+    参数:
+        api_key: API密钥，默认读取ARK_API_KEY
+        base_url: API基础URL，默认读取ARK_BASE_URL
+
+    返回:
+        OpenAI: 同一API地址和密钥共享的客户端
+    """
+    _, api_key, base_url = _resolve_settings(None, api_key, base_url)
+    key = (api_key, base_url)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            # 重试由chat_with_deepseek统一处理，关闭SDK内置重试，429才能反馈给限流器
+            client = OpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+            _clients[key] = client
+            logger.info(f"创建LLM客户端: {base_url}")
+        return client
+
+
+def get_async_client(api_key: Optional[str] = None, base_url: Optional[str] = None) -> AsyncOpenAI:
+    """
+    获取当前事件循环中复用连接池的异步客户端，必须在事件循环中调用
+
+    参数:
+        api_key: API密钥，默认读取ARK_API_KEY
+        base_url: API基础URL，默认读取ARK_BASE_URL
+
+    返回:
+        AsyncOpenAI: 当前事件循环中同一API地址和密钥共享的客户端
+    """
+    _, api_key, base_url = _resolve_settings(None, api_key, base_url)
+    loop = asyncio.get_running_loop()
+    clients = _async_clients.setdefault(loop, {})
+    key = (api_key, base_url)
+    if key not in clients:
+        clients[key] = AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+        logger.info(f"创建异步LLM客户端: {base_url}")
+    return clients[key]
+
+
+def close_clients() -> None:
+    """关闭所有同步客户端的连接池，异步客户端随事件循环释放"""
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+
+def _build_messages(prompt: str, system_message: Optional[str]) -> List[Dict[str, str]]:
+    """构造对话消息列表"""
+    messages = []
+    if system_message:
+        messages.append({"role": "system", "content": system_message})
+    messages.append({"role": "user", "content": prompt})
+    return messages
+
+
+class _CallMetrics:
+    """
+    一次对话请求的指标，累计所有尝试的Token用量，结束后按调用点写入指标注册表
+    """
+
+    def __init__(self, call_site: Optional[str], reserved: int = 0):
+        """
+        参数:
+            call_site: 调用点名称，即流水线阶段
+            reserved: 发送前估算的输入Token数
+        """
+        self.call_site = call_site
+        self.reserved = reserved
+        self.started = time.monotonic()
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.estimated = 0
+
+    def add_usage(self, usage: Any, text: Optional[str] = None) -> int:
+        """
+        累计一次响应的Token用量，端点未返回用量时（如不支持stream_options的流式响应）按预估输入和实际输出估算
+
+        参数:
+            usage: 响应中的用量
+            text: 响应文本，用于估算输出Token数
+
+        返回:
+            int: 本次响应的Token数
+        """
+        if usage is None:
+            prompt_tokens, completion_tokens = self.reserved, count_tokens(text or "")
+            self.estimated += 1
+            logger.info(f"[{self.call_site or '-'}] 未返回Token用量，估算为: 输入{prompt_tokens}，输出{completion_tokens}")
+        else:
+            prompt_tokens, completion_tokens = usage.prompt_tokens, usage.completion_tokens
+            logger.info(f"[{self.call_site or '-'}] Token使用量: 输入{prompt_tokens}（预估{self.reserved}），"
+                        f"输出{completion_tokens}")
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        return prompt_tokens + completion_tokens
+
+    def done(self, retries: int = 0, cache_hit: bool = False, failed: bool = False,
+             stats: Optional[StreamStats] = None) -> None:
+        """
+        请求结束，写入指标注册表
+
+        参数:
+            retries: 重试次数
+            cache_hit: 是否命中响应缓存
+            failed: 是否最终失败
+            stats: 流式统计
+        """
+        get_metrics().record_llm_call(
+            self.call_site,
+            prompt_tokens=self.prompt_tokens,
+            completion_tokens=self.completion_tokens,
+            estimated_prompt_tokens=0 if cache_hit else self.reserved,
+            latency=time.monotonic() - self.started,
+            retries=retries,
+            cache_hit=cache_hit,
+            failed=failed,
+            ttft=stats.ttft if stats is not None else None,
+            estimated_usage=self.estimated,
+        )
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    """读取错误响应（429、503等）中的Retry-After（秒）"""
+    response = getattr(exc, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _estimate_request_tokens(messages: List[Dict[str, str]]) -> int:
+    """估算请求的输入Token数，用于预约TPM配额，响应后按实际用量修正"""
+    return sum(count_tokens(message["content"]) for message in messages)
+
+
+def _cached_response(model: Optional[str], messages: List[Dict[str, str]], max_tokens: int,
+                     use_cache: bool, response_format: Optional[Dict[str, Any]] = None) -> Tuple[Optional[str], Optional[str]]:
+    """
+    查询响应缓存
+
+    返回:
+        Tuple[Optional[str], Optional[str]]: (缓存键, 缓存的响应)，不使用缓存时缓存键为None
+    """
+    if not use_cache:
+        return None, None
+    key = make_key(model, messages, max_tokens, **({"response_format": response_format} if response_format else {}))
+    cached = get_cache().get(key)
+    if cached is not None:
+        logger.info(f"命中LLM响应缓存，响应长度: {len(cached)}")
+    return key, cached
+
+
+def _store_response(cache_key: Optional[str], primary: LLMEndpoint, answered: LLMEndpoint, text: str) -> None:
+    """
+    写入响应缓存；缓存键按主端点的模型计算，备用端点（故障切换或对冲）的响应不写入，避免以主模型的名义返回
+
+    参数:
+        cache_key: 缓存键，不使用缓存时为None
+        primary: 主端点
+        answered: 实际应答的端点
+        text: 响应文本
+    """
+    if not cache_key:
+        return
+    if answered is not primary:
+        logger.info(f"响应来自备用端点{answered.label}，不写入LLM响应缓存")
+        return
+    get_cache().put(cache_key, answered.model, text)
+
+
+class EmptyResponseError(Exception):
+    """模型返回了空响应"""
+
+
+def _timeout(timeout: Optional[float]) -> float:
+    """单次请求的超时时间（秒），默认读取LLM_TIMEOUT"""
+    return timeout or float(os.environ.get("LLM_TIMEOUT", "180"))
+
+
+class _RetryState:
+    """
+    一次对话请求的重试状态：失败后按指数退避等待并切换到下一个端点，429交给限流器降速且不计入重试次数
+    """
+
+    def __init__(self, endpoints: List[LLMEndpoint], max_retries: int, current_retry: int = 0):
+        self.endpoints = endpoints
+        self.max_retries = max_retries
+        self.retry = current_retry
+        self.rate_limited = 0
+        self.index = 0
+        self.policy = RetryPolicy(
+            max_attempts=max_retries + 1,
+            base_delay=float(os.environ.get("LLM_BACKOFF_BASE", "1")),
+            max_delay=float(os.environ.get("LLM_BACKOFF_MAX", "30")),
+        )
+
+    @property
+    def endpoint(self) -> LLMEndpoint:
+        """本次尝试使用的端点"""
+        return self.endpoints[self.index % len(self.endpoints)]
+
+    @property
+    def backup(self) -> Optional[LLMEndpoint]:
+        """对冲请求使用的备用端点，只有一个端点时为None"""
+        if len(self.endpoints) < 2:
+            return None
+        return self.endpoints[(self.index + 1) % len(self.endpoints)]
+
+    def on_error(self, exc: BaseException) -> float:
+        """
+        处理一次失败的尝试
+
+        参数:
+            exc: 本次尝试的异常
+
+        返回:
+            float: 下一次尝试前需要等待的时间（秒）
+        """
+        if isinstance(exc, RateLimitError):
+            self.rate_limited += 1
+            if self.rate_limited > MAX_RATE_LIMIT_RETRIES:
+                raise Exception(f"被限流{self.rate_limited}次，放弃请求。最后错误: {str(exc)}")
+            get_rate_limiter().on_rate_limited(_retry_after(exc))
+            return 0.0
+        if self.retry >= self.max_retries:
+            raise Exception(f"在{self.max_retries}次尝试后失败。最后错误: {str(exc)}")
+        failed = self.endpoint
+        self.retry += 1
+        self.index += 1
+        delay = self.policy.delay(self.retry, _retry_after(exc))
+        logger.warning(f"{failed.label}请求失败: {str(exc)}，{delay:.1f}s后使用{self.endpoint.label}重试 "
+                       f"(尝试 {self.retry}/{self.max_retries})")
+        return delay
+
+
+def _next_delay(state: _RetryState, exc: BaseException, call: _CallMetrics, attempt: int) -> float:
+    """处理失败的尝试，重试耗尽时记录失败的调用后抛出异常"""
+    try:
+        return state.on_error(exc)
+    except Exception:
+        call.done(retries=attempt - 1, failed=True)
+        raise
+
+
+def _replay(sink: Optional[StreamSink], text: str) -> None:
+    """命中缓存时把完整响应作为一个片段交给接收端"""
+    if sink is None:
+        return
+    sink.begin(1)
+    sink.write(text)
+    sink.end(None)
+
+
+def _finish(text: Optional[str], usage: Any, call: _CallMetrics) -> str:
+    """记录用量，空响应时抛出EmptyResponseError，只有非空响应才让限流器恢复并发"""
+    limiter = get_rate_limiter()
+    limiter.record_usage(call.reserved, call.add_usage(usage, text))
+    log_payload(logger, f"[{call.call_site or '-'}] 得到响应", text)
+    if not text:
+        raise EmptyResponseError("收到空响应")
+    limiter.on_success()
+    return text
+
+
+def _stream_result(parts: List[str], usage: Any, stats: StreamStats,
+                   endpoint: LLMEndpoint) -> Tuple[str, Any, StreamStats, LLMEndpoint]:
+    """拼接流式片段并记录首Token耗时和生成速度"""
+    full_response = "".join(parts)
+    stats.finish(usage.completion_tokens if usage is not None else count_tokens(full_response))
+    logger.info(f"{endpoint.label}流式输出完成: {stats.summary()}")
+    return full_response, usage, stats, endpoint
+
+
+def _optional_params(endpoint: LLMEndpoint, stream: bool,
+                     response_format: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """端点支持时让流式响应返回用量、请求JSON输出模式"""
+    params: Dict[str, Any] = {}
+    if stream and endpoint.label not in _stream_usage_unsupported:
+        params["stream_options"] = {"include_usage": True}
+    if response_format and endpoint.json_mode and endpoint.label not in _json_unsupported:
+        params["response_format"] = response_format
+    return params
+
+
+def _param_rejected(endpoint: LLMEndpoint, params: Dict[str, Any], exc: BaseException) -> bool:
+    """
+    带可选参数的请求被端点以400拒绝时，去掉一个可选参数并记住该端点不支持，调用方据此重发
+
+    优先去掉错误信息中提到的参数，否则按stream_options、response_format的顺序去掉。
+    """
+    if not params or not isinstance(exc, BadRequestError):
+        return False
+    name = next((key for key in params if key in str(exc)), next(iter(params)))
+    del params[name]
+    if name == "response_format":
+        _json_unsupported.add(endpoint.label)
+        logger.warning(f"{endpoint.label}不支持JSON输出模式，改用普通模式: {exc}")
+    else:
+        _stream_usage_unsupported.add(endpoint.label)
+        logger.warning(f"{endpoint.label}不支持stream_options，流式响应的用量改为估算: {exc}")
+    return True
+
+
+def _request(endpoint: LLMEndpoint, messages: List[Dict[str, str]], stream: bool,
+             max_tokens: int, timeout: float, sink: Optional[StreamSink] = None,
+             response_format: Optional[Dict[str, Any]] = None) -> Tuple[str, Any, Optional[StreamStats], LLMEndpoint]:
+    """向单个端点发送同步请求，流式输出的片段交给sink，返回(响应文本, 用量, 流式统计, 应答的端点)"""
+    client = get_client(endpoint.api_key, endpoint.base_url)
+    stats = StreamStats()
+    params = _optional_params(endpoint, stream, response_format)
+    while True:
+        try:
+            response = client.chat.completions.create(
+                model=endpoint.model, messages=messages, stream=stream, max_tokens=max_tokens, timeout=timeout,
+                **params,
+            )
+            break
+        except BadRequestError as e:
+            if not _param_rejected(endpoint, params, e):
+                raise
+    if not stream:
+        return response.choices[0].message.content, response.usage, None, endpoint
+    parts: List[str] = []
+    usage = None
+    for chunk in response:
+        usage = getattr(chunk, "usage", None) or usage
+        if chunk.choices and chunk.choices[0].delta.content:
+            stats.on_chunk()
+            parts.append(chunk.choices[0].delta.content)
+            if sink is not None:
+                sink.write(parts[-1])
+    return _stream_result(parts, usage, stats, endpoint)
+
+
+async def _request_async(endpoint: LLMEndpoint, messages: List[Dict[str, str]], stream: bool,
+                         max_tokens: int, timeout: float, call_site: Optional[str],
+                         sink: Optional[StreamSink] = None,
+                         response_format: Optional[Dict[str, Any]] = None) -> Tuple[str, Any, Optional[StreamStats], LLMEndpoint]:
+    """向单个端点发送异步请求，整个请求（包括流式读取）受timeout限制，返回(响应文本, 用量, 流式统计, 应答的端点)"""
+    async def run() -> Tuple[str, Any, Optional[StreamStats], LLMEndpoint]:
+        client = get_async_client(endpoint.api_key, endpoint.base_url)
+        stats = StreamStats()
+        params = _optional_params(endpoint, stream, response_format)
+        while True:
+            try:
+                response = await client.chat.completions.create(
+                    model=endpoint.model, messages=messages, stream=stream, max_tokens=max_tokens, timeout=timeout,
+                    **params,
+                )
+                break
+            except BadRequestError as e:
+                if not _param_rejected(endpoint, params, e):
+                    raise
+        if not stream:
+            return response.choices[0].message.content, response.usage, None, endpoint
+        parts: List[str] = []
+        usage = None
+        async for chunk in response:
+            usage = getattr(chunk, "usage", None) or usage
+            if chunk.choices and chunk.choices[0].delta.content:
+                stats.on_chunk()
+                parts.append(chunk.choices[0].delta.content)
+                if sink is not None:
+                    sink.write(parts[-1])
+        return _stream_result(parts, usage, stats, endpoint)
+
+    st = time.monotonic()
+    result = await asyncio.wait_for(run(), timeout=timeout)
+    _latency.record(call_site, time.monotonic() - st)
+    return result
+
+
+def _hedge_delay(call_site: Optional[str]) -> Optional[float]:
+    """
+    对冲请求的触发时间：主请求耗时超过该调用点历史耗时的LLM_HEDGE_PERCENTILE分位数时，向备用端点再发一次
+
+    返回:
+        Optional[float]: 触发时间（秒），未启用对冲或样本不足时返回None
+    """
+    pct = float(os.environ.get("LLM_HEDGE_PERCENTILE", "0"))
+    if pct <= 0:
+        return None
+    latency = _latency.percentile(call_site, pct)
+    if latency is None:
+        return None
+    return max(latency, float(os.environ.get("LLM_HEDGE_MIN_DELAY", "5")))
+
+
+async def _hedged_request(state: _RetryState, messages: List[Dict[str, str]], stream: bool,
+                          max_tokens: int, timeout: float, call_site: Optional[str],
+                          reserved: int, sink: Optional[StreamSink] = None,
+                          response_format: Optional[Dict[str, Any]] = None) -> Tuple[str, Any, Optional[StreamStats], LLMEndpoint]:
+    """
+    发送请求，主请求过慢时向备用端点发起对冲请求，取先成功的结果并取消另一个；流式请求不对冲
+
+    返回:
+        Tuple[str, Any, Optional[StreamStats], LLMEndpoint]: (响应文本, 用量, 流式统计, 实际应答的端点)
+    """
+    primary = asyncio.create_task(
+        _request_async(state.endpoint, messages, stream, max_tokens, timeout, call_site, sink, response_format)
+    )
+    delay = None if stream or state.backup is None else _hedge_delay(call_site)
+    if delay is None:
+        return await primary
+
+    done, _ = await asyncio.wait({primary}, timeout=delay)
+    if done:
+        return primary.result()
+
+    backup = state.backup
+    logger.info(f"{state.endpoint.label}超过{delay:.1f}s未返回，向{backup.label}发起对冲请求")
+    # 对冲请求同样占用配额，但不等待，否则就失去了对冲的意义
+    get_rate_limiter().reserve(reserved)
+    pending = {primary, asyncio.create_task(
+        _request_async(backup, messages, stream, max_tokens, timeout, call_site, response_format=response_format)
+    )}
+    error: Optional[BaseException] = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None and task.result()[0]:
+                    return task.result()
+                error = error or task.exception() or EmptyResponseError("收到空响应")
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
 
 def chat_with_deepseek(
     prompt: str,
@@ -21,82 +496,134 @@ def chat_with_deepseek(
     max_retries: int = 3,
     current_retry: int = 0,
     max_tokens: int = 15000,
+    use_cache: bool = True,
+    call_site: Optional[str] = None,
+    timeout: Optional[float] = None,
+    on_chunk: Union[StreamSink, Callable[[str], None], None] = None,
+    response_format: Optional[Dict[str, Any]] = None,
 ) -> str:
     """
     与DeepSeek API进行对话，支持流式输出
-    
+
+    按优先级使用LLM_ENDPOINTS中的端点，失败后指数退避（优先遵循Retry-After）并切换到下一个端点重试。
+
     参数:
         prompt: 用户提示
         system_message: 系统消息
-        model: 模型名称
+        model: 模型名称，指定后只使用这一个端点
         api_key: API密钥
         base_url: API基础URL
         stream: 是否使用流式输出
         max_retries: 最大重试次数
         current_retry: 当前重试次数
-        
+        max_tokens: 最大输出Token数
+        use_cache: 是否读写LLM响应缓存，请求完全相同时直接返回缓存的响应
+        call_site: 调用点名称（流水线阶段），用于按阶段统计Token用量、耗时、重试和缓存命中
+        timeout: 单次请求的超时时间（秒），默认读取LLM_TIMEOUT
+        on_chunk: 流式输出的接收端（StreamSink或接收片段的函数），默认打印到终端
+        response_format: 结构化输出格式，如{"type": "json_object"}，端点不支持时自动改用普通模式
+
     返回:
         str: 模型响应
     """
-    model = model or os.environ.get("ARK_MODEL")
-    api_key = api_key or os.environ.get("ARK_API_KEY")
-    base_url = base_url or os.environ.get("ARK_BASE_URL")
-    
-    client = OpenAI(api_key=api_key, base_url=base_url)
+    endpoints = load_endpoints(model, api_key, base_url)
+    messages = _build_messages(prompt, system_message)
+    sink = (as_sink(on_chunk) or PrintSink()) if stream else None
+    cache_key, cached = _cached_response(endpoints[0].model, messages, max_tokens, use_cache, response_format)
+    if cached is not None:
+        _replay(sink, cached)
+        _CallMetrics(call_site).done(cache_hit=True)
+        return cached
 
-    messages = []
-    if system_message:
-        messages.append({"role": "system", "content": system_message})
-    messages.append({"role": "user", "content": prompt})
+    limiter = get_rate_limiter()
+    reserved = _estimate_request_tokens(messages)
+    call = _CallMetrics(call_site, reserved)
+    state = _RetryState(endpoints, max_retries, current_retry)
+    attempt = 0
+    while True:
+        limiter.acquire_sync(reserved)
+        attempt += 1
+        if sink is not None:
+            sink.begin(attempt)
+        try:
+            text, usage, stats, answered = _request(state.endpoint, messages, stream, max_tokens, _timeout(timeout),
+                                                    sink, response_format=response_format)
+            full_response = _finish(text, usage, call)
+            if sink is not None:
+                sink.end(stats)
+            call.done(retries=attempt - 1, stats=stats)
+            _store_response(cache_key, endpoints[0], answered, full_response)
+            return full_response
+        except Exception as e:
+            time.sleep(_next_delay(state, e, call, attempt))
 
-    try:
-        response = client.chat.completions.create(model=model, messages=messages, stream=stream, max_tokens=max_tokens)
-        full_response = ""
-
-        if stream:
-            for chunk in response:
-                if chunk.choices[0].delta.content is not None:
-                    content = chunk.choices[0].delta.content
-                    print(content, end='', flush=True)
-                    full_response += content
-            print()  # Final newline
-        else:
-            full_response = response.choices[0].message.content
-        global total_tokens
-        total_tokens += response.usage.prompt_tokens + response.usage.completion_tokens
-        logger.info(f"Token使用量: 输入{response.usage.prompt_tokens}，输出{response.usage.completion_tokens}，总使用量{total_tokens}")
-        logger.info(f"得到响应: {full_response}")
-        
-        # 如果响应为空且未超过最大重试次数，则重试
-        if not full_response and current_retry < max_retries:
-            print(f"收到空响应，正在重试... (尝试 {current_retry + 1}/{max_retries})")
-            return chat_with_deepseek(
-                prompt,
-                system_message,
-                model,
-                api_key,
-                base_url,
-                stream,
-                max_retries,
-                current_retry + 1,
-            )
-        elif not full_response and current_retry >= max_retries:
-            raise Exception(f"在{max_retries}次尝试后仍未获得响应")
-
-        return full_response
-
-    except Exception as e:
-        if current_retry < max_retries:
-            print(f"发生错误: {str(e)}，正在重试... (尝试 {current_retry + 1}/{max_retries})")
-            return chat_with_deepseek(
-                prompt,
-                system_message,
-                model,
-                api_key,
-                base_url,
-                stream,
-                max_retries,
-                current_retry + 1,
-            )
-        else:
-            raise Exception(f"在{max_retries}次尝试后失败。最后错误: {str(e)}") 
\ No newline at end of file
+
+async def async_chat_with_deepseek(
+    prompt: str,
+    system_message: Optional[str] = None,
+    model: Optional[str] = None,
+    api_key: Optional[str] = None,
+    base_url: Optional[str] = None,
+    stream: bool = False,
+    max_retries: int = 3,
+    max_tokens: int = 15000,
+    use_cache: bool = True,
+    call_site: Optional[str] = None,
+    timeout: Optional[float] = None,
+    on_chunk: Union[StreamSink, Callable[[str], None], None] = None,
+    response_format: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    chat_with_deepseek的异步版本，等待响应时不阻塞事件循环，可与爬取等协程并发执行
+
+    设置LLM_HEDGE_PERCENTILE后，主请求耗时超过该调用点历史耗时的分位数时会向备用端点发起对冲请求。
+
+    参数:
+        prompt: 用户提示
+        system_message: 系统消息
+        model: 模型名称，指定后只使用这一个端点
+        api_key: API密钥
+        base_url: API基础URL
+        stream: 是否使用流式输出
+        max_retries: 最大重试次数
+        max_tokens: 最大输出Token数
+        use_cache: 是否读写LLM响应缓存
+        call_site: 调用点名称（流水线阶段），用于按阶段统计Token用量、耗时、重试和缓存命中
+        timeout: 单次请求的超时时间（秒），默认读取LLM_TIMEOUT
+        on_chunk: 流式输出的接收端（StreamSink或接收片段的函数）
+        response_format: 结构化输出格式，如{"type": "json_object"}，端点不支持时自动改用普通模式
+
+    返回:
+        str: 模型响应
+    """
+    endpoints = load_endpoints(model, api_key, base_url)
+    messages = _build_messages(prompt, system_message)
+    sink = as_sink(on_chunk) if stream else None
+    cache_key, cached = _cached_response(endpoints[0].model, messages, max_tokens, use_cache, response_format)
+    if cached is not None:
+        _replay(sink, cached)
+        _CallMetrics(call_site).done(cache_hit=True)
+        return cached
+
+    limiter = get_rate_limiter()
+    reserved = _estimate_request_tokens(messages)
+    call = _CallMetrics(call_site, reserved)
+    state = _RetryState(endpoints, max_retries)
+    attempt = 0
+    while True:
+        await limiter.acquire(reserved)
+        attempt += 1
+        if sink is not None:
+            sink.begin(attempt)
+        try:
+            text, usage, stats, answered = await _hedged_request(state, messages, stream, max_tokens,
+                                                                 _timeout(timeout), call_site, reserved, sink,
+                                                                 response_format)
+            full_response = _finish(text, usage, call)
+            if sink is not None:
+                sink.end(stats)
+            call.done(retries=attempt - 1, stats=stats)
+            _store_response(cache_key, endpoints[0], answered, full_response)
+            return full_response
+        except Exception as e:
+            await asyncio.sleep(_next_delay(state, e, call, attempt))
@@ -0,0 +1,128 @@
+"""
+LLM服务端点模块，读取按优先级排列的多个OpenAI兼容端点，并统计各调用点的响应延迟用于对冲请求
+"""
+import json
+import logging
+import os
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+# 计算延迟分位数所需的最少样本数，样本不足时不发起对冲请求
+MIN_LATENCY_SAMPLES = 5
+
+
+@dataclass
+class LLMEndpoint:
+    """
+    OpenAI兼容的LLM服务端点
+
+    属性:
+        base_url: API基础URL
+        api_key: API密钥
+        model: 模型名称
+        name: 端点名称，用于日志
+        json_mode: 是否支持response_format指定的JSON输出模式
+    """
+    base_url: Optional[str]
+    api_key: Optional[str]
+    model: Optional[str]
+    name: str = ""
+    json_mode: bool = True
+
+    @property
+    def label(self) -> str:
+        """日志中显示的端点名称"""
+        return self.name or f"{self.base_url}#{self.model}"
+
+
+def load_endpoints(model: Optional[str] = None, api_key: Optional[str] = None,
+                   base_url: Optional[str] = None) -> List[LLMEndpoint]:
+    """
+    读取按优先级排列的LLM端点
+
+    显式传入model/api_key/base_url任一参数时只使用这一个端点；否则读取LLM_ENDPOINTS，
+    其格式为JSON列表，每项可包含name、base_url、model、api_key或api_key_env（保存密钥的环境变量名）、
+    json_mode（是否支持JSON输出模式），缺省字段使用ARK_BASE_URL/ARK_MODEL/ARK_API_KEY/LLM_JSON_MODE；
+    未配置LLM_ENDPOINTS时只使用ARK_*端点。
+
+    参数:
+        model: 模型名称
+        api_key: API密钥
+        base_url: API基础URL
+
+    返回:
+        List[LLMEndpoint]: 端点列表，第一个为主端点
+    """
+    default = LLMEndpoint(
+        base_url=base_url or os.environ.get("ARK_BASE_URL"),
+        api_key=api_key or os.environ.get("ARK_API_KEY"),
+        model=model or os.environ.get("ARK_MODEL"),
+        name="ark",
+        json_mode=os.environ.get("LLM_JSON_MODE", "1").lower() not in ("0", "false", "no"),
+    )
+    raw = os.environ.get("LLM_ENDPOINTS")
+    if model or api_key or base_url or not raw:
+        return [default]
+
+    try:
+        items = json.loads(raw)
+    except json.JSONDecodeError as e:
+        logger.error(f"LLM_ENDPOINTS不是有效的JSON，只使用ARK_*端点: {e}")
+        return [default]
+
+    endpoints = []
+    for idx, item in enumerate(items):
+        key = item.get("api_key")
+        if key is None and item.get("api_key_env"):
+            key = os.environ.get(item["api_key_env"])
+        endpoints.append(LLMEndpoint(
+            base_url=item.get("base_url", default.base_url),
+            api_key=key if key is not None else default.api_key,
+            model=item.get("model", default.model),
+            name=item.get("name", f"endpoint{idx}"),
+            json_mode=bool(item.get("json_mode", default.json_mode)),
+        ))
+    return endpoints or [default]
+
+
+class LatencyTracker:
+    """
+    记录各调用点最近若干次请求的耗时，用于计算对冲请求的触发时间
+    """
+
+    def __init__(self, window: int = 50):
+        """
+        参数:
+            window: 每个调用点保留的最近样本数
+        """
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, site: Optional[str], seconds: float) -> None:
+        """记录一次成功请求的耗时"""
+        with self._lock:
+            self._samples.setdefault(site or "default", deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, site: Optional[str], pct: float) -> Optional[float]:
+        """
+        计算调用点耗时的分位数
+
+        参数:
+            site: 调用点名称
+            pct: 分位数（0~100）
+
+        返回:
+            Optional[float]: 耗时分位数（秒），样本不足时返回None
+        """
+        with self._lock:
+            samples = sorted(self._samples.get(site or "default", ()))
+        if len(samples) < MIN_LATENCY_SAMPLES:
+            return None
+        index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+        return samples[index]
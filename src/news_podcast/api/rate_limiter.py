@@ -0,0 +1,202 @@
+"""
+LLM请求限流模块，按每分钟请求数（RPM）和每分钟Token数（TPM）对模型调用进行令牌桶限流
+
+令牌桶采用预约方式：每次调用先扣除令牌，余额为负时计算需要等待的时间，
+因此不需要跨事件循环的锁，同步和异步调用可以共用同一个限流器。
+收到429时降低补充速率并暂停一段时间，之后随成功的请求逐步恢复。
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+# 收到429后补充速率乘以该系数，成功后每次恢复RECOVERY_STEP，最低降到MIN_THROTTLE
+THROTTLE_FACTOR = 0.5
+RECOVERY_STEP = 0.1
+MIN_THROTTLE = 0.1
+# 服务端未给出Retry-After时的暂停时间（秒）
+DEFAULT_PAUSE = 5.0
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    粗略估算文本的Token数：中日韩文字按每字1个Token，其他字符按每4个字符1个Token
+
+    参数:
+        text: 文本
+
+    返回:
+        int: 估算的Token数
+    """
+    cjk = sum(1 for ch in text if "一" <= ch <= "鿿")
+    return cjk + (len(text) - cjk) // 4 + 1
+
+
+class TokenBucket:
+    """
+    令牌桶，容量为一分钟的配额，余额允许为负表示已预约的等待
+    """
+
+    def __init__(self, rate_per_minute: float):
+        """
+        参数:
+            rate_per_minute: 每分钟补充的令牌数
+        """
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(rate_per_minute)
+        self.available = self.capacity
+        self.throttle = 1.0
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        """按经过的时间补充令牌"""
+        elapsed = now - self._updated
+        self._updated = now
+        self.available = min(self.capacity, self.available + elapsed * self.rate * self.throttle)
+
+    def reserve(self, amount: float) -> float:
+        """
+        预约令牌
+
+        参数:
+            amount: 需要的令牌数
+
+        返回:
+            float: 需要等待的时间（秒）
+        """
+        now = time.monotonic()
+        self._refill(now)
+        self.available -= amount
+        if self.available >= 0:
+            return 0.0
+        return -self.available / (self.rate * self.throttle)
+
+    def adjust(self, amount: float) -> None:
+        """补扣（正数）或退还（负数）令牌，用于按实际用量修正预估"""
+        self._refill(time.monotonic())
+        self.available = min(self.capacity, self.available - amount)
+
+    def pause(self, seconds: float) -> None:
+        """清空余额并额外暂停seconds秒"""
+        self._refill(time.monotonic())
+        self.available = min(self.available, 0.0) - seconds * self.rate * self.throttle
+
+
+class RateLimiter:
+    """
+    同时按RPM和TPM限流的LLM调用限流器
+    """
+
+    def __init__(self, rpm: Optional[float] = None, tpm: Optional[float] = None):
+        """
+        参数:
+            rpm: 每分钟最多请求数，默认读取LLM_RPM，0表示不限制
+            tpm: 每分钟最多Token数，默认读取LLM_TPM，0表示不限制
+        """
+        rpm = rpm if rpm is not None else float(os.environ.get("LLM_RPM", "60"))
+        tpm = tpm if tpm is not None else float(os.environ.get("LLM_TPM", "200000"))
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self.rate_limited = 0
+        self._lock = threading.Lock()
+
+    def _buckets(self):
+        return [bucket for bucket in (self.requests, self.tokens) if bucket is not None]
+
+    def reserve(self, tokens: int) -> float:
+        """
+        为一次请求预约配额
+
+        参数:
+            tokens: 预估的Token数
+
+        返回:
+            float: 需要等待的时间（秒）
+        """
+        with self._lock:
+            waits = []
+            if self.requests is not None:
+                waits.append(self.requests.reserve(1))
+            if self.tokens is not None:
+                # 单次请求超过整个桶的容量时按容量预约，否则永远无法满足
+                waits.append(self.tokens.reserve(min(tokens, self.tokens.capacity)))
+            return max(waits, default=0.0)
+
+    async def acquire(self, tokens: int) -> None:
+        """异步等待配额"""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            logger.info(f"LLM调用限流，等待{wait:.1f}s")
+            await asyncio.sleep(wait)
+
+    def acquire_sync(self, tokens: int) -> None:
+        """同步等待配额"""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            logger.info(f"LLM调用限流，等待{wait:.1f}s")
+            time.sleep(wait)
+
+    def record_usage(self, reserved: int, actual: Optional[int]) -> None:
+        """
+        按实际Token用量修正预约
+
+        参数:
+            reserved: 预约时的预估Token数
+            actual: 响应中的实际Token数，未返回时不修正
+        """
+        if self.tokens is None or actual is None:
+            return
+        with self._lock:
+            self.tokens.adjust(actual - min(reserved, self.tokens.capacity))
+
+    def on_success(self) -> None:
+        """请求成功后逐步恢复补充速率"""
+        with self._lock:
+            for bucket in self._buckets():
+                bucket.throttle = min(1.0, bucket.throttle + RECOVERY_STEP)
+
+    def on_rate_limited(self, retry_after: Optional[float] = None) -> None:
+        """
+        收到429后降低补充速率并暂停
+
+        参数:
+            retry_after: 服务端要求的等待时间（秒）
+        """
+        pause = retry_after if retry_after is not None else DEFAULT_PAUSE
+        with self._lock:
+            self.rate_limited += 1
+            for bucket in self._buckets():
+                bucket.throttle = max(MIN_THROTTLE, bucket.throttle * THROTTLE_FACTOR)
+                bucket.pause(pause)
+            throttle = self.requests.throttle if self.requests is not None else 1.0
+        logger.warning(f"LLM调用被限流(429)，暂停{pause:.1f}s，补充速率降为{throttle:.0%}")
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """获取进程内共享的限流器，首次调用时按环境变量创建"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter()
+        return _limiter
+
+
+def configure_rate_limiter(limiter: RateLimiter) -> None:
+    """
+    替换进程内共享的限流器
+
+    参数:
+        limiter: 新的限流器
+    """
+    global _limiter
+    with _limiter_lock:
+        _limiter = limiter
@@ -0,0 +1,175 @@
+"""
+流式输出模块，将模型流式返回的片段实时交给回调或写入文件，并统计首Token耗时和生成速度
+"""
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Optional, Union
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+
+class StreamStats:
+    """
+    一次流式请求的耗时统计
+
+    属性:
+        started_at: 请求开始时间
+        first_token_at: 收到第一个非空片段的时间
+        finished_at: 流结束的时间
+        completion_tokens: 输出的Token数
+    """
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.first_token_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.completion_tokens = 0
+
+    def on_chunk(self) -> None:
+        """收到一个非空片段"""
+        if self.first_token_at is None:
+            self.first_token_at = time.monotonic()
+
+    def finish(self, completion_tokens: int) -> None:
+        """流结束"""
+        self.finished_at = time.monotonic()
+        self.completion_tokens = completion_tokens
+
+    @property
+    def ttft(self) -> Optional[float]:
+        """首Token耗时（秒）"""
+        return None if self.first_token_at is None else self.first_token_at - self.started_at
+
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        """从首Token到结束的生成速度"""
+        if self.first_token_at is None or self.finished_at is None or self.finished_at <= self.first_token_at:
+            return None
+        return self.completion_tokens / (self.finished_at - self.first_token_at)
+
+    def summary(self) -> str:
+        """日志中显示的统计信息"""
+        ttft = f"{self.ttft:.2f}s" if self.ttft is not None else "-"
+        speed = f"{self.tokens_per_second:.1f} tokens/s" if self.tokens_per_second is not None else "-"
+        return f"首Token耗时 {ttft}，输出{self.completion_tokens} tokens，生成速度 {speed}"
+
+
+class StreamSink(ABC):
+    """
+    流式输出的接收端
+
+    每次尝试（包括失败后的重试和故障切换）开始时调用begin，之后按顺序调用write，成功结束时调用end。
+    子类必须实现write。
+    """
+
+    def begin(self, attempt: int) -> None:
+        """
+        开始一次尝试
+
+        参数:
+            attempt: 第几次尝试，从1开始
+        """
+
+    @abstractmethod
+    def write(self, chunk: str) -> None:
+        """接收一个片段"""
+
+    def end(self, stats: Optional[StreamStats]) -> None:
+        """
+        请求成功结束
+
+        参数:
+            stats: 耗时统计，命中缓存时为None
+        """
+
+
+class CallbackSink(StreamSink):
+    """把每个片段交给回调函数"""
+
+    def __init__(self, callback: Callable[[str], None]):
+        """
+        参数:
+            callback: 接收片段的函数
+        """
+        self.callback = callback
+
+    def write(self, chunk: str) -> None:
+        self.callback(chunk)
+
+
+class PrintSink(StreamSink):
+    """把片段打印到终端"""
+
+    def write(self, chunk: str) -> None:
+        print(chunk, end='', flush=True)
+
+    def end(self, stats: Optional[StreamStats]) -> None:
+        print()  # Final newline
+
+
+class FileSink(StreamSink):
+    """
+    把片段实时追加写入文件，中途失败时已生成的内容仍保留在文件中
+
+    重试时上一次尝试的部分内容移动到{path}.partial；第一次尝试时文件已存在（如上次运行中途退出），
+    原有内容移动到{path}.{时间}.partial，不会被覆盖，便于检查被截断的输出。
+    请求最终失败时不会调用end，应作为上下文管理器使用，退出时关闭文件。
+    """
+
+    def __init__(self, path: str):
+        """
+        参数:
+            path: 输出文件路径
+        """
+        self.path = path
+        self._file = None
+
+    def begin(self, attempt: int) -> None:
+        self._close()
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            if attempt > 1:
+                partial = f"{self.path}.partial"
+                logger.warning(f"第{attempt}次尝试，上一次的部分输出已保存到{partial}")
+            else:
+                partial = f"{self.path}.{time.strftime('%Y%m%d%H%M%S')}.partial"
+                logger.warning(f"{self.path}已存在，原有内容已保存到{partial}")
+            os.replace(self.path, partial)
+        self._file = open(self.path, "w", encoding="utf-8")
+
+    def write(self, chunk: str) -> None:
+        if self._file is None:
+            self.begin(1)
+        self._file.write(chunk)
+        self._file.flush()
+
+    def end(self, stats: Optional[StreamStats]) -> None:
+        self._close()
+
+    def __enter__(self) -> "FileSink":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._close()
+
+    def _close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def as_sink(on_chunk: Union[StreamSink, Callable[[str], None], None]) -> Optional[StreamSink]:
+    """
+    把回调函数包装为StreamSink
+
+    参数:
+        on_chunk: StreamSink实例或接收片段的函数
+
+    返回:
+        Optional[StreamSink]: 接收端，未指定时返回None
+    """
+    if on_chunk is None or isinstance(on_chunk, StreamSink):
+        return on_chunk
+    return CallbackSink(on_chunk)
@@ -0,0 +1,170 @@
+"""
+爬取配置模块，定义按页面类型或新闻源选择的资源拦截和加载策略
+
+我们只使用页面的Markdown，图片、视频、字体以及广告和统计脚本都可以在请求阶段直接拦截，
+以减少带宽占用和页面加载时间。
+"""
+import logging
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+from crawl4ai import CacheMode, CrawlerRunConfig
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+# 广告、统计和推荐组件常用的第三方域名
+DEFAULT_BLOCKED_DOMAINS = [
+    "doubleclick.net",
+    "googlesyndication.com",
+    "googletagmanager.com",
+    "google-analytics.com",
+    "googleadservices.com",
+    "adnxs.com",
+    "amazon-adsystem.com",
+    "criteo.com",
+    "pubmatic.com",
+    "rubiconproject.com",
+    "moatads.com",
+    "scorecardresearch.com",
+    "quantserve.com",
+    "chartbeat.com",
+    "hotjar.com",
+    "optimizely.com",
+    "taboola.com",
+    "outbrain.com",
+    "facebook.net",
+]
+
+# crawl4ai通过shared_data把当前配置传递给页面钩子
+SHARED_DATA_KEY = "crawl_profile"
+
+
+@dataclass
+class CrawlProfile:
+    """
+    爬取配置
+
+    属性:
+        name: 配置名称
+        blocked_resource_types: 拦截的Playwright资源类型，如image、media、font、stylesheet
+        blocked_domains: 拦截的域名，包含其子域名
+        page_timeout: 页面加载超时时间（毫秒）
+        wait_until: 页面导航的等待条件，如domcontentloaded、load、networkidle
+        simulate_user: 是否模拟用户操作
+        magic: 是否自动处理弹窗等干扰
+    """
+    name: str
+    blocked_resource_types: List[str] = field(default_factory=list)
+    blocked_domains: List[str] = field(default_factory=list)
+    page_timeout: int = 60000
+    wait_until: str = "domcontentloaded"
+    simulate_user: bool = True
+    magic: bool = True
+
+    def run_config(self) -> CrawlerRunConfig:
+        """
+        生成对应的crawl4ai爬取配置
+
+        返回:
+            CrawlerRunConfig: 爬取配置，资源拦截由页面钩子根据shared_data执行
+        """
+        return CrawlerRunConfig(
+            cache_mode=CacheMode.DISABLED,
+            simulate_user=self.simulate_user,
+            override_navigator=True,
+            magic=self.magic,  # 自动处理弹窗
+            page_timeout=self.page_timeout,
+            wait_until=self.wait_until,
+            shared_data={SHARED_DATA_KEY: self},
+        )
+
+    def blocks(self, resource_type: str, url: str) -> bool:
+        """
+        判断请求是否应该被拦截
+
+        参数:
+            resource_type: Playwright的资源类型
+            url: 请求URL
+
+        返回:
+            bool: 是否拦截
+        """
+        if resource_type in self.blocked_resource_types:
+            return True
+        if not self.blocked_domains:
+            return False
+        host = urlparse(url).hostname or ""
+        return any(host == domain or host.endswith(f".{domain}") for domain in self.blocked_domains)
+
+
+# 内置配置：full保持原有行为，homepage/article分别作为首页和文章页的默认配置
+BUILTIN_PROFILES: Dict[str, CrawlProfile] = {
+    "full": CrawlProfile(name="full"),
+    "homepage": CrawlProfile(
+        name="homepage",
+        blocked_resource_types=["image", "media", "font"],
+        blocked_domains=list(DEFAULT_BLOCKED_DOMAINS),
+        page_timeout=45000,
+    ),
+    "article": CrawlProfile(
+        name="article",
+        blocked_resource_types=["image", "media", "font"],
+        blocked_domains=list(DEFAULT_BLOCKED_DOMAINS),
+        page_timeout=30000,
+    ),
+    "lite": CrawlProfile(
+        name="lite",
+        blocked_resource_types=["image", "media", "font", "stylesheet", "websocket", "manifest"],
+        blocked_domains=list(DEFAULT_BLOCKED_DOMAINS),
+        page_timeout=30000,
+    ),
+}
+
+
+def build_profiles(overrides: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, CrawlProfile]:
+    """
+    合并内置配置和配置文件中的自定义配置
+
+    参数:
+        overrides: 配置名到字段的映射，同名配置只覆盖给出的字段
+
+    返回:
+        Dict[str, CrawlProfile]: 配置名到爬取配置的映射
+    """
+    profiles = dict(BUILTIN_PROFILES)
+    for name, fields in (overrides or {}).items():
+        base = profiles.get(name, CrawlProfile(name=name))
+        profiles[name] = replace(base, name=name, **(fields or {}))
+    return profiles
+
+
+async def block_resources(page, context=None, config: Optional[CrawlerRunConfig] = None, **kwargs):
+    """
+    crawl4ai的on_page_context_created钩子，按爬取配置拦截页面请求
+
+    拦截注册在页面上而不是浏览器上下文上，不同配置共用上下文时互不影响。
+
+    参数:
+        page: Playwright页面
+        context: 浏览器上下文
+        config: 本次爬取的配置
+
+    返回:
+        页面对象
+    """
+    shared_data = getattr(config, "shared_data", None) or {}
+    profile: Optional[CrawlProfile] = shared_data.get(SHARED_DATA_KEY)
+    if profile is None or not (profile.blocked_resource_types or profile.blocked_domains):
+        return page
+
+    async def handle_route(route):
+        request = route.request
+        if profile.blocks(request.resource_type, request.url):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    await page.route("**/*", handle_route)
+    return page
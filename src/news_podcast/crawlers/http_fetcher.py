@@ -0,0 +1,132 @@
+"""
+HTTP快速爬取模块，直接请求服务端渲染的HTML并在本地转换为Markdown
+
+大部分文章页无需启动浏览器即可拿到正文，只有内容过短、遇到付费墙或依赖JS渲染时才需要回退到Playwright。
+"""
+import logging
+import re
+from typing import Dict, Optional, Tuple
+
+import httpx
+from crawl4ai.html2text import HTML2Text
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+# 爬取层级
+TIER_HTTP = "http"        # 先用HTTP客户端请求，失败再回退到浏览器
+TIER_BROWSER = "browser"  # 直接使用Playwright浏览器
+
+# 不同页面类型可接受的最短Markdown长度
+MIN_CONTENT_LENGTH = {
+    "homepage": 3000,
+    "article": 1500,
+}
+
+# 付费墙提示，出现在内容中说明只拿到了摘要
+PAYWALL_MARKERS = [
+    "subscribe to continue",
+    "subscribe to read",
+    "to continue reading",
+    "already a subscriber",
+    "create a free account to continue",
+    "this content is for subscribers",
+    "sign in to read",
+]
+
+# 需要JS渲染的提示
+JS_ONLY_MARKERS = [
+    "enable javascript",
+    "javascript is disabled",
+    "please enable js",
+    "requires javascript",
+    "you need to enable javascript",
+]
+
+# 模拟常见浏览器的请求头，部分站点会拒绝默认的客户端UA
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+
+def html_to_markdown(html: str, base_url: str) -> str:
+    """
+    将HTML转换为Markdown，相对链接转换为绝对链接
+
+    参数:
+        html: 页面HTML
+        base_url: 页面URL，用于补全相对链接
+
+    返回:
+        str: Markdown内容
+    """
+    converter = HTML2Text(baseurl=base_url, bodywidth=0)
+    converter.ignore_images = True
+    converter.ignore_emphasis = False
+    return converter.handle(html)
+
+
+def escalation_reason(markdown: str, html: str, kind: str) -> Optional[str]:
+    """
+    判断HTTP爬取结果是否需要回退到浏览器
+
+    参数:
+        markdown: 转换后的Markdown内容
+        html: 原始HTML
+        kind: 页面类型（homepage/article）
+
+    返回:
+        Optional[str]: 需要回退时返回原因，否则返回None
+    """
+    text = markdown.strip()
+    lowered = text.lower()
+    if any(marker in lowered for marker in JS_ONLY_MARKERS) and len(text) < 5000:
+        return "js_only"
+    if any(marker in lowered for marker in PAYWALL_MARKERS) and len(text) < 5000:
+        return "paywall"
+    if len(text) < MIN_CONTENT_LENGTH.get(kind, MIN_CONTENT_LENGTH["article"]):
+        # 页面主体只有一个挂载点而没有正文，通常是前端渲染的站点
+        if re.search(r'<div[^>]+id="(root|app|__next)"[^>]*>\s*</div>', html):
+            return "js_only"
+        return "too_short"
+    return None
+
+
+async def http_fetch(url: str, client: httpx.AsyncClient, kind: str = "article") -> Tuple[Optional[str], str, Dict[str, str]]:
+    """
+    使用HTTP客户端请求页面并转换为Markdown
+
+    参数:
+        url: 页面URL
+        client: 复用连接池的HTTP客户端
+        kind: 页面类型（homepage/article）
+
+    返回:
+        Tuple[Optional[str], str, Dict[str, str]]: (Markdown内容, 结果说明, 响应头)，
+            内容不可用时Markdown为None，结果说明为回退原因
+    """
+    try:
+        response = await client.get(url, headers=DEFAULT_HEADERS)
+    except httpx.TimeoutException:
+        return None, "timeout", {}
+    except httpx.HTTPError as e:
+        logger.info(f"HTTP爬取{url}出错: {e}")
+        return None, "error", {}
+
+    headers = dict(response.headers)
+    if response.status_code != 200:
+        return None, f"status_{response.status_code}", headers
+    if "html" not in response.headers.get("content-type", "html"):
+        return None, "not_html", headers
+
+    html = response.text
+    markdown = html_to_markdown(html, str(response.url))
+    reason = escalation_reason(markdown, html, kind)
+    if reason:
+        return None, reason, headers
+    return markdown, "ok", headers
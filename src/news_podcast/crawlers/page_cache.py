@@ -0,0 +1,220 @@
+"""
+网页内容缓存模块，将爬取结果持久化到磁盘，避免重跑时重复渲染页面
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, asdict
+from typing import Dict, Optional
+
+import httpx
+
+from src.news_podcast.utils.cache_modes import CACHE_DISABLED, CACHE_ENABLED
+from src.news_podcast.utils.url_canon import canonical_url, url_key
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+# 各类页面的默认有效期（秒）：首页变化快，文章页基本不变
+DEFAULT_TTLS = {
+    "homepage": 3600,
+    "article": 7 * 24 * 3600,
+}
+
+
+@dataclass
+class CacheEntry:
+    """
+    缓存条目
+
+    属性:
+        url: 规范化后的URL
+        kind: 页面类型（homepage/article）
+        content: 页面的Markdown内容
+        fetched_at: 爬取或最近一次验证的时间戳
+        etag: 响应中的ETag头
+        last_modified: 响应中的Last-Modified头
+    """
+    url: str
+    kind: str
+    content: str
+    fetched_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+class PageCache:
+    """
+    基于磁盘的网页内容缓存
+
+    每个URL对应缓存目录下的一个JSON文件，按页面类型设置有效期；
+    过期后如果站点提供了ETag/Last-Modified，会先发送条件请求验证，未变化则继续使用缓存。
+    缓存总大小超过上限时，按最近访问时间淘汰最旧的条目。
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None,
+                 mode: str = CACHE_ENABLED,
+                 ttls: Optional[Dict[str, float]] = None,
+                 max_bytes: Optional[int] = None):
+        """
+        参数:
+            cache_dir: 缓存目录，默认读取PAGE_CACHE_DIR
+            mode: 缓存模式，enabled/refresh/disabled
+            ttls: 各类页面的有效期（秒），默认读取PAGE_CACHE_HOMEPAGE_TTL/PAGE_CACHE_ARTICLE_TTL
+            max_bytes: 缓存总大小上限，默认读取PAGE_CACHE_MAX_MB
+        """
+        self.cache_dir = cache_dir or os.environ.get("PAGE_CACHE_DIR", ".cache/pages")
+        self.mode = mode
+        self.ttls = dict(DEFAULT_TTLS)
+        self.ttls["homepage"] = float(os.environ.get("PAGE_CACHE_HOMEPAGE_TTL", self.ttls["homepage"]))
+        self.ttls["article"] = float(os.environ.get("PAGE_CACHE_ARTICLE_TTL", self.ttls["article"]))
+        if ttls:
+            self.ttls.update(ttls)
+        self.max_bytes = max_bytes or int(float(os.environ.get("PAGE_CACHE_MAX_MB", "200")) * 1024 * 1024)
+        if self.mode != CACHE_DISABLED:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, url: str) -> str:
+        """返回URL对应的缓存文件路径"""
+        key = hashlib.sha256(url_key(url).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        """
+        读取缓存条目，不检查是否过期
+
+        参数:
+            url: 页面URL
+
+        返回:
+            Optional[CacheEntry]: 缓存条目，不存在或读取失败时返回None
+        """
+        path = self._path(url)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return CacheEntry(**json.load(f))
+        except Exception as e:
+            logger.warning(f"读取缓存{path}失败: {e}")
+            return None
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        """判断缓存条目是否仍在有效期内"""
+        ttl = self.ttls.get(entry.kind, self.ttls["article"])
+        return time.time() - entry.fetched_at < ttl
+
+    def put(self, url: str, kind: str, content: str, headers: Optional[Dict[str, str]] = None) -> None:
+        """
+        写入缓存条目
+
+        参数:
+            url: 页面URL
+            kind: 页面类型（homepage/article）
+            content: 页面的Markdown内容
+            headers: 响应头，用于记录ETag/Last-Modified
+        """
+        if self.mode == CACHE_DISABLED:
+            return
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+        entry = CacheEntry(
+            url=canonical_url(url),
+            kind=kind,
+            content=content,
+            fetched_at=time.time(),
+            etag=headers.get("etag"),
+            last_modified=headers.get("last-modified"),
+        )
+        self._write(url, entry)
+        self.evict()
+
+    def _write(self, url: str, entry: CacheEntry) -> None:
+        """原子写入缓存文件"""
+        path = self._path(url)
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(asdict(entry), f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"写入缓存{path}失败: {e}")
+
+    def evict(self) -> None:
+        """缓存总大小超过上限时，按最近访问时间淘汰最旧的条目"""
+        try:
+            files = [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)
+                     if name.endswith(".json")]
+            stats = [(path, os.stat(path)) for path in files]
+        except OSError as e:
+            logger.warning(f"扫描缓存目录失败: {e}")
+            return
+        total = sum(stat.st_size for _, stat in stats)
+        if total <= self.max_bytes:
+            return
+        for path, stat in sorted(stats, key=lambda item: item[1].st_mtime):
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= stat.st_size
+            if total <= self.max_bytes:
+                break
+        logger.info(f"缓存超过上限，淘汰后大小: {total / 1024 / 1024:.1f}MB")
+
+    async def revalidate(self, entry: CacheEntry, client: httpx.AsyncClient) -> bool:
+        """
+        使用ETag/Last-Modified发送条件请求，验证过期的缓存是否仍然有效
+
+        参数:
+            entry: 过期的缓存条目
+            client: HTTP客户端
+
+        返回:
+            bool: 服务器返回304时为True
+        """
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        if not headers:
+            return False
+        try:
+            response = await client.get(entry.url, headers=headers)
+        except httpx.HTTPError as e:
+            logger.warning(f"验证缓存{entry.url}时出错: {e}")
+            return False
+        return response.status_code == 304
+
+    async def lookup(self, url: str, kind: str, client: Optional[httpx.AsyncClient] = None) -> Optional[str]:
+        """
+        查询缓存，过期时尝试条件验证
+
+        参数:
+            url: 页面URL
+            kind: 页面类型（homepage/article）
+            client: 用于条件验证的HTTP客户端，为None时不验证
+
+        返回:
+            Optional[str]: 命中时返回页面内容，否则返回None
+        """
+        if self.mode != CACHE_ENABLED:
+            return None
+        entry = self.get(url)
+        if entry is None:
+            return None
+        if entry.kind != kind:
+            # 同一URL以不同类型访问时使用对应类型的有效期
+            entry.kind = kind
+        if self.is_fresh(entry):
+            os.utime(self._path(url))
+            logger.info(f"命中缓存: {url}")
+            return entry.content
+        if client is not None and await self.revalidate(entry, client):
+            entry.fetched_at = time.time()
+            self._write(url, entry)
+            logger.info(f"缓存已过期但验证未变化: {url}")
+            return entry.content
+        return None
@@ -1,13 +1,27 @@
 """
 网页爬虫模块，用于爬取网页内容
 """
+import asyncio
 import logging
-from typing import Optional, Tuple, List
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Tuple, Union
 
-from crawl4ai import AsyncWebCrawler, CrawlerRunConfig, CacheMode
+import httpx
+from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig
+from crawl4ai.models import CrawlResult
 from crawl4ai.async_crawler_strategy import AsyncPlaywrightCrawlerStrategy
 from crawl4ai.browser_manager import BrowserManager
 
+from src.news_podcast.crawlers.crawl_profiles import BUILTIN_PROFILES, CrawlProfile, block_resources
+from src.news_podcast.crawlers.http_fetcher import TIER_BROWSER, TIER_HTTP, http_fetch
+from src.news_podcast.crawlers.page_cache import PageCache
+from src.news_podcast.utils.retry import (
+    ERROR_CIRCUIT_OPEN, ERROR_NETWORK, ERROR_OTHER, ERROR_TIMEOUT,
+    CircuitBreaker, RetryPolicy, classify_error,
+)
+from src.news_podcast.utils.url_canon import bare_host
+
 # 设置日志
 logger = logging.getLogger(__name__)
 
@@ -31,102 +45,364 @@ async def patched_async_playwright__crawler_strategy_close(self) -> None:
 # 应用补丁
 AsyncPlaywrightCrawlerStrategy.close = patched_async_playwright__crawler_strategy_close
 
-async def async_search(search_url: str, bypass_paywall: bool = False) -> str:
+
+class CrawlerSession:
+    """
+    一次运行内共享的爬虫会话，所有URL复用同一个浏览器实例
+
+    每次爬取都会在浏览器中打开独立的页面，爬取结束后页面即被关闭；
+    浏览器累计服务max_pages_per_browser个页面后会在空闲时重启，避免内存持续增长。
+    如果提供了页面缓存，async_search会优先从缓存读取，爬取成功后写入缓存。
+    会话内所有爬取共享同一个重试策略和按域名的熔断器，某个站点宕机时后续请求会直接失败。
+
+    用法:
+        async with CrawlerSession() as session:
+            content = await async_search(url, session=session)
+    """
+
+    def __init__(self, max_pages_per_browser: int = 50, browser_config: Optional[BrowserConfig] = None,
+                 cache: Optional[PageCache] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 breaker: Optional[CircuitBreaker] = None,
+                 profiles: Optional[Dict[str, CrawlProfile]] = None):
+        """
+        参数:
+            max_pages_per_browser: 单个浏览器实例最多服务的页面数，超过后重启浏览器
+            browser_config: 浏览器配置，为None时使用crawl4ai默认配置
+            cache: 页面缓存，为None时不使用缓存
+            retry_policy: 重试策略，默认读取CRAWLER_MAX_ATTEMPTS
+            breaker: 按域名的熔断器，默认读取CRAWLER_BREAKER_THRESHOLD
+            profiles: 可按名称选择的爬取配置，默认使用内置配置
+        """
+        self.max_pages_per_browser = max_pages_per_browser
+        self.browser_config = browser_config
+        self.cache = cache
+        self.retry_policy = retry_policy or RetryPolicy(
+            max_attempts=int(os.environ.get("CRAWLER_MAX_ATTEMPTS", "3"))
+        )
+        self.breaker = breaker or CircuitBreaker(int(os.environ.get("CRAWLER_BREAKER_THRESHOLD", "4")))
+        self.profiles = profiles or dict(BUILTIN_PROFILES)
+        self.tier_log: Dict[str, Dict[str, str]] = {}
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._crawler: Optional[AsyncWebCrawler] = None
+        self._pages_served = 0
+        self._active_pages = 0
+        self._recycling = False
+        self._condition = asyncio.Condition()
+
+    async def __aenter__(self) -> "CrawlerSession":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.close()
+
+    async def _start_crawler(self) -> None:
+        """启动新的浏览器实例"""
+        crawler = AsyncWebCrawler(config=self.browser_config)
+        crawler.crawler_strategy.set_hook("on_page_context_created", block_resources)
+        await crawler.start()
+        self._crawler = crawler
+        self._pages_served = 0
+        logger.info("爬虫会话已启动浏览器")
+
+    async def _close_crawler(self) -> None:
+        """关闭当前浏览器实例"""
+        if self._crawler is None:
+            return
+        crawler, self._crawler = self._crawler, None
+        try:
+            await crawler.close()
+        except Exception as e:
+            logger.warning(f"关闭浏览器时出错: {e}")
+        logger.info(f"爬虫会话已关闭浏览器，共服务{self._pages_served}个页面")
+
+    async def _acquire(self) -> AsyncWebCrawler:
+        """获取可用的浏览器实例，必要时等待空闲后重启"""
+        async with self._condition:
+            await self._condition.wait_for(lambda: not self._recycling)
+            if self._crawler is not None and self._pages_served >= self.max_pages_per_browser:
+                # 等待正在进行的页面结束后再重启浏览器
+                self._recycling = True
+                try:
+                    await self._condition.wait_for(lambda: self._active_pages == 0)
+                    logger.info(f"浏览器已服务{self._pages_served}个页面，重启浏览器")
+                    await self._close_crawler()
+                finally:
+                    self._recycling = False
+                    self._condition.notify_all()
+            if self._crawler is None:
+                await self._start_crawler()
+            self._pages_served += 1
+            self._active_pages += 1
+            return self._crawler
+
+    async def _release(self, failed: bool = False) -> None:
+        """归还浏览器实例"""
+        async with self._condition:
+            self._active_pages -= 1
+            if failed:
+                # 浏览器可能已处于异常状态，下一次获取时重启
+                self._pages_served = max(self._pages_served, self.max_pages_per_browser)
+            self._condition.notify_all()
+
+    async def arun(self, url: str, config: CrawlerRunConfig) -> CrawlResult:
+        """
+        在共享浏览器中打开新页面爬取URL
+
+        参数:
+            url: 需要爬取的URL
+            config: 爬取配置
+
+        返回:
+            CrawlResult: crawl4ai的爬取结果
+        """
+        crawler = await self._acquire()
+        failed = False
+        try:
+            return await crawler.arun(url=url, config=config)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            await self._release(failed)
+
+    def record_tier(self, url: str, tier: str, reason: str) -> None:
+        """
+        记录URL最终由哪一层爬取成功
+
+        参数:
+            url: 页面URL
+            tier: 爬取层级（http/browser/archive/cache）
+            reason: 说明，回退到浏览器时为HTTP层失败的原因
+        """
+        self.tier_log[url] = {"tier": tier, "reason": reason}
+
+    def tier_stats(self) -> Dict[str, object]:
+        """
+        汇总各爬取层级的使用情况
+
+        返回:
+            Dict[str, object]: 包含各层级计数counts和每个URL明细urls
+        """
+        counts: Dict[str, int] = {}
+        for record in self.tier_log.values():
+            counts[record["tier"]] = counts.get(record["tier"], 0) + 1
+        return {"counts": counts, "urls": self.tier_log}
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """会话共享的HTTP客户端，复用连接池"""
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(
+                follow_redirects=True,
+                timeout=httpx.Timeout(20.0),
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            )
+        return self._http_client
+
+    async def close(self) -> None:
+        """关闭会话并释放浏览器资源"""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._active_pages == 0)
+            await self._close_crawler()
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
+
+async def _crawl(url: str, config: CrawlerRunConfig, session: Optional[CrawlerSession]) -> CrawlResult:
+    """
+    使用共享会话爬取URL；未提供会话时临时启动一个浏览器
+
+    参数:
+        url: 需要爬取的URL
+        config: 爬取配置
+        session: 爬虫会话
+
+    返回:
+        CrawlResult: crawl4ai的爬取结果
+    """
+    if session is not None:
+        return await session.arun(url, config)
+    crawler = AsyncWebCrawler()
+    crawler.crawler_strategy.set_hook("on_page_context_created", block_resources)
+    async with crawler:
+        return await crawler.arun(url=url, config=config)
+
+
+def resolve_profile(profile: Union[str, CrawlProfile], session: Optional[CrawlerSession] = None) -> CrawlProfile:
+    """
+    按名称查找爬取配置，优先使用会话中的配置
+
+    参数:
+        profile: 配置名称或配置对象
+        session: 爬虫会话
+
+    返回:
+        CrawlProfile: 爬取配置，名称不存在时使用full配置
+    """
+    if isinstance(profile, CrawlProfile):
+        return profile
+    profiles = session.profiles if session is not None else BUILTIN_PROFILES
+    if profile not in profiles:
+        logger.warning(f"未找到爬取配置{profile}，使用full配置")
+        return BUILTIN_PROFILES["full"]
+    return profiles[profile]
+
+
+async def async_search(search_url: str, bypass_paywall: bool = False,
+                       session: Optional[CrawlerSession] = None,
+                       kind: str = "article",
+                       tier: str = TIER_BROWSER,
+                       profile: Union[str, CrawlProfile, None] = None) -> str:
     """
     异步爬取网页内容并返回Markdown格式
     
     参数:
         search_url: 需要爬取的URL
         bypass_paywall: 是否绕过付费墙
+        session: 共享的爬虫会话，为None时每次爬取临时启动浏览器
+        kind: 页面类型（homepage/article），决定缓存有效期
+        tier: 首先尝试的爬取层级，http层内容不可用时回退到浏览器（需要提供session）
+        profile: 浏览器爬取使用的配置或配置名称，默认按页面类型选择homepage/article配置
         
     返回:
         str: 网页内容的Markdown格式
     """
-    config = CrawlerRunConfig(
-        cache_mode=CacheMode.DISABLED, 
-        simulate_user=True, 
-        override_navigator=True, 
-        magic=True  # 自动处理弹窗
-    )
-    
-    max_retries = 3
-    retry_count = 0
-    
-    while retry_count < max_retries:
-        current_url = search_url
-        if bypass_paywall:
-            current_url = f"https://archive.ph/newest/{search_url}"
+    cache = session.cache if session is not None else None
+    if cache is not None:
+        cached = await cache.lookup(search_url, kind, session.http_client)
+        if cached is not None:
+            session.record_tier(search_url, "cache", "ok")
+            return cached
+
+    escalation = "ok"
+    if tier == TIER_HTTP and session is not None and not bypass_paywall:
+        host = bare_host(search_url)
+        if not session.breaker.allow(host):
+            logger.warning(f"{host}已熔断，跳过爬取{search_url}")
+            return f"爬取失败: {host}已熔断"
+        markdown, escalation, headers = await http_fetch(search_url, session.http_client, kind)
+        if escalation == "timeout":
+            session.breaker.record_failure(host, ERROR_TIMEOUT)
+        elif escalation == "error":
+            session.breaker.record_failure(host, ERROR_NETWORK)
+        if markdown is not None:
+            session.breaker.record_success(host)
+            session.record_tier(search_url, TIER_HTTP, escalation)
+            if cache is not None:
+                cache.put(search_url, kind, markdown, headers)
+            return markdown
+        logger.info(f"HTTP爬取{search_url}不可用({escalation})，回退到浏览器")
+
+    config = resolve_profile(profile or kind, session).run_config()
+
+    crawl_url = f"https://archive.ph/newest/{search_url}" if bypass_paywall else search_url
+    markdown, headers, error_kind = await _browser_fetch(crawl_url, config, session)
+    if markdown is not None:
+        if cache is not None:
+            cache.put(search_url, kind, markdown, headers)
+        if session is not None:
+            session.record_tier(search_url, TIER_BROWSER, escalation)
+        return markdown
 
-        try:
-            async with AsyncWebCrawler() as crawler:
-                result = await crawler.arun(
-                    url=current_url,
-                    config=config,
-                )
-            
-            if result.markdown and len(result.markdown.strip()) > 10:
-                return result.markdown
-            else:
-                logger.warning(f"爬取{current_url}返回内容为空，尝试重新爬取 ({retry_count + 1}/{max_retries})")
-                retry_count += 1
-                import asyncio
-                await asyncio.sleep(2)  # 等待2秒后重试
-        except Exception as e:
-            logger.error(f"爬取{current_url}时出错: {e}，尝试重新爬取 ({retry_count + 1}/{max_retries})")
-            retry_count += 1
-            import asyncio
-            await asyncio.sleep(2)  # 等待2秒后重试
-    
     # 如果常规尝试都失败，尝试使用bypass_paywall模式
     if not bypass_paywall:
-        logger.info(f"常规爬取{search_url}失败，尝试使用bypass_paywall模式")
-        try:
-            bypass_url = f"https://archive.ph/newest/{search_url}"
-            async with AsyncWebCrawler() as crawler:
-                result = await crawler.arun(
-                    url=bypass_url,
-                    config=config,
-                )
-            return result.markdown if result.markdown else f"爬取失败: 内容为空"
-        except Exception as e:
-            logger.error(f"使用bypass_paywall爬取{search_url}时出错: {e}")
-    
+        logger.info(f"常规爬取{search_url}失败({error_kind})，尝试使用bypass_paywall模式")
+        bypass_url = f"https://archive.ph/newest/{search_url}"
+        markdown, _, _ = await _browser_fetch(bypass_url, config, session, max_attempts=1)
+        if markdown is not None:
+            if cache is not None:
+                cache.put(search_url, kind, markdown)
+            if session is not None:
+                session.record_tier(search_url, "archive", escalation)
+            return markdown
+
+    if error_kind == ERROR_CIRCUIT_OPEN:
+        return f"爬取失败: {bare_host(search_url)}已熔断"
     return f"爬取失败: 已达到最大重试次数"
 
-async def fetch_news_content(news_urls: List[str]) -> List[Tuple[str, str]]:
+
+async def _browser_fetch(url: str, config: CrawlerRunConfig, session: Optional[CrawlerSession],
+                         max_attempts: Optional[int] = None) -> Tuple[Optional[str], Dict[str, str], str]:
     """
-    并发获取多个新闻内容，同时保留对应链接
-    
+    使用浏览器爬取URL，按会话的重试策略退避重试，并更新域名熔断器
+
     参数:
-        news_urls: 新闻URL列表
-        
+        url: 需要爬取的URL
+        config: 爬取配置
+        session: 爬虫会话，为None时使用默认重试策略且不熔断
+        max_attempts: 最大尝试次数，默认使用重试策略的设置
+
     返回:
-        List[Tuple[str, str]]: 内容和URL的元组列表
+        Tuple[Optional[str], Dict[str, str], str]: (Markdown内容, 响应头, 错误类型)，成功时错误类型为"ok"
     """
-    results = []
-    for url in news_urls:
-        max_retries = 3
-        retry_count = 0
-        while retry_count < max_retries:
-            try:
-                logger.info(f"尝试获取{url}内容 (尝试 {retry_count + 1}/{max_retries})")
-                content = await async_search(url.strip())
-                if content and not content.startswith("爬取失败"):
-                    results.append((content, url.strip()))
-                    break
-                else:
-                    logger.warning(f"获取{url}内容失败，准备重试")
-                    retry_count += 1
-                    import asyncio
-                    await asyncio.sleep(2)  # 等待2秒后重试
-            except Exception as e:
-                logger.error(f"获取{url}内容时出错: {e}")
-                retry_count += 1
-                import asyncio
-                await asyncio.sleep(2)  # 等待2秒后重试
-        
-        if retry_count == max_retries:
-            logger.error(f"获取{url}内容失败，已达到最大重试次数")
-            results.append((f"获取失败: 已达到最大重试次数", url.strip()))
-    
-    return results 
\ No newline at end of file
+    policy = session.retry_policy if session is not None else RetryPolicy()
+    breaker = session.breaker if session is not None else None
+    host = bare_host(url)
+    max_attempts = max_attempts or policy.max_attempts
+
+    attempt = 0
+    error_kind = ERROR_OTHER
+    while attempt < max_attempts:
+        if breaker is not None and not breaker.allow(host):
+            logger.warning(f"{host}已熔断，跳过爬取{url}")
+            return None, {}, ERROR_CIRCUIT_OPEN
+        attempt += 1
+        try:
+            result = await _crawl(url, config, session)
+            if result.markdown and len(result.markdown.strip()) > 10:
+                if breaker is not None:
+                    breaker.record_success(host)
+                return result.markdown, result.response_headers or {}, "ok"
+            status_code = getattr(result, "status_code", None)
+            error_kind = classify_error(
+                status_code=status_code if status_code and status_code >= 400 else None,
+                content=result.markdown,
+            )
+            logger.warning(f"爬取{url}失败({error_kind}) ({attempt}/{max_attempts})")
+        except Exception as e:
+            error_kind = classify_error(exc=e)
+            logger.error(f"爬取{url}时出错({error_kind}): {e} ({attempt}/{max_attempts})")
+
+        if breaker is not None:
+            breaker.record_failure(host, error_kind)
+        if attempt >= max_attempts or not policy.should_retry(error_kind, attempt):
+            break
+        await policy.sleep(attempt)
+
+    return None, {}, error_kind
+
+
+class HostLimiter:
+    """
+    并发限制器：同时限制全局并发数和单个域名的并发数
+
+    先占用域名槽位再占用全局槽位，等待某个繁忙域名的任务不会挤占其他域名的全局槽位。
+    """
+
+    def __init__(self, max_concurrency: int = 4, per_host_limit: int = 2):
+        """
+        参数:
+            max_concurrency: 全局最大并发数
+            per_host_limit: 单个域名最大并发数
+        """
+        self.max_concurrency = max_concurrency
+        self.per_host_limit = per_host_limit
+        self._global = asyncio.Semaphore(max_concurrency)
+        self._hosts: Dict[str, asyncio.Semaphore] = {}
+
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[None]:
+        """
+        占用URL对应域名的一个并发槽位
+
+        参数:
+            url: 即将访问的URL
+        """
+        host = bare_host(url)
+        if host not in self._hosts:
+            self._hosts[host] = asyncio.Semaphore(self.per_host_limit)
+        async with self._hosts[host]:
+            async with self._global:
+                yield
@@ -2,26 +2,39 @@
 主程序入口，负责启动新闻播客生成流程
 """
 import asyncio
+import json
 import os
 import time
+from argparse import ArgumentParser, Namespace
 from datetime import datetime
 from typing import List, Optional
 
 from dotenv import load_dotenv
 
+from src.news_podcast.api.llm_cache import LLMCache, configure_cache, get_cache
+from src.news_podcast.crawlers.crawl_profiles import build_profiles
+from src.news_podcast.crawlers.page_cache import PageCache
+from src.news_podcast.crawlers.web_crawler import CrawlerSession
 from src.news_podcast.models.news_task import NewsTask
-from src.news_podcast.utils.config_manager import load_config
+from src.news_podcast.utils.cache_modes import CACHE_DISABLED, CACHE_ENABLED, CACHE_REFRESH
+from src.news_podcast.utils.config_manager import build_tasks, load_settings
 from src.news_podcast.utils.logger import setup_logging
-from src.news_podcast.podcast_creator import scan_news, integrate_all_podcasts
+from src.news_podcast.utils.metrics import get_metrics
+from src.news_podcast.utils.pre_ranker import build_ranking_config, configure_ranking
+from src.news_podcast.utils.url_canon import build_url_rules, configure_url_rules
+from src.news_podcast.podcast_creator import scan_all_news, integrate_all_podcasts
 
 
-async def main(config_path: str = "sources.yaml", timestamp: Optional[str] = None) -> None:
+async def main(config_path: str = "sources.yaml", timestamp: Optional[str] = None,
+               cache_mode: str = CACHE_ENABLED, llm_cache_mode: Optional[str] = None) -> None:
     """
     主程序入口函数
     
     参数:
         config_path: 配置文件路径
         timestamp: 时间戳，如果为None则使用当前日期
+        cache_mode: 页面缓存模式，enabled/refresh/disabled
+        llm_cache_mode: LLM响应缓存模式，enabled/refresh/disabled，默认读取LLM_CACHE_MODE
     """
     # 加载环境变量
     load_dotenv()
@@ -62,22 +75,76 @@ async def main(config_path: str = "sources.yaml", timestamp: Optional[str] = Non
     # 设置日志
     logger = setup_logging(log_dir=log_dir)
     
-    # 加载配置
-    tasks = load_config(config_path)
+    # 加载配置，配置文件只解析一次，各部分分别构建
+    settings = load_settings(config_path)
+    tasks = build_tasks(settings)
+    configure_url_rules(build_url_rules(settings.get("url_rules")))
+    configure_ranking(build_ranking_config(settings.get("ranking")))
+    configure_cache(LLMCache(mode=llm_cache_mode))
     
-    # 处理每个任务
-    for task in tasks:
+    # 整个运行过程共享同一个浏览器，浏览器服务一定页面数后自动重启
+    max_pages_per_browser = int(os.environ.get("CRAWLER_MAX_PAGES_PER_BROWSER", "50"))
+    cache = PageCache(mode=cache_mode)
+    profiles = build_profiles(settings.get("crawl_profiles"))
+    async with CrawlerSession(max_pages_per_browser=max_pages_per_browser, cache=cache,
+                              profiles=profiles) as session:
+        # 并行处理每个任务
         st = time.time()
-        success = await scan_news(task, timestamp)
-        if success:
-            logger.info(f"\n任务{task.output_file}耗时: {time.time()-st:.2f}s")
-        else:
-            logger.error(f"\n任务{task.output_file}失败")
-    
-    # 整合所有播客
-    await integrate_all_podcasts(tasks, timestamp)
+        await scan_all_news(tasks, timestamp, session=session)
+        logger.info(f"扫描所有新闻源耗时: {time.time()-st:.2f}s")
+        
+        # 整合所有播客
+        await integrate_all_podcasts(tasks, timestamp, session=session)
+
+        # 记录每个URL由哪一层爬取成功
+        tier_stats = session.tier_stats()
+        logger.info(f"爬取层级统计: {tier_stats['counts']}")
+        with open(f"{log_dir}/fetch_tiers.json", "w", encoding="utf-8") as f:
+            json.dump(tier_stats, f, ensure_ascii=False, indent=2)
+
+    llm_cache_stats = get_cache().stats()
+    logger.info(f"LLM响应缓存统计: {llm_cache_stats}")
+    # 记录各阶段的Token用量、耗时、重试、缓存命中和费用，调度器的/metrics接口读取该文件
+    get_metrics().write(f"{log_dir}/metrics.json", extra={"llm_cache": llm_cache_stats})
+
+
+def parse_args() -> Namespace:
+    """解析命令行参数"""
+    parser = ArgumentParser(description="生成全球科技日报")
+    parser.add_argument("--config", type=str, default="sources.yaml",
+                        help="新闻源配置文件路径")
+    parser.add_argument("--timestamp", type=str, default=None,
+                        help="日期时间戳(YYYYMMDD)，默认为今天")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="不读取也不写入页面缓存")
+    parser.add_argument("--refresh", action="store_true",
+                        help="忽略已有页面缓存，重新爬取并更新缓存")
+    parser.add_argument("--no-llm-cache", action="store_true",
+                        help="不读取也不写入LLM响应缓存")
+    parser.add_argument("--refresh-llm", action="store_true",
+                        help="忽略已有LLM响应缓存，重新调用模型并更新缓存")
+    return parser.parse_args()
+
+
+def cache_mode_from_args(args: Namespace) -> str:
+    """根据命令行参数确定页面缓存模式"""
+    if args.no_cache:
+        return CACHE_DISABLED
+    if args.refresh:
+        return CACHE_REFRESH
+    return CACHE_ENABLED
+
+
+def llm_cache_mode_from_args(args: Namespace) -> Optional[str]:
+    """根据命令行参数确定LLM响应缓存模式，未指定时返回None以使用环境变量"""
+    if args.no_llm_cache:
+        return CACHE_DISABLED
+    if args.refresh_llm:
+        return CACHE_REFRESH
+    return None
 
 
 if __name__ == "__main__":
     # 运行主程序
-    asyncio.run(main()) 
\ No newline at end of file
+    args = parse_args()
+    asyncio.run(main(args.config, args.timestamp, cache_mode_from_args(args), llm_cache_mode_from_args(args))) 
\ No newline at end of file
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import List
+from typing import List, Optional
 
 @dataclass
 class NewsTask:
@@ -9,14 +9,27 @@ class NewsTask:
     属性:
         url: 新闻源URL
         output_file: 输出文件名
-        strip_line_header: 要去除的头部行数
-        strip_line_bottom: 要去除的尾部行数
         sample_url: 示例URL
         sample_url_output: 示例URL输出格式
+        fetch_tier: 首先尝试的爬取层级，http表示先用HTTP请求、内容不可用时再启动浏览器，browser表示直接使用浏览器
+        crawl_profile: 该来源页面使用的爬取配置名称，为None时首页和文章页分别使用homepage/article配置
+        strip_line_header: 首页要去除的头部行数，与strip_line_bottom同时设置时代替自动正文提取
+        strip_line_bottom: 首页要去除的尾部行数
+        link_include: 候选新闻链接需要匹配的正则列表，设置后代替默认的文章页判断
+        link_exclude: 需要从候选新闻链接中排除的正则列表
     """
     url: str
     output_file: str
-    strip_line_header: int
-    strip_line_bottom: int
     sample_url: str
-    sample_url_output: str 
\ No newline at end of file
+    sample_url_output: str
+    fetch_tier: str = "http"
+    crawl_profile: Optional[str] = None
+    strip_line_header: Optional[int] = None
+    strip_line_bottom: Optional[int] = None
+    link_include: Optional[List[str]] = None
+    link_exclude: Optional[List[str]] = None
+
+    @property
+    def has_line_override(self) -> bool:
+        """是否配置了固定行数的首尾裁剪"""
+        return self.strip_line_header is not None and self.strip_line_bottom is not None 
\ No newline at end of file
@@ -5,56 +5,78 @@ import asyncio
 import json
 import logging
 import os
+import sqlite3
 import time
-import datetime
 from concurrent.futures import ThreadPoolExecutor
 from typing import List, Tuple, Dict, Any, Optional
 
 from src.news_podcast.models.news_task import NewsTask
-from src.news_podcast.crawlers.web_crawler import async_search, fetch_news_content
+from src.news_podcast.crawlers.http_fetcher import TIER_HTTP
+from src.news_podcast.crawlers.web_crawler import CrawlerSession, HostLimiter, async_search
+from src.news_podcast.utils.checkpoint import (
+    STAGE_ANALYSIS, STAGE_ARTICLE, STAGE_HOMEPAGE, STAGE_NEWS_LIST, STAGE_SELECTED,
+    input_hash, run_checkpoints,
+)
+from src.news_podcast.utils.content_extractor import extract_main_content, strip_lines
+from src.news_podcast.utils.dedup import collapse_near_duplicates
+from src.news_podcast.utils.link_extractor import extract_link_candidates
+from src.news_podcast.utils.pre_ranker import pre_rank
+from src.news_podcast.utils.seen_index import get_seen_index
+from src.news_podcast.utils.url_canon import url_key
+from src.news_podcast.utils.token_budget import SITE_AGGREGATE, fit_evenly
+from src.news_podcast.utils.aggregation import MODE_MAP_REDUCE, aggregation_mode, map_reduce
 from src.news_podcast.utils.news_processor import (
     pick_news_from_source, 
     pick_important_news, 
-    generate_podcast
+    async_generate_podcast,
+    async_condense_group,
 )
-from src.news_podcast.api.llm_client import chat_with_deepseek
+from src.news_podcast.api.llm_client import async_chat_with_deepseek
+from src.news_podcast.api.stream_sink import FileSink
 from src.news_podcast.wechat_publisher import process_daily_news
 
 # 设置日志
 logger = logging.getLogger(__name__)
 
 
-async def scan_news(news_task: NewsTask, timestamp: str) -> bool:
+async def scan_news(news_task: NewsTask, timestamp: str, session: Optional[CrawlerSession] = None) -> bool:
     """
     处理单个新闻任务，获取并处理新闻内容
     
     参数:
         news_task: 新闻任务对象
         timestamp: 当前时间戳
+        session: 共享的爬虫会话
         
     返回:
         bool: 处理是否成功
     """
     logger.info(f"开始处理任务: {news_task.url}")
-    # 检查分析文件是否已存在
-    if os.path.exists(f"{timestamp}/log/{news_task.output_file}.analysis"):
-        logger.info(f"分析文件 {news_task.output_file}.analysis 已存在,跳过处理")
-        return True
-    
+    # 重新运行时，首页内容和新闻列表的输入没有变化则直接使用检查点
+    checkpoints = run_checkpoints(timestamp)
+
     try:
         news_url = news_task.url
         output_file = news_task.output_file
-        strip_line_header = news_task.strip_line_header
-        strip_line_bottom = news_task.strip_line_bottom
         sample_url = news_task.sample_url
         sample_url_output = news_task.sample_url_output
         
         # 获取杂志首页内容
-        logger.info(f"开始获取首页内容: {news_url}")
-        content = await async_search(news_url)
-        if not content:
-            logger.error(f"获取首页内容失败: {news_url}")
-            return False
+        homepage_hash = input_hash(news_url, news_task.fetch_tier, news_task.crawl_profile)
+        content = checkpoints.get(STAGE_HOMEPAGE, output_file, homepage_hash)
+        if content:
+            logger.info(f"使用检查点中的首页内容: {news_url}")
+        else:
+            logger.info(f"开始获取首页内容: {news_url}")
+            content = await async_search(
+                news_url, session=session, kind="homepage",
+                tier=news_task.fetch_tier, profile=news_task.crawl_profile,
+            )
+            # 爬取失败时返回的错误信息不保存为检查点，重新运行时再试一次
+            if not content or content.startswith("爬取失败"):
+                logger.error(f"获取首页内容失败: {news_url}")
+                return False
+            checkpoints.put(STAGE_HOMEPAGE, output_file, homepage_hash, content)
             
         logger.info(f"成功获取首页内容，长度: {len(content)}")
 
@@ -62,12 +84,35 @@ async def scan_news(news_task: NewsTask, timestamp: str) -> bool:
         with open(f"{timestamp}/log/{output_file}.origin", "w", encoding="utf-8") as f:
             f.write(content)
 
-        # 去除首页内容中的无用行
-        content = "\n".join(content.split("\n")[strip_line_header:-strip_line_bottom])
+        # 在本地从完整首页中提取候选新闻链接，LLM只需按编号挑选
+        candidates = extract_link_candidates(
+            content, news_url,
+            include_patterns=news_task.link_include,
+            exclude_patterns=news_task.link_exclude,
+        )
+        with open(f"{timestamp}/log/{output_file}.candidates.json", "w", encoding="utf-8") as f:
+            json.dump(candidates, f, ensure_ascii=False, indent=2)
+
+        # 去除首页内容中的导航、页脚等模板内容
+        if news_task.has_line_override:
+            content = strip_lines(content, news_task.strip_line_header, news_task.strip_line_bottom)
+        else:
+            content = extract_main_content(content, kind="homepage")
         logger.info(f"处理后的首页内容长度: {len(content)}")
 
-        # 从首页内容中提取新闻链接
-        news_list = pick_news_from_source(content, news_url, sample_url, sample_url_output)
+        # 从首页内容中提取新闻链接，检查点以交给模型的全部输入为键
+        list_hash = input_hash(content, candidates, sample_url, sample_url_output)
+        news_list = checkpoints.get(STAGE_NEWS_LIST, output_file, list_hash)
+        if news_list:
+            logger.info(f"使用检查点中的新闻列表: {news_url}")
+        else:
+            # LLM调用是同步的，放到线程中执行，避免阻塞其他来源的并行扫描
+            news_list = await asyncio.to_thread(
+                pick_news_from_source, content, news_url, sample_url, sample_url_output, candidates
+            )
+            # 空列表不保存，重新运行时再试一次
+            if news_list:
+                checkpoints.put(STAGE_NEWS_LIST, output_file, list_hash, news_list)
         
         # 保存提取的新闻列表
         with open(f"{timestamp}/log/{output_file}.news_list.json", "w", encoding="utf-8") as f:
@@ -84,69 +129,270 @@ async def scan_news(news_task: NewsTask, timestamp: str) -> bool:
         return False
 
 
-def remove_duplicate_news(current_news: List[Dict[str, Any]], timestamp: str) -> List[Dict[str, Any]]:
+async def scan_all_news(tasks: List[NewsTask], timestamp: str,
+                        session: Optional[CrawlerSession] = None,
+                        workers: Optional[int] = None,
+                        task_timeout: Optional[float] = None) -> Dict[str, bool]:
+    """
+    并行扫描所有新闻源，单个来源失败或超时不影响其他来源
+
+    参数:
+        tasks: 新闻任务列表
+        timestamp: 当前时间戳
+        session: 共享的爬虫会话
+        workers: 同时扫描的来源数，默认读取SCAN_WORKERS，为1时按顺序扫描
+        task_timeout: 单个来源的超时时间（秒），默认读取SCAN_TASK_TIMEOUT
+
+    返回:
+        Dict[str, bool]: 每个来源（output_file）的处理结果
     """
-    从当前新闻列表中移除与过去7天中重复的新闻
+    workers = workers or int(os.environ.get("SCAN_WORKERS", "3"))
+    task_timeout = task_timeout or float(os.environ.get("SCAN_TASK_TIMEOUT", "600"))
+    semaphore = asyncio.Semaphore(workers)
+    logger.info(f"开始并行扫描{len(tasks)}个新闻源 (并发{workers}，单个来源超时{task_timeout:.0f}s)")
+
+    async def run_task(task: NewsTask) -> bool:
+        async with semaphore:
+            st = time.time()
+            try:
+                success = await asyncio.wait_for(scan_news(task, timestamp, session=session), timeout=task_timeout)
+            except asyncio.TimeoutError:
+                logger.error(f"\n任务{task.output_file}超时 ({task_timeout:.0f}s)")
+                return False
+            except Exception as e:
+                logger.error(f"\n任务{task.output_file}出错: {e}", exc_info=True)
+                return False
+            if success:
+                logger.info(f"\n任务{task.output_file}耗时: {time.time()-st:.2f}s")
+            else:
+                logger.error(f"\n任务{task.output_file}失败")
+            return success
+
+    results = await asyncio.gather(*(run_task(task) for task in tasks))
+    return {task.output_file: success for task, success in zip(tasks, results)}
+
+
+def _load_homepage(task: NewsTask, timestamp: str) -> Optional[str]:
+    """
+    读取scan_news保存的首页原始内容，用于识别文章页中的重复模板
+
+    参数:
+        task: 新闻任务
+        timestamp: 当前时间戳
+
+    返回:
+        Optional[str]: 首页内容，不存在时返回None
+    """
+    origin_path = f"{timestamp}/log/{task.output_file}.origin"
+    if not os.path.exists(origin_path):
+        return None
+    with open(origin_path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def remove_duplicate_news(current_news: List[Dict[str, Any]], timestamp: str,
+                          lookback_days: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    从当前新闻列表中移除回溯期内已经出现过的新闻
     
     参数:
         current_news: 当前选择的新闻列表
         timestamp: 当前时间戳，格式为YYYYMMDD
+        lookback_days: 回溯天数，默认读取SEEN_LOOKBACK_DAYS（默认7）
         
     返回:
         List[Dict[str, Any]]: 去除重复后的新闻列表
     """
-    # 获取过去7天的日期
+    if lookback_days is None:
+        lookback_days = int(os.environ.get("SEEN_LOOKBACK_DAYS", "7"))
+    # 默认只与选入过日报的新闻去重；设为considered时首页上出现过的新闻也会被过滤
+    selected_only = os.environ.get("SEEN_DEDUP_SCOPE", "selected") != "considered"
+    index = get_seen_index()
     try:
-        current_date = datetime.datetime.strptime(timestamp, "%Y%m%d")
-        past_dates = [(current_date - datetime.timedelta(days=i)).strftime("%Y%m%d") 
-                      for i in range(1, 8)]  # 过去7天
-    except ValueError:
-        logger.error(f"时间戳格式错误: {timestamp}，应为YYYYMMDD格式")
+        if index.is_empty():
+            # 首次使用索引时导入已有运行目录中的记录
+            index.import_history()
+        seen = index.seen((news["url"] for news in current_news if "url" in news), timestamp,
+                          lookback_days, selected_only=selected_only)
+    except (ValueError, sqlite3.Error) as e:
+        logger.error(f"查询已见新闻索引失败，跳过去重: {e}")
         return current_news
     
-    # 收集过去7天的所有新闻URL
-    past_news_urls = set()
-    for past_date in past_dates:
-        past_news_path = f"{past_date}/log/selected_news.json"
-        if os.path.exists(past_news_path):
-            try:
-                with open(past_news_path, "r", encoding="utf-8") as f:
-                    past_news = json.load(f)
-                    for news in past_news:
-                        if "url" in news:
-                            past_news_urls.add(news["url"])
-                    logger.info(f"从{past_date}加载了{len(past_news)}条新闻")
-            except Exception as e:
-                logger.warning(f"读取{past_date}的新闻时出错: {e}")
-    
-    logger.info(f"从过去7天收集了{len(past_news_urls)}个独特的新闻URL")
-    
-    # 过滤掉已存在于过去7天的新闻
+    # 过滤掉回溯期内已出现过的新闻
     filtered_news = []
     for news in current_news:
-        if "url" in news and news["url"] not in past_news_urls:
+        if "url" in news and news["url"] not in seen:
             filtered_news.append(news)
-        elif "url" in news and news["url"] in past_news_urls:
+        elif "url" in news and news["url"] in seen:
             logger.info(f"过滤掉重复新闻: {news.get('title', '未知标题')} - {news['url']}")
     
-    logger.info(f"过滤前: {len(current_news)}条新闻，过滤后: {len(filtered_news)}条新闻")
+    logger.info(f"过滤前: {len(current_news)}条新闻，过滤后: {len(filtered_news)}条新闻 (回溯{lookback_days}天)")
     return filtered_news
 
 
-async def integrate_all_podcasts(tasks: List[NewsTask], timestamp: str) -> bool:
+def record_seen_news(considered: List[Dict[str, Any]], selected: List[Dict[str, Any]], timestamp: str) -> None:
+    """
+    把本次运行考虑过和选中的新闻写入已见新闻索引
+
+    参数:
+        considered: 所有来源提取到的新闻
+        selected: 选入日报的新闻
+        timestamp: 当前时间戳，格式为YYYYMMDD
+    """
+    try:
+        index = get_seen_index()
+        index.record((news["url"] for news in considered if "url" in news), timestamp)
+        # 其他来源报道同一事件的URL也视为已选中，之后几天不会再以另一个来源的面目出现
+        index.record((url for news in selected if "url" in news
+                      for url in [news["url"], *news.get("alternate_urls", [])]), timestamp, selected=True)
+        index.flush()
+        logger.info(f"已见新闻索引记录了{len(considered)}条考虑过、{len(selected)}条选中的新闻")
+    except sqlite3.Error as e:
+        logger.error(f"写入已见新闻索引失败: {e}")
+
+
+async def analyze_news_stream(selected_news: List[Dict[str, Any]], task_map: Dict[str, NewsTask],
+                              timestamp: str, session: Optional[CrawlerSession] = None,
+                              max_concurrency: Optional[int] = None,
+                              per_host_limit: Optional[int] = None,
+                              llm_workers: Optional[int] = None) -> List[Optional[Tuple[int, str, str, str]]]:
+    """
+    以生产者/消费者流水线爬取并分析选中的新闻
+
+    爬取任务受全局和单域名并发限制，完成后立即把内容放入有界队列；
+    分析任务从队列中取出内容生成分析，网络等待和LLM调用相互重叠；
+    LLM调用的节奏由限流器按RPM/TPM控制，分析并发数只需覆盖当天的新闻数量。
+    正文在分析完成后即被释放，结果按selected_news的顺序返回。
+
+    参数:
+        selected_news: 精选的新闻列表
+        task_map: URL（url_key规范化后）到新闻任务的映射
+        timestamp: 当前时间戳
+        session: 共享的爬虫会话
+        max_concurrency: 爬取的全局最大并发数，默认读取CRAWLER_MAX_CONCURRENCY
+        per_host_limit: 爬取的单域名最大并发数，默认读取CRAWLER_PER_HOST_LIMIT
+        llm_workers: 同时进行的分析数，默认读取ANALYSIS_WORKERS
+
+    返回:
+        List[Optional[Tuple[int, str, str, str]]]: 与selected_news一一对应的(序号, 标题, 分析, URL)，
+            爬取或分析失败的新闻对应None
+    """
+    max_concurrency = max_concurrency or int(os.environ.get("CRAWLER_MAX_CONCURRENCY", "4"))
+    per_host_limit = per_host_limit or int(os.environ.get("CRAWLER_PER_HOST_LIMIT", "2"))
+    llm_workers = llm_workers or int(os.environ.get("ANALYSIS_WORKERS", "12"))
+    limiter = HostLimiter(max_concurrency, per_host_limit)
+    # 有界队列：分析跟不上时爬取任务等待，避免大量正文同时驻留内存
+    queue: asyncio.Queue = asyncio.Queue(maxsize=llm_workers * 2)
+    results: List[Optional[Tuple[int, str, str, str]]] = [None] * len(selected_news)
+    timings = {"fetch": 0.0, "llm": 0.0}
+    # 文章正文和分析按URL保存检查点，重新运行时只爬取和分析缺失的新闻
+    checkpoints = run_checkpoints(timestamp)
+
+    async def fetch_one(url: str) -> Optional[str]:
+        key = url_key(url)
+        content = checkpoints.get(STAGE_ARTICLE, key, input_hash(key))
+        if content:
+            logger.info(f"使用检查点中的文章内容: {url}")
+            return content
+        task = task_map.get(key)
+        async with limiter.slot(url):
+            try:
+                content = await async_search(
+                    url, session=session,
+                    tier=task.fetch_tier if task else TIER_HTTP,
+                    profile=task.crawl_profile if task else None,
+                )
+            except Exception as e:
+                logger.error(f"爬取{url}时出错: {e}")
+                return None
+        if not content or content.startswith("爬取失败"):
+            logger.warning(f"获取{url}内容失败: {(content or '')[:50]}")
+            return None
+        checkpoints.put(STAGE_ARTICLE, key, input_hash(key), content)
+        return content
+
+    async def fetch(index: int, news: Dict[str, Any]) -> None:
+        st = time.time()
+        # 主URL失败时依次尝试其他来源报道同一事件的URL
+        for url in [news["url"], *news.get("alternate_urls", [])]:
+            content = await fetch_one(url)
+            if content:
+                break
+        timings["fetch"] += time.time() - st
+        if not content:
+            logger.warning(f"获取{news['url']}内容失败，跳过分析")
+            return
+        await queue.put((index, content, url))
+
+    async def analyze() -> None:
+        while True:
+            item = await queue.get()
+            try:
+                if item is None:
+                    return
+                index, content, url = item
+                news = selected_news[index]
+                st = time.time()
+                # 单条新闻出错不能让消费者退出，否则爬取任务会阻塞在已满的队列上
+                try:
+                    task = task_map.get(url_key(url))
+                    if not task:
+                        logger.warning(f"未找到URL {url}对应的task，仅按页面结构提取正文")
+                    # 去除导航、页脚等模板内容，减少token使用；同站首页中出现过的行视为重复模板
+                    reference = _load_homepage(task, timestamp) if task else None
+                    processed_content = extract_main_content(content, kind="article", reference=reference)
+                    logger.info(f"处理内容: 原始长度 {len(content)} -> 处理后长度 {len(processed_content)}")
+                    del content, reference
+
+                    analysis_hash = input_hash(processed_content, url)
+                    analysis = checkpoints.get(STAGE_ANALYSIS, url_key(url), analysis_hash)
+                    if analysis is None:
+                        analysis = await async_generate_podcast(processed_content, url)
+                        checkpoints.put(STAGE_ANALYSIS, url_key(url), analysis_hash, analysis)
+                    else:
+                        logger.info(f"使用检查点中的分析: {url}")
+                    results[index] = (index, news["title"], analysis, url)
+                except Exception as e:
+                    logger.error(f"生成{url}的分析时出错: {e}", exc_info=True)
+                timings["llm"] += time.time() - st
+            finally:
+                queue.task_done()
+
+    logger.info(f"开始爬取并分析{len(selected_news)}条新闻 "
+                f"(爬取并发{max_concurrency}，单域名并发{per_host_limit}，分析并发{llm_workers})")
+    st = time.time()
+    workers = [asyncio.create_task(analyze()) for _ in range(llm_workers)]
+    try:
+        await asyncio.gather(*(fetch(index, news) for index, news in enumerate(selected_news)))
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+    finally:
+        for worker in workers:
+            worker.cancel()
+
+    done = sum(1 for item in results if item is not None)
+    logger.info(f"完成{done}/{len(selected_news)}条新闻分析，总耗时: {time.time()-st:.2f}s "
+                f"(累计爬取{timings['fetch']:.2f}s，累计分析{timings['llm']:.2f}s，检查点{checkpoints.stats()})")
+    return results
+
+
+async def integrate_all_podcasts(tasks: List[NewsTask], timestamp: str,
+                                 session: Optional[CrawlerSession] = None) -> bool:
     """
     整合所有来源的新闻分析为一个完整的全球科技日报
     
     参数:
         tasks: 新闻任务列表
         timestamp: 当前时间戳
+        session: 共享的爬虫会话
         
     返回:
         bool: 处理是否成功
     """
     # 收集所有新闻列表
     all_news_lists = []
-    task_map = {}  # 用于存储URL到NewsTask的映射
+    task_map = {}  # 用于存储URL（url_key规范化后）到NewsTask的映射
     
     for task in tasks:
         news_list_path = f"{timestamp}/log/{task.output_file}.news_list.json"
@@ -154,10 +400,12 @@ async def integrate_all_podcasts(tasks: List[NewsTask], timestamp: str) -> bool:
             try:
                 with open(news_list_path, "r", encoding="utf-8") as f:
                     news_list = json.load(f)
+                    # 将每个新闻的URL映射到对应的task，并记录来源和在首页中的位置供预排序使用
+                    for position, news in enumerate(news_list):
+                        task_map[url_key(news["url"])] = task
+                        news["source"] = task.output_file
+                        news["position"] = position
                     all_news_lists.extend(news_list)
-                    # 将每个新闻的URL映射到对应的task
-                    for news in news_list:
-                        task_map[news["url"]] = task
             except Exception as e:
                 logger.error(f"读取{news_list_path}时出错: {e}")
     
@@ -165,15 +413,32 @@ async def integrate_all_podcasts(tasks: List[NewsTask], timestamp: str) -> bool:
         logger.warning("没有找到任何新闻列表")
         return False
     
-    # 与过去7天的新闻进行比较，去掉重复的新闻
+    # 与回溯期内出现过的新闻进行比较，去掉重复的新闻
+    considered_news = all_news_lists
     all_news_lists = remove_duplicate_news(all_news_lists, timestamp)
     
     if not all_news_lists:
         logger.warning("去重后没有任何新闻剩余")
         return False
+
+    # 合并不同来源报道同一事件的新闻，减少精选提示词中的候选以及重复的爬取和分析
+    all_news_lists = collapse_near_duplicates(all_news_lists)
+
+    # 本地按主题、时效、来源和首页位置预排序，只把得分最高的K条交给模型精选
+    all_news_lists, ranking = pre_rank(all_news_lists, today=timestamp)
+    with open(f"{timestamp}/log/pre_rank.json", "w", encoding="utf-8") as f:
+        json.dump(ranking, f, ensure_ascii=False, indent=2)
     
-    # 从所有新闻中精选重要新闻
-    selected_news = pick_important_news(all_news_lists)
+    # 从所有新闻中精选重要新闻，候选不变时重新运行沿用上次的精选结果，后续文章和分析的检查点才能命中
+    checkpoints = run_checkpoints(timestamp)
+    selected_hash = input_hash([(news["title"], news["url"], news.get("alternate_urls", [])) for news in all_news_lists])
+    selected_news = checkpoints.get(STAGE_SELECTED, "selected_news", selected_hash)
+    if selected_news:
+        logger.info(f"使用检查点中的{len(selected_news)}条精选新闻")
+    else:
+        selected_news = await asyncio.to_thread(pick_important_news, all_news_lists)
+        if selected_news:
+            checkpoints.put(STAGE_SELECTED, "selected_news", selected_hash, selected_news)
     
     if not selected_news:
         logger.warning("没有找到任何重要新闻")
@@ -183,44 +448,20 @@ async def integrate_all_podcasts(tasks: List[NewsTask], timestamp: str) -> bool:
     with open(f"{timestamp}/log/selected_news.json", "w", encoding="utf-8") as f:
         json.dump(selected_news, f, ensure_ascii=False, indent=2)
     
-    # 获取选中新闻的详细内容
-    logger.info("开始获取选中新闻的详细内容")
-    news_contents = []
-    for news in selected_news:
-        content = await async_search(news["url"])
-        if content:
-            news_contents.append((news["title"], content, news["url"]))
-    
-    # 生成深度分析
-    logger.info("开始生成新闻深度分析")
-    analyses = []
-    for title, content, url in news_contents:
-        # 获取对应的task
-        task = task_map.get(url)
-        if task:
-            # 去除内容头尾，减少token使用
-            processed_content = "\n".join(content.split("\n")[task.strip_line_header:-task.strip_line_bottom])
-            logger.info(f"处理内容: 原始长度 {len(content)} -> 处理后长度 {len(processed_content)}")
-            
-            # 生成分析
-            analysis = generate_podcast(processed_content, url)
-        else:
-            # 如果没有找到对应的task，使用原始内容
-            logger.warning(f"未找到URL {url}对应的task，使用原始内容")
-            analysis = generate_podcast(content, url)
-            
-        analyses.append((title, analysis, url))
+    # 边爬取边分析：每篇文章爬取完成后立即进入分析队列
+    analyses = [item for item in await analyze_news_stream(selected_news, task_map, timestamp, session=session)
+                if item is not None]
 
-    # 保存分析结果到JSON文件
+    # 保存分析结果到JSON文件，顺序与selected_news一致
     with open(f"{timestamp}/log/analyses.json", "w", encoding="utf-8") as f:
-        analyses_data = [{"title": title, "url": url, "analysis": analysis} for title, analysis, url in analyses]
+        analyses_data = [{"title": title, "url": url, "analysis": analysis} for _, title, analysis, url in analyses]
         json.dump(analyses_data, f, ensure_ascii=False, indent=2)
     
     # 清理空条目：找出分析结果为"无内容，跳过"的条目，从selected_news中删除
     empty_indices = []
-    for i, analysis_data in enumerate(analyses_data):
-        if analysis_data.get("analysis") == "无内容，跳过":
-            empty_indices.append(i)
+    for index, _, analysis, _ in analyses:
+        if analysis == "无内容，跳过":
+            empty_indices.append(index)
     
     # 如果有空条目，从selected_news中删除对应条目并重新保存
     if empty_indices:
@@ -240,20 +481,33 @@ async def integrate_all_podcasts(tasks: List[NewsTask], timestamp: str) -> bool:
             json.dump(selected_news, f, ensure_ascii=False, indent=2)
         
         # 更新analyses列表，移除空条目
-        analyses = [analysis for i, analysis in enumerate(analyses) if i not in empty_indices]
+        analyses = [item for item in analyses if item[0] not in empty_indices]
     
     # 整合所有来源的分析内容
-    logger.info("开始整合所有来源的分析内容")
+    sections = [f"【{title}】\n来源：{url}\n{analysis}" for _, title, analysis, url in analyses]
+    mode = aggregation_mode(len(sections))
+    logger.info(f"开始整合所有来源的分析内容，共{len(sections)}条，整合方式: {mode}")
+    intro = "以下是你要整合的文章："
+    if mode == MODE_MAP_REDUCE:
+        # 先按主题分组并行浓缩，最终请求只需要阅读各组的主题综述
+        st = time.time()
+        sections = await map_reduce(sections, async_condense_group)
+        logger.info(f"分组浓缩完成，得到{len(sections)}段内容，耗时: {time.time()-st:.2f}s")
+        with open(f"{timestamp}/log/aggregate_groups.json", "w", encoding="utf-8") as f:
+            json.dump(sections, f, ensure_ascii=False, indent=2)
+        intro = "以下是按主题整理好的新闻综述，每个主题包含若干条新闻，请不要遗漏其中的任何一条："
+
     final_aggregator_prompt = f"""
 我需要你扮演一个有个性的科技评论人，把下面这些分析过的新闻整合成一期有态度的国际新闻订阅号推送。
 
 今天是{timestamp}，给这期推送起个吸引眼球的标题，格式就是"{timestamp} XXX"。
 
-以下是你要整合的文章：
+{intro}
 
 """
-    for title, analysis, url in analyses:
-        final_aggregator_prompt += f"\n【{title}】\n来源：{url}\n{analysis}\n"
+    # 内容总量超出Token预算时，平均压缩较长的部分
+    for section in fit_evenly(sections, SITE_AGGREGATE):
+        final_aggregator_prompt += f"\n{section}\n"
 
     final_aggregator_prompt += """
 最终的推送内容要包括：
@@ -279,19 +533,26 @@ async def integrate_all_podcasts(tasks: List[NewsTask], timestamp: str) -> bool:
 - 你是一个爱国的中国人，不要出现任何不尊重中国的言论（但如果新闻主体里面没提到中国，不要特意提中国）
 """
 
+    daily_path = f"{timestamp}/global_tech_daily_{timestamp}.md"
     try:
-        final_summary = chat_with_deepseek(
-            final_aggregator_prompt,
-            stream=False,
-            max_tokens=16384,
-        )
+        # 流式输出边生成边写入日报文件，可以实时查看进度，中途失败时已生成的部分也会保留
+        with FileSink(daily_path) as sink:
+            final_summary = await async_chat_with_deepseek(
+                final_aggregator_prompt,
+                stream=True,
+                max_tokens=16384,
+                call_site=SITE_AGGREGATE,
+                # 整合日报输出很长，单独设置超时时间
+                timeout=float(os.environ.get("LLM_AGGREGATE_TIMEOUT", "600")),
+                on_chunk=sink,
+            )
 
         # 保存最终整合的日报
-        with open(f"{timestamp}/global_tech_daily_{timestamp}.md", "w", encoding="utf-8") as f:
-            f.write(final_summary)
+        with open(daily_path, "a", encoding="utf-8") as f:
             f.write("\n\n")
 
         logger.info(f"全球科技日报已保存到 global_tech_daily_{timestamp}.md")
+        record_seen_news(considered_news, selected_news, timestamp)
         
         # 发布到微信公众号
         try:
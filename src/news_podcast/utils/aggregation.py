@@ -0,0 +1,122 @@
+"""
+日报整合模块，新闻较多时先按主题分组并行浓缩（map），再用浓缩后的主题综述撰写日报（reduce）
+
+新闻较少时仍然把所有分析一次性交给模型整合；分组浓缩后最终请求的输入只随主题数增长，
+各组的浓缩请求并行进行，整合耗时不随新闻数量线性增加。
+"""
+import asyncio
+import logging
+import math
+import os
+import re
+from typing import Awaitable, Callable, List, Optional, Set
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+# 整合方式
+MODE_AUTO = "auto"              # 新闻数超过AGGREGATE_MAP_THRESHOLD时分组浓缩，否则一次性整合
+MODE_SINGLE = "single"          # 一次性整合
+MODE_MAP_REDUCE = "map_reduce"  # 先分组浓缩再整合
+
+_WORD = re.compile(r"[a-z0-9]{3,}|[一-鿿]{2,}")
+
+
+def aggregation_mode(count: int, mode: Optional[str] = None) -> str:
+    """
+    确定本次整合方式
+
+    参数:
+        count: 待整合的新闻数
+        mode: 整合方式，默认读取AGGREGATE_MODE（默认auto）
+
+    返回:
+        str: MODE_SINGLE或MODE_MAP_REDUCE
+    """
+    mode = mode or os.environ.get("AGGREGATE_MODE", MODE_AUTO)
+    if mode == MODE_AUTO:
+        threshold = int(os.environ.get("AGGREGATE_MAP_THRESHOLD", "16"))
+        return MODE_MAP_REDUCE if count > threshold else MODE_SINGLE
+    if mode not in (MODE_SINGLE, MODE_MAP_REDUCE):
+        logger.warning(f"未知的AGGREGATE_MODE: {mode}，使用一次性整合")
+        return MODE_SINGLE
+    return mode
+
+
+def _terms(text: str) -> Set[str]:
+    """提取用于主题相似度的词：英文单词和中文的相邻两字"""
+    terms = set()
+    for word in _WORD.findall(text.lower()):
+        if word.isascii():
+            terms.add(word)
+        else:
+            terms.update(word[i:i + 2] for i in range(len(word) - 1))
+    return terms
+
+
+def group_by_theme(texts: List[str], group_size: int) -> List[List[int]]:
+    """
+    按主题相似度把文本贪心地分成若干组，每组不超过group_size条
+
+    依次以尚未分组的第一条为种子，把与该组词汇重合度最高的文本加入，组数为ceil(len(texts)/group_size)。
+
+    参数:
+        texts: 文本列表，如"标题+分析"
+        group_size: 每组最多条数
+
+    返回:
+        List[List[int]]: 每组文本的下标，组内按原顺序排列
+    """
+    group_size = max(1, group_size)
+    terms = [_terms(text) for text in texts]
+    remaining = list(range(len(texts)))
+    groups = []
+    # 组数固定后平均分配，避免最后一组只剩一两条
+    size = math.ceil(len(texts) / max(1, math.ceil(len(texts) / group_size))) if texts else 0
+    while remaining:
+        seed = remaining.pop(0)
+        group = [seed]
+        group_terms = set(terms[seed])
+        while remaining and len(group) < size:
+            best = max(remaining, key=lambda i: len(terms[i] & group_terms) / (len(terms[i] | group_terms) or 1))
+            remaining.remove(best)
+            group.append(best)
+            group_terms |= terms[best]
+        groups.append(sorted(group))
+    return groups
+
+
+async def map_reduce(sections: List[str], condense: Callable[[List[str], int], Awaitable[str]],
+                     group_size: Optional[int] = None, max_depth: Optional[int] = None) -> List[str]:
+    """
+    逐层分组浓缩，直到条数不超过group_size或达到max_depth层
+
+    参数:
+        sections: 待整合的各段内容
+        condense: 浓缩一组内容的协程函数，参数为(该组内容, 层数)，返回主题综述
+        group_size: 每组最多条数，默认读取AGGREGATE_GROUP_SIZE（默认6）
+        max_depth: 最多浓缩层数，默认读取AGGREGATE_MAX_DEPTH（默认2）
+
+    返回:
+        List[str]: 浓缩后的各段内容；某组浓缩失败时保留该组的原始内容
+    """
+    group_size = group_size or int(os.environ.get("AGGREGATE_GROUP_SIZE", "6"))
+    max_depth = max_depth if max_depth is not None else int(os.environ.get("AGGREGATE_MAX_DEPTH", "2"))
+    level = 0
+    while len(sections) > group_size and level < max_depth:
+        level += 1
+        groups = group_by_theme(sections, group_size)
+        logger.info(f"第{level}层浓缩: {len(sections)}段内容分为{len(groups)}组并行浓缩")
+        results = await asyncio.gather(
+            *(condense([sections[i] for i in group], level) for group in groups),
+            return_exceptions=True,
+        )
+        condensed = []
+        for n, (group, result) in enumerate(zip(groups, results), 1):
+            if isinstance(result, BaseException) or not result:
+                logger.error(f"第{level}层第{n}组浓缩失败，保留原始内容: {result}")
+                condensed.extend(sections[i] for i in group)
+            else:
+                condensed.append(result)
+        sections = condensed
+    return sections
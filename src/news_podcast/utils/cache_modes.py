@@ -0,0 +1,7 @@
+"""
+缓存模式常量，网页缓存和LLM响应缓存共用
+"""
+
+CACHE_ENABLED = "enabled"    # 正常读写缓存
+CACHE_REFRESH = "refresh"    # 忽略已有缓存，重新获取并写入缓存
+CACHE_DISABLED = "disabled"  # 完全不使用缓存
@@ -0,0 +1,142 @@
+"""
+断点续跑模块，按阶段和条目保存中间结果，重新运行时只重做缺失或输入已变化的条目
+
+每个条目保存为{root}/{stage}/{条目名的哈希}.json，记录生成该结果的输入哈希；
+读取时输入哈希不一致视为失效。写入时先写同目录下的临时文件再替换，进程中途退出不会留下不完整的检查点。
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+# 检查点阶段
+STAGE_HOMEPAGE = "homepage"    # 来源首页的Markdown，按来源保存
+STAGE_NEWS_LIST = "news_list"  # 从首页挑选出的新闻列表，按来源保存
+STAGE_SELECTED = "selected"    # 精选的新闻列表
+STAGE_ARTICLE = "article"      # 文章页的Markdown，按URL保存
+STAGE_ANALYSIS = "analysis"    # 单条新闻的分析，按URL保存
+
+
+def input_hash(*parts: Any) -> str:
+    """
+    计算生成某个结果的输入的哈希
+
+    参数:
+        parts: 可JSON序列化的输入
+
+    返回:
+        str: SHA-256十六进制摘要
+    """
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CheckpointStore:
+    """
+    保存在运行目录中的检查点
+    """
+
+    def __init__(self, root: str, resume: Optional[bool] = None):
+        """
+        参数:
+            root: 检查点目录
+            resume: 是否读取已有的检查点，默认读取CHECKPOINT_RESUME（默认开启）；关闭时只写入不读取
+        """
+        self.root = root
+        if resume is None:
+            resume = os.environ.get("CHECKPOINT_RESUME", "1").lower() not in ("0", "false", "no")
+        self.resume = resume
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "invalidated": 0, "writes": 0}
+
+    def _path(self, stage: str, item: str) -> str:
+        digest = hashlib.sha256(item.encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.root, stage, f"{digest}.json")
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def get(self, stage: str, item: str, digest: str) -> Optional[Any]:
+        """
+        读取检查点
+
+        参数:
+            stage: 阶段
+            item: 条目名，如来源名或规范化后的URL
+            digest: 当前输入的哈希
+
+        返回:
+            Optional[Any]: 保存的结果，不存在、已失效、读取失败或未开启续跑时返回None
+        """
+        if not self.resume:
+            return None
+        path = self._path(stage, item)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                record = json.load(f)
+        except FileNotFoundError:
+            self._count("misses")
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取检查点{path}失败: {e}")
+            self._count("misses")
+            return None
+        if record.get("input_hash") != digest:
+            logger.info(f"检查点已失效（输入已变化）: {stage}/{item}")
+            self._count("invalidated")
+            return None
+        self._count("hits")
+        return record.get("value")
+
+    def put(self, stage: str, item: str, digest: str, value: Any) -> None:
+        """
+        原子地写入检查点，写入失败只记录日志
+
+        参数:
+            stage: 阶段
+            item: 条目名
+            digest: 生成该结果的输入的哈希
+            value: 可JSON序列化的结果
+        """
+        path = self._path(stage, item)
+        record = {"stage": stage, "item": item, "input_hash": digest, "saved_at": time.time(), "value": value}
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(record, f, ensure_ascii=False)
+                os.replace(tmp, path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        except OSError as e:
+            logger.warning(f"写入检查点{path}失败: {e}")
+            return
+        self._count("writes")
+
+    def stats(self) -> Dict[str, int]:
+        """命中、缺失、失效和写入次数"""
+        with self._lock:
+            return dict(self._stats)
+
+
+def run_checkpoints(timestamp: str) -> CheckpointStore:
+    """
+    某次运行的检查点，保存在{timestamp}/log/checkpoints中
+
+    参数:
+        timestamp: 运行日期，YYYYMMDD
+
+    返回:
+        CheckpointStore: 检查点
+    """
+    return CheckpointStore(os.path.join(timestamp, "log", "checkpoints"))
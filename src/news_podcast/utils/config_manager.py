@@ -6,6 +6,36 @@ from typing import List, Dict, Any
 
 from src.news_podcast.models.news_task import NewsTask
 
+def load_settings(config_path: str) -> Dict[str, Any]:
+    """
+    解析配置文件，各部分（news_dict、crawl_profiles、url_rules、ranking）由调用方分别构建
+
+    参数:
+        config_path: 配置文件路径
+
+    返回:
+        Dict[str, Any]: 配置文件的全部内容，文件为空时返回空字典
+    """
+    with open(config_path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+
+def build_tasks(settings: Dict[str, Any]) -> List[NewsTask]:
+    """
+    根据配置中的news_dict构建新闻任务列表
+
+    参数:
+        settings: load_settings解析出的配置
+
+    返回:
+        List[NewsTask]: 包含NewsTask对象的列表
+    """
+    # settings应该是一个dict，比如{"news_dict": [...]}
+    news_list = settings.get("news_dict", [])
+    # 将dict转换为NewsTask对象
+    return [NewsTask(**item) for item in news_list]
+
+
 def load_config(config_path: str) -> List[NewsTask]:
     """
     从配置文件中加载新闻任务列表
@@ -16,10 +46,4 @@ def load_config(config_path: str) -> List[NewsTask]:
     返回:
         List[NewsTask]: 包含NewsTask对象的列表
     """
-    with open(config_path, "r", encoding="utf-8") as f:
-        data = yaml.safe_load(f)
-
-    # data应该是一个dict，比如{"news_dict": [...]}
-    news_list = data.get("news_dict", [])
-    # 将dict转换为NewsTask对象
-    return [NewsTask(**item) for item in news_list] 
\ No newline at end of file
+    return build_tasks(load_settings(config_path))
@@ -0,0 +1,159 @@
+"""
+正文提取模块，根据页面结构从爬取的Markdown中定位主体内容，去除导航、页脚等模板内容
+"""
+import logging
+import re
+from typing import Iterable, List, Optional, Set
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+_IMAGE_PATTERN = re.compile(r'!\[[^\]]*\]\([^)]*\)')
+_LINK_PATTERN = re.compile(r'\[([^\]]*)\]\([^)]*\)')
+_MARKUP_PATTERN = re.compile(r'^[\s>#*+\-|`_]+|[*_`|]+')
+
+# 每行的固定代价，让零散的短行（菜单项、按钮）得分为负
+LINE_COST = 12
+# 文章页中被首页等参考页面共享的行，视为模板内容
+SHARED_LINE_PENALTY = 40
+# 首页中被视为新闻标题的链接至少包含的单词数
+HEADLINE_MIN_WORDS = 4
+# 首页标题链接按超出该长度的部分加分，较短的页脚链接得分接近零
+HEADLINE_BASE_LENGTH = 20
+# 无障碍提示后缀，如Reuters的"About Reuters, opens new tab"
+_NEW_TAB_SUFFIX = re.compile(r",?\s*opens new (tab|window)$", re.IGNORECASE)
+
+
+def _line_stats(line: str):
+    """
+    计算一行的纯文本长度、链接文本长度和链接标题
+
+    返回:
+        Tuple[int, int, List[str]]: (纯文本长度, 链接文本长度, 链接标题列表)
+    """
+    line = _IMAGE_PATTERN.sub("", line)
+    titles = [title.strip() for title in _LINK_PATTERN.findall(line)]
+    plain = _LINK_PATTERN.sub(lambda m: m.group(1), line)
+    plain = _MARKUP_PATTERN.sub("", plain).strip()
+    link_len = sum(len(title) for title in titles)
+    return len(plain), link_len, titles
+
+
+def _is_headline(title: str) -> bool:
+    """判断链接标题是否像一条新闻标题，而不是导航菜单项"""
+    if len(title.split()) >= HEADLINE_MIN_WORDS:
+        return True
+    # 中日韩文字没有空格分词，按字数判断
+    cjk = sum(1 for ch in title if "一" <= ch <= "鿿")
+    return cjk >= 8
+
+
+def _normalize_line(line: str) -> str:
+    """用于比较重复行的规范化形式"""
+    return re.sub(r"\s+", " ", line.strip())
+
+
+def _score_line(line: str, kind: str, shared: Set[str]) -> float:
+    """
+    为单行打分，正分表示像正文，负分表示像模板内容
+
+    参数:
+        line: Markdown中的一行
+        kind: 页面类型（homepage/article）
+        shared: 参考页面中出现过的行
+    """
+    stripped = line.strip()
+    if not stripped:
+        return 0.0
+    text_len, link_len, titles = _line_stats(stripped)
+    if text_len == 0:
+        return -LINE_COST / 2
+
+    if kind == "homepage":
+        # 首页的主体是新闻链接列表：长标题链接加分，短的菜单链接扣分
+        score = 0.0
+        for title in titles:
+            title = _NEW_TAB_SUFFIX.sub("", title)
+            score += len(title) - HEADLINE_BASE_LENGTH if _is_headline(title) else -LINE_COST
+        score += max(text_len - link_len, 0) * 0.3
+        return score - LINE_COST / 2
+
+    if _normalize_line(stripped) in shared:
+        return -(text_len + SHARED_LINE_PENALTY)
+    if stripped.startswith("#") and link_len == 0:
+        # 标题行本身较短，不扣固定代价，避免被排除在正文区域之外
+        return float(text_len)
+    plain_len = text_len - link_len
+    return plain_len - link_len * 0.5 - LINE_COST
+
+
+def _best_span(scores: List[float]):
+    """
+    寻找得分之和最大的连续区间（Kadane算法）
+
+    返回:
+        Tuple[int, int, float]: (起始行, 结束行(不含), 区间得分)
+    """
+    best_sum, best_start, best_end = 0.0, 0, 0
+    current_sum, current_start = 0.0, 0
+    for i, score in enumerate(scores):
+        if current_sum <= 0:
+            current_sum, current_start = score, i
+        else:
+            current_sum += score
+        if current_sum > best_sum:
+            best_sum, best_start, best_end = current_sum, current_start, i + 1
+    return best_start, best_end, best_sum
+
+
+def extract_main_content(markdown: str, kind: str = "article",
+                         reference: Optional[str] = None) -> str:
+    """
+    从Markdown中提取主体内容
+
+    对每一行按链接密度和文本长度打分，取得分最高的连续区间作为正文；
+    文章页还会把参考页面（如同站首页）中出现过的行视为导航、页脚等重复模板，在区间内剔除。
+
+    参数:
+        markdown: 爬取得到的Markdown
+        kind: 页面类型，homepage的主体是新闻链接列表，article的主体是正文段落
+        reference: 同一站点的参考页面内容，用于识别重复的模板行
+
+    返回:
+        str: 主体内容，无法识别时返回原始内容
+    """
+    if not markdown:
+        return markdown
+    lines = markdown.split("\n")
+    shared: Set[str] = set()
+    if reference and kind != "homepage":
+        shared = {_normalize_line(line) for line in reference.split("\n") if len(line.strip()) > 3}
+
+    scores = [_score_line(line, kind, shared) for line in lines]
+    start, end, total = _best_span(scores)
+    if total <= 0 or end <= start:
+        logger.warning("未能识别主体内容，使用原始内容")
+        return markdown
+
+    kept: Iterable[str] = lines[start:end]
+    if shared:
+        kept = [line for line in kept if _normalize_line(line) not in shared]
+    content = "\n".join(kept).strip()
+    logger.info(f"提取主体内容: 第{start}~{end}行，长度 {len(markdown)} -> {len(content)}")
+    return content
+
+
+def strip_lines(content: str, header: int, bottom: int) -> str:
+    """
+    按固定行数去除首尾内容，作为sources.yaml中的可选覆盖
+
+    参数:
+        content: 原始内容
+        header: 去除的头部行数
+        bottom: 去除的尾部行数
+
+    返回:
+        str: 去除首尾后的内容
+    """
+    lines = content.split("\n")
+    return "\n".join(lines[header:len(lines) - bottom if bottom else None])
@@ -0,0 +1,162 @@
+"""
+跨来源近似重复新闻检测模块，把不同来源报道同一事件的新闻合并为一条
+
+标题去掉停用词后按词内字符n-gram哈希成固定维度的向量，按本批标题的IDF加权，
+用NumPy一次矩阵乘法算出两两余弦相似度。模板相同、主体不同的标题（如"The best laptops of 2025"和
+"The best headphones of 2025"）共有的n-gram在本批中更常见、权重更低，不容易被误合并。
+
+按顺序以尚未归簇的新闻为种子，只把与种子本身相似且来自其他来源的新闻并入，不沿相似关系传递；
+规范化URL相同的新闻总是合并。每簇保留种子作为代表，其余URL记录在alternate_urls中。
+"""
+import logging
+import os
+import re
+import zlib
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from src.news_podcast.utils.url_canon import url_key
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+# n-gram哈希后的向量维度
+DIM = 1 << 12
+
+_NON_WORD = re.compile(r"[^0-9a-z一-鿿]+")
+
+# 不区分新闻事件的英文虚词，不参与相似度计算
+_STOPWORDS = {
+    "a", "an", "the", "of", "to", "in", "on", "for", "with", "from", "as", "at", "by", "and", "or",
+    "is", "are", "be", "was", "were", "it", "its", "this", "that", "what", "how", "why", "about",
+    "new", "after", "over", "into", "says", "say",
+}
+
+
+def _ngrams(title: str, n: int) -> List[str]:
+    """标题归一化（小写、去掉标点和停用词）后每个词内的字符n-gram，词首尾各补一个空格"""
+    grams = []
+    for word in _NON_WORD.sub(" ", title.lower()).split():
+        if word in _STOPWORDS:
+            continue
+        word = f" {word} "
+        grams.extend(word[i:i + n] for i in range(max(1, len(word) - n + 1)))
+    return grams
+
+
+def title_vectors(titles: List[str], n: int = 3) -> np.ndarray:
+    """
+    把标题转换为L2归一化的IDF加权字符n-gram向量，IDF按本批标题计算
+
+    参数:
+        titles: 标题列表
+        n: n-gram长度
+
+    返回:
+        np.ndarray: 形状为(len(titles), DIM)的矩阵
+    """
+    matrix = np.zeros((len(titles), DIM), dtype=np.float32)
+    for row, title in enumerate(titles):
+        columns = [zlib.crc32(gram.encode("utf-8")) % DIM for gram in _ngrams(title, n)]
+        np.add.at(matrix[row], columns, 1.0)
+    df = np.count_nonzero(matrix, axis=0)
+    matrix *= (np.log((len(titles) + 1) / (df + 1)) + 1).astype(np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def cluster_titles(titles: List[str], threshold: float, keys: Optional[List[str]] = None,
+                   sources: Optional[List[Optional[str]]] = None) -> List[List[int]]:
+    """
+    按标题相似度聚类
+
+    按顺序以尚未归簇的条目为种子，只并入与种子相似度不低于阈值的条目，不沿相似关系传递。
+
+    参数:
+        titles: 标题列表
+        threshold: 余弦相似度阈值，大于等于1时只按keys合并
+        keys: 与titles一一对应的键（如规范化后的URL），键相同的条目无论标题和来源都归为一簇
+        sources: 与titles一一对应的来源，同一簇中每个来源最多一条；为None的条目不受此限制
+
+    返回:
+        List[List[int]]: 每簇的下标（升序），簇按第一条的位置排序
+    """
+    if not titles:
+        return []
+    # 键相同的条目跟随键第一次出现的条目
+    leader = list(range(len(titles)))
+    if keys is not None:
+        first: Dict[str, int] = {}
+        leader = [first.setdefault(key, i) for i, key in enumerate(keys)]
+    similarity = None
+    if threshold < 1:
+        vectors = title_vectors(titles)
+        similarity = vectors @ vectors.T
+
+    cluster_of: Dict[int, int] = {}
+    clusters: List[List[int]] = []
+    for seed in range(len(titles)):
+        if leader[seed] != seed or seed in cluster_of:
+            continue
+        cluster_of[seed] = len(clusters)
+        members = [seed]
+        used = {sources[seed]} if sources is not None else set()
+        if similarity is not None:
+            for j in np.nonzero(similarity[seed] >= threshold)[0].tolist():
+                if j <= seed or leader[j] != j or j in cluster_of:
+                    continue
+                source = sources[j] if sources is not None else None
+                if source is not None and source in used:
+                    continue
+                used.add(source)
+                cluster_of[j] = cluster_of[seed]
+                members.append(j)
+        clusters.append(members)
+
+    for i in range(len(titles)):
+        if leader[i] != i:
+            clusters[cluster_of[leader[i]]].append(i)
+    return [sorted(cluster) for cluster in clusters]
+
+
+def collapse_near_duplicates(news_list: List[Dict[str, Any]],
+                             threshold: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    把不同来源报道同一事件的新闻合并为一条
+
+    参数:
+        news_list: 合并后的各来源新闻列表，靠前的新闻优先作为代表
+        threshold: 标题相似度阈值，默认读取DEDUP_SIMILARITY（默认0.7），大于等于1时只合并URL相同的新闻；
+            只合并不同来源（source字段）的新闻
+
+    返回:
+        List[Dict[str, Any]]: 每个事件一条新闻；被合并的新闻的URL和标题记录在代表的alternate_urls、alternate_titles中
+    """
+    threshold = threshold if threshold is not None else float(os.environ.get("DEDUP_SIMILARITY", "0.7"))
+    if len(news_list) < 2:
+        return news_list
+
+    keys = [url_key(news.get("url", "")) for news in news_list]
+    collapsed = []
+    titles = [news.get("title", "") for news in news_list]
+    sources = [news.get("source") for news in news_list]
+    for cluster in cluster_titles(titles, threshold, keys=keys, sources=sources):
+        representative = dict(news_list[cluster[0]])
+        if len(cluster) > 1:
+            others = [news_list[i] for i in cluster[1:]]
+            known = {keys[cluster[0]]}
+            alternates = []
+            for i in cluster[1:]:
+                if keys[i] not in known:
+                    known.add(keys[i])
+                    alternates.append(news_list[i]["url"])
+            representative["alternate_urls"] = representative.get("alternate_urls", []) + alternates
+            representative["alternate_titles"] = [news.get("title", "") for news in others]
+            logger.info(f"合并{len(cluster)}条近似重复新闻: {representative.get('title')} <- "
+                        f"{representative['alternate_titles']}")
+        collapsed.append(representative)
+
+    logger.info(f"近似重复新闻合并: {len(news_list)} -> {len(collapsed)}条")
+    return collapsed
@@ -0,0 +1,139 @@
+"""
+容错的JSON列表解析模块，逐个恢复模型输出中JSON数组的完整元素
+
+模型输出可能带有说明文字或代码块标记、被截断、含有多余的逗号，或包在{"news": [...]}这样的对象里。
+解析器从第一个"["开始逐个解析数组元素：完整的元素全部保留，格式有误的元素尝试修复后再解析，
+仍无法解析的元素和末尾被截断的元素被跳过，不会因为一处错误丢弃整个列表。
+"""
+import json
+import logging
+import re
+from typing import Any, List, Optional, Tuple
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+_decoder = json.JSONDecoder()
+
+# 对象或数组结束符前多余的逗号
+_TRAILING_COMMA = re.compile(r',\s*([}\]])')
+
+
+def _skip(text: str, pos: int) -> int:
+    """跳过空白和元素之间的逗号"""
+    while pos < len(text) and (text[pos].isspace() or text[pos] == ','):
+        pos += 1
+    return pos
+
+
+def _element_end(text: str, pos: int) -> Optional[int]:
+    """
+    找到从pos开始的对象或数组的结束位置，考虑字符串中的括号和转义
+
+    返回:
+        Optional[int]: 结束符之后的位置，元素未结束（被截断）时返回None
+    """
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(pos, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in '{[':
+            depth += 1
+        elif ch in '}]':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    return None
+
+
+def _repair(fragment: str) -> Any:
+    """修复常见的格式错误（多余的逗号、单引号、中文引号）后解析单个元素"""
+    fixed = _TRAILING_COMMA.sub(r'\1', fragment)
+    try:
+        return json.loads(fixed)
+    except json.JSONDecodeError:
+        pass
+    fixed = fixed.replace('“', '"').replace('”', '"')
+    if '"' not in fixed:
+        fixed = fixed.replace("'", '"')
+    return json.loads(fixed)
+
+
+def _next_element(text: str, pos: int) -> Tuple[Any, Optional[int], bool]:
+    """
+    解析从pos开始的一个数组元素
+
+    返回:
+        Tuple[Any, Optional[int], bool]: (元素, 下一个位置, 是否解析成功)，数组结束或被截断时下一个位置为None
+    """
+    try:
+        value, end = _decoder.raw_decode(text, pos)
+        return value, end, True
+    except json.JSONDecodeError:
+        pass
+
+    if text[pos] in '{[':
+        end = _element_end(text, pos)
+        if end is None:
+            logger.warning(f"JSON数组末尾的元素不完整，已跳过: {text[pos:pos + 80]}...")
+            return None, None, False
+        try:
+            return _repair(text[pos:end]), end, True
+        except json.JSONDecodeError:
+            logger.warning(f"跳过无法解析的JSON元素: {text[pos:min(end, pos + 80)]}...")
+            return None, end, False
+
+    # 标量元素出错时跳到下一个逗号
+    end = text.find(',', pos)
+    bracket = text.find(']', pos)
+    if bracket != -1 and (end == -1 or bracket < end):
+        end = bracket
+    if end == -1:
+        return None, None, False
+    logger.warning(f"跳过无法解析的JSON元素: {text[pos:end][:80]}")
+    return None, end, False
+
+
+def parse_json_list(text: str) -> List[Any]:
+    """
+    从模型输出中恢复第一个JSON数组的所有完整元素
+
+    参数:
+        text: 模型输出
+
+    返回:
+        List[Any]: 成功解析的元素，找不到数组时返回空列表
+    """
+    if not text:
+        return []
+    start = text.find('[')
+    if start == -1:
+        logger.warning(f"响应中没有JSON数组: {text[:100]}...")
+        return []
+
+    items: List[Any] = []
+    pos = start + 1
+    while True:
+        pos = _skip(text, pos)
+        if pos >= len(text):
+            logger.warning("JSON数组没有结束符，可能被截断，保留已解析的元素")
+            break
+        if text[pos] == ']':
+            break
+        value, end, ok = _next_element(text, pos)
+        if ok:
+            items.append(value)
+        if end is None:
+            break
+        pos = end
+    return items
@@ -0,0 +1,124 @@
+"""
+链接提取模块，从首页Markdown中本地解析候选新闻链接，供LLM按编号挑选
+"""
+import logging
+import re
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+from src.news_podcast.utils.url_canon import bare_host, canonical_url, url_key
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+_IMAGE_PATTERN = re.compile(r'!\[[^\]]*\]\([^)]*\)')
+_LINK_PATTERN = re.compile(r'\[([^\[\]]*)\]\(([^)\s]+)(?:\s+"[^"]*")?\)')
+_YEAR_PATTERN = re.compile(r'/20\d\d/')
+
+# 静态资源后缀，不可能是新闻文章
+ASSET_EXTENSIONS = (
+    ".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".ico",
+    ".css", ".js", ".json", ".xml", ".pdf", ".mp3", ".mp4", ".m3u8", ".zip",
+)
+
+# 候选新闻标题至少包含的单词数
+MIN_TITLE_WORDS = 4
+# 标题最大长度，部分首页会把摘要、时间和栏目拼进链接文本
+MAX_TITLE_LENGTH = 200
+
+
+def _looks_like_article(path: str) -> bool:
+    """
+    根据URL路径判断是否像文章页，而不是栏目页或导航页
+
+    文章页的最后一段通常是较长的slug（至少4个单词）或带数字的ID，或者路径中带有年份；
+    栏目页的最后一段通常是一到三个单词，如/world/ukraine-russia-war/。
+    """
+    if _YEAR_PATTERN.search(path):
+        return True
+    segments = [segment for segment in path.split("/") if segment]
+    if segments and segments[-1] in ("index.html", "index.htm"):
+        segments = segments[:-1]
+    if not segments:
+        return False
+    last = re.sub(r'\.html?$', '', segments[-1])
+    return len(last) >= 8 and (last.count("-") >= 3 or any(ch.isdigit() for ch in last))
+
+
+def _is_title(title: str) -> bool:
+    """判断链接文本是否像新闻标题"""
+    if len(title.split()) >= MIN_TITLE_WORDS:
+        return True
+    cjk = sum(1 for ch in title if "一" <= ch <= "鿿")
+    return cjk >= 8
+
+
+def extract_link_candidates(markdown: str, source_url: str,
+                            include_patterns: Optional[List[str]] = None,
+                            exclude_patterns: Optional[List[str]] = None,
+                            max_candidates: int = 100) -> List[Dict[str, str]]:
+    """
+    从首页Markdown中提取候选新闻链接
+
+    参数:
+        markdown: 首页Markdown内容
+        source_url: 首页URL，用于补全相对链接和过滤站外链接
+        include_patterns: 文章URL需要匹配的正则之一，设置后代替默认的文章页判断
+        exclude_patterns: 需要排除的URL正则
+        max_candidates: 最多返回的候选数量，按首页中出现的顺序截取
+
+    返回:
+        List[Dict[str, str]]: 包含title和url的候选列表
+    """
+    site = bare_host(source_url)
+    includes = [re.compile(pattern) for pattern in include_patterns or []]
+    excludes = [re.compile(pattern) for pattern in exclude_patterns or []]
+
+    candidates: List[Dict[str, str]] = []
+    seen = set()
+    for title, raw_url in _LINK_PATTERN.findall(_IMAGE_PATTERN.sub("", markdown)):
+        title = re.sub(r"\s+", " ", title).strip()[:MAX_TITLE_LENGTH]
+        if not _is_title(title):
+            continue
+        url = canonical_url(raw_url, base=source_url)
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            continue
+        host = bare_host(url)
+        if host != site and not host.endswith(f".{site}"):
+            continue
+        if parts.path.lower().endswith(ASSET_EXTENSIONS):
+            continue
+        if any(pattern.search(url) for pattern in excludes):
+            continue
+        if includes:
+            if not any(pattern.search(url) for pattern in includes):
+                continue
+        elif not _looks_like_article(parts.path):
+            continue
+        key = url_key(url)
+        if key in seen:
+            continue
+        seen.add(key)
+        candidates.append({"title": title, "url": url})
+        if len(candidates) >= max_candidates:
+            break
+
+    logger.info(f"从{source_url}首页提取到{len(candidates)}条候选新闻链接")
+    return candidates
+
+
+def format_candidates(candidates: List[Dict[str, str]]) -> str:
+    """
+    将候选链接格式化为紧凑的编号列表，编号从1开始
+
+    参数:
+        candidates: 候选链接列表
+
+    返回:
+        str: 每行一条的编号列表
+    """
+    return "\n".join(
+        f"{idx}. {item['title']} ({urlsplit(item['url']).path})"
+        for idx, item in enumerate(candidates, start=1)
+    )
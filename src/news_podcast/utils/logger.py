@@ -1,45 +1,193 @@
 """
 日志工具模块，用于设置和管理日志
+
+日志记录通过队列交给后台线程写入终端和文件，调用方不等待磁盘I/O；
+LLM响应等大段内容在普通日志中只保留开头部分，完整内容压缩写入单独的归档文件。
 """
+import atexit
+import gzip
+import json
 import logging
+import logging.handlers
 import os
-from typing import Optional
+import queue
+import threading
+from datetime import datetime
+from typing import List, Optional
+
+# 完整大段内容使用的日志记录器，不向上传播到普通日志
+PAYLOAD_LOGGER = "news_podcast.payload"
+PAYLOAD_FILE = "payloads.jsonl.gz"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_installed: List[logging.Handler] = []
+_setup_lock = threading.Lock()
+
+
+class GzipPayloadHandler(logging.Handler):
+    """
+    把大段内容按JSON Lines格式追加写入gzip压缩文件，每条记录包含时间、来源、标签和完整内容
+    """
+
+    def __init__(self, path: str):
+        """
+        参数:
+            path: 归档文件路径
+        """
+        super().__init__()
+        self.path = path
+        self._file = None
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            if self._file is None:
+                self._file = gzip.open(self.path, "at", encoding="utf-8")
+            self._file.write(json.dumps({
+                "time": datetime.fromtimestamp(record.created).isoformat(timespec="seconds"),
+                "logger": getattr(record, "source", record.name),
+                "label": getattr(record, "label", ""),
+                "text": record.getMessage(),
+            }, ensure_ascii=False) + "\n")
+        except Exception:
+            self.handleError(record)
+
+    def close(self) -> None:
+        with self.lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        super().close()
 
-def setup_logging(level: int = logging.INFO, 
-                  log_format: Optional[str] = None, 
-                  log_dir: Optional[str] = None) -> logging.Logger:
+
+def truncate_payload(text: Optional[str], limit: Optional[int] = None) -> str:
+    """
+    截断在普通日志中显示的大段内容
+
+    参数:
+        text: 内容
+        limit: 保留的最大字符数，默认读取LOG_PAYLOAD_CHARS（默认500），0表示不截断
+
+    返回:
+        str: 不超过limit的开头部分，截断时注明总长度
+    """
+    text = text or ""
+    limit = limit if limit is not None else int(os.environ.get("LOG_PAYLOAD_CHARS", "500"))
+    if limit <= 0 or len(text) <= limit:
+        return text
+    return f"{text[:limit]}...（共{len(text)}字符，已截断）"
+
+
+def log_payload(logger: logging.Logger, label: str, text: Optional[str]) -> None:
+    """
+    在INFO级别记录大段内容的开头部分，完整内容写入本次运行的压缩归档文件
+
+    参数:
+        logger: 调用方的日志记录器
+        label: 内容说明，如"得到响应"
+        text: 完整内容
+    """
+    logger.info(f"{label}: {truncate_payload(text)}")
+    payload_logger = logging.getLogger(PAYLOAD_LOGGER)
+    if payload_logger.handlers:
+        payload_logger.info(text or "", extra={"label": label, "source": logger.name})
+
+
+def stop_logging() -> None:
+    """停止后台日志线程，写完队列中剩余的日志并关闭文件"""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+        for handler in _installed:
+            for name in ("", PAYLOAD_LOGGER):
+                logging.getLogger(name).removeHandler(handler)
+            handler.close()
+        _installed.clear()
+
+
+atexit.register(stop_logging)
+
+
+def setup_logging(level: int = logging.INFO,
+                  log_format: Optional[str] = None,
+                  log_dir: Optional[str] = None,
+                  use_queue: Optional[bool] = None) -> logging.Logger:
     """
     设置日志系统
-    
+
     参数:
         level: 日志级别
         log_format: 日志格式
-        log_dir: 日志目录
-        
+        log_dir: 日志目录，指定后写入news_podcast.log，完整的大段内容写入payloads.jsonl.gz
+        use_queue: 是否通过队列由后台线程写日志，默认读取LOG_QUEUE（默认开启）
+
     返回:
         logging.Logger: 配置好的日志记录器
     """
     # 默认日志格式
     if log_format is None:
         log_format = '[%(asctime)s,%(filename)s:%(lineno)d]: %(message)s'
-    # 配置根日志记录器
-    logging.basicConfig(
-        level=level,
-        format=log_format
-    )
-    
-    # 创建日志记录器
-    logger = logging.getLogger('news_podcast')
-    
+    if use_queue is None:
+        use_queue = os.environ.get("LOG_QUEUE", "1").lower() not in ("0", "false", "no")
+
+    # 重复调用时先停止上一次安装的处理器
+    stop_logging()
+
+    formatter = logging.Formatter(log_format)
+    handlers: List[logging.Handler] = []
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+    handlers.append(stream_handler)
+
+    payload_handler = None
     # 如果指定了日志目录，添加文件处理器
     if log_dir:
         # 确保日志目录存在
         if not os.path.exists(log_dir):
             os.makedirs(log_dir)
-        
+
         # 创建文件处理器
-        file_handler = logging.FileHandler(os.path.join(log_dir, 'news_podcast.log'))
-        file_handler.setFormatter(logging.Formatter(log_format))
-        logger.addHandler(file_handler)
-    
-    return logger 
\ No newline at end of file
+        file_handler = logging.FileHandler(os.path.join(log_dir, 'news_podcast.log'), encoding='utf-8')
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+        payload_handler = GzipPayloadHandler(os.path.join(log_dir, PAYLOAD_FILE))
+
+    # 配置根日志记录器，各模块的日志记录器都传播到这里
+    root = logging.getLogger()
+    root.setLevel(level)
+    for handler in root.handlers[:]:
+        if type(handler) is logging.StreamHandler:
+            root.removeHandler(handler)  # 去掉basicConfig等添加的终端处理器，避免重复输出
+
+    payload_logger = logging.getLogger(PAYLOAD_LOGGER)
+    payload_logger.propagate = False
+    payload_logger.setLevel(logging.INFO)
+
+    global _listener
+    with _setup_lock:
+        if use_queue:
+            log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+            queue_handler = logging.handlers.QueueHandler(log_queue)
+            root.addHandler(queue_handler)
+            _installed.append(queue_handler)
+            if payload_handler is not None:
+                payload_queue_handler = logging.handlers.QueueHandler(log_queue)
+                payload_logger.addHandler(payload_queue_handler)
+                _installed.append(payload_queue_handler)
+                # 归档记录只交给归档处理器，普通日志不写入归档
+                payload_handler.addFilter(lambda record: record.name == PAYLOAD_LOGGER)
+                for handler in handlers:
+                    handler.addFilter(lambda record: record.name != PAYLOAD_LOGGER)
+                handlers.append(payload_handler)
+            _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+            _listener.start()
+        else:
+            for handler in handlers:
+                root.addHandler(handler)
+            if payload_handler is not None:
+                payload_logger.addHandler(payload_handler)
+                handlers.append(payload_handler)
+        _installed.extend(handlers)
+
+    return logging.getLogger('news_podcast')
@@ -0,0 +1,181 @@
+"""
+运行指标模块，按流水线阶段统计LLM调用的Token用量、耗时、重试、缓存命中和费用
+"""
+import json
+import logging
+import os
+import threading
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+# 未标注阶段的调用
+STAGE_OTHER = "other"
+
+
+@dataclass
+class StageMetrics:
+    """
+    单个阶段的累计指标
+
+    属性:
+        calls: 调用次数（包括命中缓存和失败的调用）
+        cache_hits: 命中LLM响应缓存的次数
+        failures: 重试耗尽后失败的次数
+        retries: 重试次数（包括故障切换和429后的重试）
+        prompt_tokens: 实际输入Token数，端点未返回用量时为估算值
+        completion_tokens: 实际输出Token数，端点未返回用量时为估算值
+        estimated_prompt_tokens: 发送前估算的输入Token数
+        estimated_usage: 端点未返回用量、Token数为估算值的响应数
+        latency_total: 累计耗时（秒），包括重试和限流等待
+        latency_max: 单次调用的最长耗时（秒）
+        ttft_total: 流式调用的累计首Token耗时（秒）
+        streamed: 流式调用次数
+    """
+    calls: int = 0
+    cache_hits: int = 0
+    failures: int = 0
+    retries: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    estimated_prompt_tokens: int = 0
+    estimated_usage: int = 0
+    latency_total: float = 0.0
+    latency_max: float = 0.0
+    ttft_total: float = 0.0
+    streamed: int = 0
+
+
+class MetricsRegistry:
+    """
+    线程安全的指标注册表，同步调用（线程中）和异步调用共用
+    """
+
+    def __init__(self):
+        self._stages: Dict[str, StageMetrics] = {}
+        self._lock = threading.Lock()
+
+    def record_llm_call(self, stage: Optional[str], prompt_tokens: int = 0, completion_tokens: int = 0,
+                        estimated_prompt_tokens: int = 0, latency: float = 0.0, retries: int = 0,
+                        cache_hit: bool = False, failed: bool = False, ttft: Optional[float] = None,
+                        estimated_usage: int = 0) -> None:
+        """
+        记录一次LLM调用
+
+        参数:
+            stage: 流水线阶段（调用点名称），为None时记为other
+            prompt_tokens: 实际输入Token数（所有尝试之和）
+            completion_tokens: 实际输出Token数（所有尝试之和）
+            estimated_prompt_tokens: 发送前估算的输入Token数
+            latency: 调用总耗时（秒）
+            retries: 重试次数
+            cache_hit: 是否命中响应缓存
+            failed: 是否最终失败
+            ttft: 流式调用的首Token耗时（秒）
+            estimated_usage: 用量为估算值的响应数
+        """
+        with self._lock:
+            stats = self._stages.setdefault(stage or STAGE_OTHER, StageMetrics())
+            stats.calls += 1
+            stats.cache_hits += int(cache_hit)
+            stats.failures += int(failed)
+            stats.retries += retries
+            stats.prompt_tokens += prompt_tokens
+            stats.completion_tokens += completion_tokens
+            stats.estimated_prompt_tokens += estimated_prompt_tokens
+            stats.estimated_usage += estimated_usage
+            stats.latency_total += latency
+            stats.latency_max = max(stats.latency_max, latency)
+            if ttft is not None:
+                stats.ttft_total += ttft
+                stats.streamed += 1
+
+    @property
+    def total_tokens(self) -> int:
+        """所有阶段的输入和输出Token总数"""
+        with self._lock:
+            return sum(stats.prompt_tokens + stats.completion_tokens for stats in self._stages.values())
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        导出各阶段和汇总指标
+
+        费用按LLM_PRICE_PROMPT_PER_MTOK和LLM_PRICE_COMPLETION_PER_MTOK（每百万Token单价）计算，未配置时为0。
+
+        返回:
+            Dict[str, Any]: {"stages": {阶段: 指标}, "totals": 汇总指标}
+        """
+        prompt_price = float(os.environ.get("LLM_PRICE_PROMPT_PER_MTOK", "0"))
+        completion_price = float(os.environ.get("LLM_PRICE_COMPLETION_PER_MTOK", "0"))
+        with self._lock:
+            stages = {name: StageMetrics(**asdict(stats)) for name, stats in self._stages.items()}
+
+        def export(stats: StageMetrics) -> Dict[str, Any]:
+            data = asdict(stats)
+            requested = stats.calls - stats.cache_hits
+            data["latency_avg"] = round(stats.latency_total / requested, 3) if requested else 0.0
+            data["ttft_avg"] = round(stats.ttft_total / stats.streamed, 3) if stats.streamed else None
+            data["cost"] = round((stats.prompt_tokens * prompt_price
+                                  + stats.completion_tokens * completion_price) / 1_000_000, 6)
+            data["latency_total"] = round(stats.latency_total, 3)
+            data["latency_max"] = round(stats.latency_max, 3)
+            data["ttft_total"] = round(stats.ttft_total, 3)
+            return data
+
+        totals = StageMetrics()
+        for stats in stages.values():
+            for key, value in asdict(stats).items():
+                if key == "latency_max":
+                    totals.latency_max = max(totals.latency_max, value)
+                else:
+                    setattr(totals, key, getattr(totals, key) + value)
+        return {
+            "stages": {name: export(stats) for name, stats in sorted(stages.items())},
+            "totals": export(totals),
+        }
+
+    def write(self, path: str, extra: Optional[Dict[str, Any]] = None) -> None:
+        """
+        把指标写入JSON文件
+
+        参数:
+            path: 文件路径
+            extra: 附加的其他统计，如缓存命中情况
+        """
+        data = self.snapshot()
+        data.update(extra or {})
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        logger.info(f"运行指标已保存到{path}，Token总量: {data['totals']['prompt_tokens'] + data['totals']['completion_tokens']}")
+
+    def reset(self) -> None:
+        """清空指标"""
+        with self._lock:
+            self._stages.clear()
+
+
+_metrics: Optional[MetricsRegistry] = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> MetricsRegistry:
+    """获取进程内共享的指标注册表"""
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = MetricsRegistry()
+        return _metrics
+
+
+def configure_metrics(registry: MetricsRegistry) -> None:
+    """
+    替换进程内共享的指标注册表
+
+    参数:
+        registry: 新的指标注册表
+    """
+    global _metrics
+    with _metrics_lock:
+        _metrics = registry
@@ -2,32 +2,188 @@
 新闻处理模块，用于提取和处理新闻内容
 """
 import datetime
-import json
 import logging
+import os
 import re
 import time
 from typing import List, Dict, Any, Optional
+from urllib.parse import urljoin, urlparse
 
-from src.news_podcast.api.llm_client import chat_with_deepseek
+from src.news_podcast.api.llm_client import async_chat_with_deepseek, chat_with_deepseek
+from src.news_podcast.utils.json_parser import parse_json_list
+from src.news_podcast.utils.link_extractor import format_candidates
+from src.news_podcast.utils.url_canon import canonical_url, url_key
+from src.news_podcast.utils.token_budget import (
+    SITE_AGGREGATE_MAP, SITE_GENERATE_PODCAST, SITE_PICK_IMPORTANT, SITE_PICK_NEWS, fit_evenly, fit_items, fit_text
+)
 
 # 设置日志
 logger = logging.getLogger(__name__)
 
-def pick_news_from_source(content: str, source_url: str, sample_url: str, sample_url_output: str) -> List[Dict[str, str]]:
+# 本地提取到的候选链接少于该数量时，回退到让LLM直接阅读首页内容
+MIN_CANDIDATES = 3
+
+# 挑选新闻时请求JSON输出模式，端点不支持时llm_client自动改用普通模式，由parse_json_list容错解析
+JSON_OBJECT = {"type": "json_object"}
+
+
+def pick_news_from_source(content: str, source_url: str, sample_url: str, sample_url_output: str,
+                          candidates: Optional[List[Dict[str, str]]] = None) -> List[Dict[str, str]]:
     """
     从单个新闻源中提取重要新闻
+
+    有本地提取的候选链接时，只把编号列表发给LLM并按编号取回标题和URL，
+    否则让LLM直接从首页内容中提取。
     
     参数:
         content: 新闻源内容
         source_url: 新闻源URL
         sample_url: 示例URL
         sample_url_output: 示例输出格式
+        candidates: 本地提取的候选链接列表，见link_extractor.extract_link_candidates
         
     返回:
         List[Dict[str, str]]: 包含标题和URL的新闻列表
     """
     logger.info(f"开始从{source_url}提取重要新闻")
-    
+    if candidates and len(candidates) >= MIN_CANDIDATES:
+        return pick_news_by_index(candidates, source_url)
+    logger.info(f"{source_url}的候选链接不足{MIN_CANDIDATES}条，由LLM直接从首页内容中提取")
+    return _pick_news_from_content(content, source_url, sample_url, sample_url_output)
+
+
+def _news_items(items: List[Any]) -> List[Dict[str, str]]:
+    """保留包含字符串title和url的新闻项"""
+    valid = []
+    for item in items:
+        if isinstance(item, dict) and isinstance(item.get("title"), str) and isinstance(item.get("url"), str):
+            valid.append(item)
+        else:
+            logger.warning(f"跳过无效的新闻项: {item}")
+    return valid
+
+
+def pick_news_by_index(candidates: List[Dict[str, str]], source_url: str) -> List[Dict[str, str]]:
+    """
+    让LLM从候选链接的编号列表中挑选重要新闻，只返回编号，标题和URL取自候选列表
+
+    参数:
+        candidates: 候选链接列表
+        source_url: 新闻源URL
+
+    返回:
+        List[Dict[str, str]]: 包含标题和URL的新闻列表
+    """
+    # 候选过多时只保留首页中靠前的部分，编号仍与保留的候选一一对应
+    lines = fit_items(format_candidates(candidates).split("\n"), SITE_PICK_NEWS)
+    candidates = candidates[:len(lines)]
+    candidate_list = "\n".join(lines)
+    prompt = f"""
+作为一位专业的新闻编辑,请从{source_url}首页的以下候选新闻中,精选5~10条最值得关注的新闻。选择标准:
+1. 重大社会影响: 政策变化、经济动向、科技突破等
+2. 时效性: 24~48小时内的重要进展
+3. 深度视角: 独特的分析和见解
+4. 创新性: 新趋势、新发现、新思路
+
+候选新闻（编号. 标题 (链接路径)）:
+{candidate_list}
+
+请按重要性从高到低输出所选新闻的编号，格式为JSON对象，例如: {{"indices": [3, 1, 12]}}
+请只输出JSON，不要输出其他内容。
+"""
+    # 只精确到日期，同一天内相同的请求可以命中LLM响应缓存
+    prompt += f"今天是{datetime.datetime.now().strftime('%Y-%m-%d')}"
+
+    response = ""
+    try:
+        response = chat_with_deepseek(prompt, stream=False, call_site=SITE_PICK_NEWS,
+                                      response_format=JSON_OBJECT).strip()
+        indices = parse_json_list(response)
+        if not indices:
+            logger.error(f"无法从响应中提取编号列表: {response[:100]}...")
+            return []
+
+        news_list = []
+        picked = set()
+        for item in indices:
+            # 兼容模型输出 {"index": 3} 或 "3" 的情况
+            if isinstance(item, dict):
+                item = item.get("index", item.get("id"))
+            try:
+                idx = int(item)
+            except (TypeError, ValueError):
+                logger.warning(f"跳过无效的编号: {item}")
+                continue
+            if not 1 <= idx <= len(candidates) or idx in picked:
+                logger.warning(f"跳过超出范围或重复的编号: {idx}")
+                continue
+            picked.add(idx)
+            candidate = candidates[idx - 1]
+            news_list.append({"title": candidate["title"], "url": candidate["url"]})
+
+        logger.info(f"从{source_url}的{len(candidates)}条候选中选出{len(news_list)}条新闻")
+        return news_list
+    except Exception as e:
+        logger.error(f"解析{source_url}的新闻编号时出错: {e}")
+        logger.error(f"响应内容: {response[:200]}...")
+        return []
+
+
+def _extract_news_from_text(response: str) -> List[Dict[str, str]]:
+    """响应中没有JSON时，从逐行的文本中提取标题和URL"""
+    news_list = []
+    lines = response.split('\n')
+    for i, line in enumerate(lines):
+        url_match = re.search(r'(https?://[^\s]+)', line)
+        if url_match:
+            url = url_match.group(1)
+            # 尝试从同一行或前一行提取标题
+            title = line.replace(url, '').strip()
+            if not title and i > 0:
+                title = lines[i - 1].strip()
+            if title:
+                news_list.append({"title": title, "url": url})
+    return news_list
+
+
+def _validate_against_content(news_list: List[Dict[str, str]], content: str, source_url: str) -> List[Dict[str, str]]:
+    """
+    丢弃链接没有出现在首页内容中的新闻，避免模型编造URL
+
+    首页中的链接可能是相对路径，因此URL或其路径出现在内容中即视为有效；内容中没有任何链接时不做校验。
+    """
+    if "http" not in content and "](/" not in content:
+        return news_list
+    valid = []
+    seen = set()
+    for news in news_list:
+        url = urljoin(source_url, news["url"].strip())
+        path = urlparse(url).path
+        key = url_key(url)
+        if key in seen:
+            continue
+        if url in content or (len(path) > 1 and path in content):
+            seen.add(key)
+            valid.append({**news, "url": canonical_url(url)})
+        else:
+            logger.warning(f"跳过首页内容中不存在的链接: {news['title']} - {news['url']}")
+    return valid
+
+
+def _pick_news_from_content(content: str, source_url: str, sample_url: str, sample_url_output: str) -> List[Dict[str, str]]:
+    """
+    让LLM直接从首页内容中提取新闻标题和URL
+
+    参数:
+        content: 新闻源内容
+        source_url: 新闻源URL
+        sample_url: 示例URL
+        sample_url_output: 示例输出格式
+
+    返回:
+        List[Dict[str, str]]: 包含标题和URL的新闻列表
+    """
+    content = fit_text(content, SITE_PICK_NEWS)
     prompt = f"""
 作为一位专业的新闻编辑,请从{source_url}的首页内容中,精选5~10条最值得关注的新闻。选择标准:
 1. 重大社会影响: 政策变化、经济动向、科技突破等
@@ -36,72 +192,35 @@ def pick_news_from_source(content: str, source_url: str, sample_url: str, sample
 4. 创新性: 新趋势、新发现、新思路
 
 请按以下JSON格式输出新闻列表:
-[
+{{"news": [
     {{"title": "新闻标题1", "url": "新闻URL1"}},
     {{"title": "新闻标题2", "url": "新闻URL2"}},
     ...
-]
+]}}
 
 参考示例: {sample_url} 输出为: {sample_url_output}
 
 首页内容如下:
 {content}
 
-请只输出JSON格式的新闻列表，不要输出其他内容。确保输出是有效的JSON格式。
+请只输出JSON，不要输出其他内容。确保输出是有效的JSON格式。
 """
     
-    prompt += f"今天是{datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+    # 只精确到日期，同一天内相同的请求可以命中LLM响应缓存
+    prompt += f"今天是{datetime.datetime.now().strftime('%Y-%m-%d')}"
     
+    response = ""
     try:
-        response = chat_with_deepseek(prompt, stream=False)
-        
-        # 尝试清理响应文本，确保它是有效的JSON
-        response = response.strip()
-        
-        # 如果响应不是以[开头，尝试提取JSON部分
-        if not response.startswith('['):
-            json_match = re.search(r'\[(.*)\]', response, re.DOTALL)
-            if json_match:
-                response = json_match.group(0)
-            else:
-                # 尝试从文本中提取标题和URL
-                logger.warning(f"无法从响应中提取JSON，尝试从文本中提取标题和URL: {response[:100]}...")
-                news_list = []
-                lines = response.split('\n')
-                for line in lines:
-                    if 'http' in line and '://' in line:
-                        url_match = re.search(r'(https?://[^\s]+)', line)
-                        if url_match:
-                            url = url_match.group(1)
-                            # 尝试从同一行或前一行提取标题
-                            title = line.replace(url, '').strip()
-                            if not title and len(lines) > 1:
-                                title = lines[lines.index(line)-1].strip()
-                            if title:
-                                news_list.append({"title": title, "url": url})
-                if news_list:
-                    logger.info(f"从文本中提取到{len(news_list)}条新闻")
-                    return news_list
-                else:
-                    logger.error(f"无法从响应中提取新闻信息: {response[:100]}...")
-                    return []
-        
-        # 尝试解析JSON
-        news_list = json.loads(response)
-        
-        # 验证JSON格式
-        if not isinstance(news_list, list):
-            logger.error(f"解析结果不是列表: {type(news_list)}")
-            return []
-            
-        # 验证每个新闻项
-        valid_news_list = []
-        for item in news_list:
-            if isinstance(item, dict) and 'title' in item and 'url' in item:
-                valid_news_list.append(item)
-            else:
-                logger.warning(f"跳过无效的新闻项: {item}")
-                
+        response = chat_with_deepseek(prompt, stream=False, call_site=SITE_PICK_NEWS,
+                                      response_format=JSON_OBJECT).strip()
+        items = parse_json_list(response)
+        if items:
+            news_list = _news_items(items)
+        else:
+            logger.warning(f"无法从响应中提取JSON，尝试从文本中提取标题和URL: {response[:100]}...")
+            news_list = _extract_news_from_text(response)
+
+        valid_news_list = _validate_against_content(news_list, content, source_url)
         logger.info(f"从{source_url}提取到{len(valid_news_list)}条有效新闻")
         return valid_news_list
     except Exception as e:
@@ -110,6 +229,37 @@ def pick_news_from_source(content: str, source_url: str, sample_url: str, sample
         return []
 
 
+def _match_candidates(selected: List[Dict[str, str]], all_news: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """
+    把模型选出的新闻对应回候选新闻，URL不在候选中时按标题匹配，都不匹配的丢弃
+
+    返回:
+        List[Dict[str, str]]: 标题和URL取自候选新闻、附带选择原因的新闻列表，保留其他来源的URL
+    """
+    # 按规范化后的URL匹配，模型改写了协议、www.前缀、末尾斜杠或带上跟踪参数时仍能对应回候选
+    by_url = {url_key(news["url"]): news for news in all_news}
+    for news in all_news:
+        for url in news.get("alternate_urls", []):
+            by_url.setdefault(url_key(url), news)
+    by_title = {news["title"].strip(): news for news in all_news}
+    matched = []
+    seen = set()
+    for item in selected:
+        news = by_url.get(url_key(item["url"])) or by_title.get(item["title"].strip())
+        if news is None:
+            logger.warning(f"跳过不在候选列表中的新闻: {item['title']} - {item['url']}")
+            continue
+        if news["url"] in seen:
+            continue
+        seen.add(news["url"])
+        # 确保reason字段存在
+        picked = {"title": news["title"], "url": news["url"], "reason": item.get("reason") or "未提供选择原因"}
+        if news.get("alternate_urls"):
+            picked["alternate_urls"] = news["alternate_urls"]
+        matched.append(picked)
+    return matched
+
+
 def pick_important_news(all_news: List[Dict[str, str]]) -> List[Dict[str, str]]:
     """
     从所有来源的新闻中精选5-10条最重要的新闻
@@ -122,10 +272,9 @@ def pick_important_news(all_news: List[Dict[str, str]]) -> List[Dict[str, str]]:
     """
     logger.info("开始从所有来源中精选重要新闻")
     
-    # 构建所有新闻的摘要
-    news_summary = ""
-    for idx, news in enumerate(all_news, start=1):
-        news_summary += f"{idx}. 标题: {news['title']}\n   来源: {news['url']}\n\n"
+    # 构建所有新闻的摘要，超出Token预算时只保留靠前的新闻
+    items = [f"{idx}. 标题: {news['title']}\n   来源: {news['url']}\n\n" for idx, news in enumerate(all_news, start=1)]
+    news_summary = "".join(fit_items(items, SITE_PICK_IMPORTANT, separator_tokens=0))
     
     prompt = f"""
 作为一位资深的科技新闻主编，请从以下所有新闻源中精选12条最值得关注的新闻。选择标准：
@@ -140,49 +289,25 @@ def pick_important_news(all_news: List[Dict[str, str]]) -> List[Dict[str, str]]:
 {news_summary}
 
 请按以下JSON格式输出精选的新闻列表（12条）：
-[
+{{"news": [
     {{"title": "新闻标题1", "url": "新闻URL1", "reason": "选择原因1"}},
     {{"title": "新闻标题2", "url": "新闻URL2", "reason": "选择原因2"}},
     ...
-]
+]}}
 
-请只输出JSON格式的新闻列表，不要输出其他内容。确保输出是有效的JSON格式。
+请只输出JSON，不要输出其他内容。确保输出是有效的JSON格式。
 """
     
+    response = ""
     try:
-        response = chat_with_deepseek(prompt, stream=False)
-        
-        # 尝试清理响应文本，确保它是有效的JSON
-        response = response.strip()
-        
-        # 如果响应不是以[开头，尝试提取JSON部分
-        if not response.startswith('['):
-            json_match = re.search(r'\[(.*)\]', response, re.DOTALL)
-            if json_match:
-                response = json_match.group(0)
-            else:
-                logger.error(f"无法从响应中提取JSON: {response[:100]}...")
-                return []
-        
-        # 尝试解析JSON
-        selected_news = json.loads(response)
-        
-        # 验证JSON格式
-        if not isinstance(selected_news, list):
-            logger.error(f"解析结果不是列表: {type(selected_news)}")
+        response = chat_with_deepseek(prompt, stream=False, call_site=SITE_PICK_IMPORTANT,
+                                      response_format=JSON_OBJECT).strip()
+        selected_news = parse_json_list(response)
+        if not selected_news:
+            logger.error(f"无法从响应中提取JSON: {response[:100]}...")
             return []
-            
-        # 验证每个新闻项
-        valid_news = []
-        for item in selected_news:
-            if isinstance(item, dict) and 'title' in item and 'url' in item:
-                # 确保reason字段存在
-                if 'reason' not in item:
-                    item['reason'] = "未提供选择原因"
-                valid_news.append(item)
-            else:
-                logger.warning(f"跳过无效的新闻项: {item}")
-                
+
+        valid_news = _match_candidates(_news_items(selected_news), all_news)
         logger.info(f"从所有来源中精选出{len(valid_news)}条重要新闻")
         return valid_news
     except Exception as e:
@@ -191,23 +316,10 @@ def pick_important_news(all_news: List[Dict[str, str]]) -> List[Dict[str, str]]:
         return []
 
 
-def generate_podcast(news_content: str, source_url: str) -> str:
-    """
-    生成播客内容
-    
-    参数:
-        news_content: 新闻内容
-        source_url: 新闻来源URL
-        
-    返回:
-        str: 生成的播客内容
-    """
-    st = time.time()
-    if news_content is None or news_content.strip() == "":
-        logger.warning(f"{source_url}新闻内容为空，跳过生成播客")
-        return "无内容，跳过"
-
-    prompt = f"""
+def _podcast_prompt(news_content: str, source_url: str) -> str:
+    """构造单条新闻分析的提示词，正文按调用点预算截断"""
+    news_content = fit_text(news_content, SITE_GENERATE_PODCAST)
+    return f"""
 请用以下风格分析这条新闻：
 
 我希望你表现得像一位资深科技评论员，对这条新闻发表犀利且有深度的见解。请做到：
@@ -242,10 +354,93 @@ def generate_podcast(news_content: str, source_url: str) -> str:
 原始新闻内容:
 {news_content}
 """
+
+
+def generate_podcast(news_content: str, source_url: str) -> str:
+    """
+    生成播客内容
+    
+    参数:
+        news_content: 新闻内容
+        source_url: 新闻来源URL
+        
+    返回:
+        str: 生成的播客内容
+    """
+    st = time.time()
+    if news_content is None or news_content.strip() == "":
+        logger.warning(f"{source_url}新闻内容为空，跳过生成播客")
+        return "无内容，跳过"
+
     logger.info(f"开始生成{source_url}播客")
     podcast = chat_with_deepseek(
-        prompt=prompt,
+        prompt=_podcast_prompt(news_content, source_url),
+        stream=False,
+        call_site=SITE_GENERATE_PODCAST,
+    )
+    logger.info(f"生成{source_url}播客耗时: {time.time()-st:.2f}s")
+    return podcast
+
+
+async def async_generate_podcast(news_content: str, source_url: str) -> str:
+    """
+    generate_podcast的异步版本，多条新闻的分析可以在同一个事件循环中并发进行
+
+    参数:
+        news_content: 新闻内容
+        source_url: 新闻来源URL
+
+    返回:
+        str: 生成的播客内容
+    """
+    st = time.time()
+    if news_content is None or news_content.strip() == "":
+        logger.warning(f"{source_url}新闻内容为空，跳过生成播客")
+        return "无内容，跳过"
+
+    logger.info(f"开始生成{source_url}播客")
+    podcast = await async_chat_with_deepseek(
+        prompt=_podcast_prompt(news_content, source_url),
         stream=False,
+        call_site=SITE_GENERATE_PODCAST,
     )
     logger.info(f"生成{source_url}播客耗时: {time.time()-st:.2f}s")
-    return podcast 
\ No newline at end of file
+    return podcast 
+
+
+async def async_condense_group(sections: List[str], level: int = 1) -> str:
+    """
+    把同一主题的若干条新闻分析浓缩为一篇主题综述，供整合日报使用
+
+    参数:
+        sections: 该组的新闻分析（含标题和来源链接），或上一层的主题综述
+        level: 浓缩层数，从1开始
+
+    返回:
+        str: 主题综述
+    """
+    st = time.time()
+    body = "\n".join(fit_evenly(sections, SITE_AGGREGATE_MAP))
+    kind = "新闻分析" if level == 1 else "主题综述"
+    prompt = f"""
+以下是{len(sections)}篇主题相近的{kind}。请把它们整理成一篇主题综述，供主编撰写当天的科技日报：
+
+1. 开头用一句话概括这组新闻的共同主题
+2. 逐条保留每条新闻：标题、来源链接、发生了什么、必要的背景，以及原分析中的主要观点和态度
+3. 指出这些新闻之间的联系或矛盾（如果有）
+
+要求：
+- 不要遗漏任何一条新闻和它的链接（链接直接用文字给出，不要用markdown格式）
+- 不要给出没有来源的数据
+- 只做整理和压缩，不要写开场白和结尾
+
+{body}
+"""
+    summary = await async_chat_with_deepseek(
+        prompt=prompt,
+        stream=False,
+        max_tokens=int(os.environ.get("AGGREGATE_MAP_MAX_TOKENS", "4096")),
+        call_site=SITE_AGGREGATE_MAP,
+    )
+    logger.info(f"第{level}层浓缩{len(sections)}段内容耗时: {time.time()-st:.2f}s")
+    return summary
@@ -0,0 +1,274 @@
+"""
+新闻预排序模块，在本地给所有来源的候选新闻打分，只把得分最高的K条交给模型精选
+
+得分是几项信号的加权和，每项信号都归一化到0~1：
+- topic: 标题和URL路径与主题关键词的BM25相关度
+- freshness: 从URL中解析出的发布日期距今的天数，按半衰期衰减
+- source: 来源权重
+- position: 在来源首页中的位置，越靠前越重要
+- coverage: 报道同一事件的来源数（近似重复合并后alternate_urls的数量）
+各信号的权重、主题关键词和来源权重在sources.yaml的ranking中配置。
+"""
+import datetime
+import logging
+import math
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from rank_bm25 import BM25Okapi
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+# 各信号的默认权重
+DEFAULT_WEIGHTS = {
+    "topic": 0.35,
+    "freshness": 0.2,
+    "source": 0.15,
+    "position": 0.2,
+    "coverage": 0.1,
+}
+
+# 科技日报关注的默认主题
+DEFAULT_TOPICS = {
+    "ai": {
+        "keywords": ["ai", "artificial intelligence", "openai", "chatgpt", "gemini", "anthropic", "llm",
+                     "model", "nvidia", "chip", "chips", "semiconductor", "robot", "人工智能", "大模型", "芯片"],
+        "weight": 1.0,
+    },
+    "tech": {
+        "keywords": ["apple", "google", "microsoft", "meta", "amazon", "tesla", "musk", "startup",
+                     "software", "cyber", "hack", "privacy", "data", "app", "smartphone", "科技", "互联网"],
+        "weight": 0.9,
+    },
+    "economy": {
+        "keywords": ["tariff", "tariffs", "trade", "economy", "market", "markets", "stocks", "inflation",
+                     "fed", "rates", "investment", "antitrust", "regulation", "关税", "经济", "监管"],
+        "weight": 0.8,
+    },
+    "science": {
+        "keywords": ["science", "space", "nasa", "climate", "energy", "battery", "quantum", "research",
+                     "study", "vaccine", "科学", "航天", "气候", "能源"],
+        "weight": 0.7,
+    },
+}
+
+_WORD = re.compile(r"[a-z0-9]+|[一-鿿]+")
+# URL中的日期：/2025/04/09/、-2025-04-09、/20250409/
+_DATE_PATTERNS = [
+    re.compile(r"/(20\d\d)/(\d{1,2})/(\d{1,2})(?:/|$)"),
+    re.compile(r"(?<!\d)(20\d\d)-(\d\d)-(\d\d)(?!\d)"),
+    re.compile(r"/(20\d\d)(\d\d)(\d\d)(?:/|$)"),
+]
+
+
+@dataclass
+class TopicProfile:
+    """
+    主题关键词配置
+
+    属性:
+        keywords: 主题关键词，可以是多个单词的短语
+        weight: 主题权重，命中多个主题时取加权后的最大值
+    """
+    keywords: List[str]
+    weight: float = 1.0
+
+
+@dataclass
+class RankingConfig:
+    """
+    预排序配置
+
+    属性:
+        weights: 信号名到权重的映射
+        topics: 主题名到关键词配置的映射
+        source_weights: 来源（output_file）到权重的映射，未配置的来源权重为1
+        freshness_half_life: 时效得分的半衰期（天）
+        undated_freshness: URL中没有日期时的时效得分
+    """
+    weights: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_WEIGHTS))
+    topics: Dict[str, TopicProfile] = field(
+        default_factory=lambda: {name: TopicProfile(**fields) for name, fields in DEFAULT_TOPICS.items()}
+    )
+    source_weights: Dict[str, float] = field(default_factory=dict)
+    freshness_half_life: float = 2.0
+    undated_freshness: float = 0.5
+
+
+def build_ranking_config(overrides: Optional[Dict[str, Any]] = None) -> RankingConfig:
+    """
+    合并默认配置和配置文件中的ranking配置
+
+    参数:
+        overrides: 配置字段，weights和topics按名称覆盖默认值，其他字段直接替换
+
+    返回:
+        RankingConfig: 预排序配置
+    """
+    config = RankingConfig()
+    overrides = dict(overrides or {})
+    weights = overrides.pop("weights", None) or {}
+    unknown = set(weights) - set(DEFAULT_WEIGHTS)
+    if unknown:
+        raise ValueError(f"ranking.weights中有未知的信号: {sorted(unknown)}")
+    config.weights.update({name: float(value) for name, value in weights.items()})
+    for name, fields in (overrides.pop("topics", None) or {}).items():
+        config.topics[name] = TopicProfile(**fields)
+    if "source_weights" in overrides:
+        config.source_weights = {name: float(value) for name, value in (overrides.pop("source_weights") or {}).items()}
+    for name, value in overrides.items():
+        if not hasattr(config, name):
+            raise ValueError(f"未知的ranking配置: {name}")
+        setattr(config, name, float(value))
+    return config
+
+
+_config: Optional[RankingConfig] = None
+_config_lock = threading.Lock()
+
+
+def get_ranking_config() -> RankingConfig:
+    """获取进程内共享的预排序配置，未配置时使用默认配置"""
+    global _config
+    with _config_lock:
+        if _config is None:
+            _config = RankingConfig()
+        return _config
+
+
+def configure_ranking(config: RankingConfig) -> None:
+    """
+    替换进程内共享的预排序配置
+
+    参数:
+        config: 新的配置
+    """
+    global _config
+    with _config_lock:
+        _config = config
+
+
+def _tokens(text: str) -> List[str]:
+    """分词：英文按单词，中文按相邻两字"""
+    tokens = []
+    for word in _WORD.findall(text.lower()):
+        if word.isascii() or len(word) == 1:
+            tokens.append(word)
+        else:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+def url_date(url: str) -> Optional[datetime.date]:
+    """
+    从URL路径中解析发布日期
+
+    参数:
+        url: 新闻URL
+
+    返回:
+        Optional[datetime.date]: 发布日期，没有或无效时返回None
+    """
+    path = urlsplit(url).path
+    for pattern in _DATE_PATTERNS:
+        match = pattern.search(path)
+        if match:
+            try:
+                return datetime.date(*(int(part) for part in match.groups()))
+            except ValueError:
+                continue
+    return None
+
+
+def _topic_scores(news_list: List[Dict[str, Any]], topics: Dict[str, TopicProfile]) -> List[float]:
+    """各新闻与主题关键词的BM25相关度，取加权后最相关的主题，按最大值归一化"""
+    corpus = [_tokens(f"{news.get('title', '')} {urlsplit(news.get('url', '')).path}") for news in news_list]
+    if not topics or not any(corpus):
+        return [0.0] * len(news_list)
+    bm25 = BM25Okapi([doc or [""] for doc in corpus])
+    best = [0.0] * len(news_list)
+    for profile in topics.values():
+        query = [token for keyword in profile.keywords for token in _tokens(keyword)]
+        if not query:
+            continue
+        for i, score in enumerate(bm25.get_scores(query)):
+            best[i] = max(best[i], float(score) * profile.weight)
+    top = max(best)
+    return [score / top for score in best] if top > 0 else best
+
+
+def score_news(news_list: List[Dict[str, Any]], config: Optional[RankingConfig] = None,
+               today: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    计算每条新闻的各项信号和总分
+
+    参数:
+        news_list: 候选新闻，可带source（来源）、position（在来源首页中的位置）和alternate_urls
+        config: 预排序配置，默认使用configure_ranking设置的配置
+        today: 当前日期，YYYYMMDD，默认为今天
+
+    返回:
+        List[Dict[str, Any]]: 与news_list一一对应的{index, title, url, source, score, signals}
+    """
+    config = config or get_ranking_config()
+    current = datetime.datetime.strptime(today, "%Y%m%d").date() if today else datetime.date.today()
+    max_source_weight = max([1.0, *config.source_weights.values()])
+    topic = _topic_scores(news_list, config.topics)
+
+    scored = []
+    for i, news in enumerate(news_list):
+        published = url_date(news.get("url", ""))
+        if published is None:
+            freshness = config.undated_freshness
+        else:
+            age = max(0, (current - published).days)
+            freshness = 0.5 ** (age / config.freshness_half_life) if config.freshness_half_life > 0 else 1.0
+        source = news.get("source")
+        signals = {
+            "topic": topic[i],
+            "freshness": freshness,
+            "source": config.source_weights.get(source, 1.0) / max_source_weight,
+            "position": 1 / math.log2(news["position"] + 2) if "position" in news else 0.5,
+            "coverage": 1 - 1 / (1 + len(news.get("alternate_urls", []))),
+        }
+        score = sum(config.weights.get(name, 0.0) * value for name, value in signals.items())
+        scored.append({
+            "index": i,
+            "title": news.get("title", ""),
+            "url": news.get("url", ""),
+            "source": source,
+            "score": round(score, 4),
+            "signals": {name: round(value, 4) for name, value in signals.items()},
+        })
+    return scored
+
+
+def pre_rank(news_list: List[Dict[str, Any]], top_k: Optional[int] = None,
+             config: Optional[RankingConfig] = None,
+             today: Optional[str] = None) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    按得分排序并保留前K条新闻
+
+    参数:
+        news_list: 候选新闻
+        top_k: 保留的条数，默认读取PRE_RANK_TOP_K（默认60），0表示不截断只排序
+        config: 预排序配置，默认使用configure_ranking设置的配置
+        today: 当前日期，YYYYMMDD，默认为今天
+
+    返回:
+        Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]: (按得分从高到低保留的新闻, 所有新闻的打分记录)，
+            打分记录按得分排序，kept字段表示是否保留
+    """
+    top_k = top_k if top_k is not None else int(os.environ.get("PRE_RANK_TOP_K", "60"))
+    scored = sorted(score_news(news_list, config, today), key=lambda item: (-item["score"], item["index"]))
+    limit = top_k if top_k > 0 else len(scored)
+    for rank, item in enumerate(scored):
+        item["kept"] = rank < limit
+    kept = [news_list[item["index"]] for item in scored[:limit]]
+    logger.info(f"预排序: {len(news_list)}条候选新闻保留得分最高的{len(kept)}条")
+    return kept, scored
@@ -0,0 +1,161 @@
+"""
+重试策略模块，提供统一的错误分类、带抖动的指数退避和按域名的熔断器
+"""
+import asyncio
+import logging
+import random
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Set
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+# 错误分类
+ERROR_TIMEOUT = "timeout"          # 请求或页面加载超时
+ERROR_NETWORK = "network"          # 连接失败、DNS错误等
+ERROR_CLIENT = "http_4xx"          # 4xx响应，重试通常无意义
+ERROR_RATE_LIMITED = "http_429"    # 被限流，需要更长的等待
+ERROR_SERVER = "http_5xx"          # 5xx响应，可能是临时故障
+ERROR_EMPTY = "empty"              # 请求成功但内容为空
+ERROR_OTHER = "other"              # 其他未知错误
+ERROR_CIRCUIT_OPEN = "circuit_open"  # 域名已熔断，未发出请求
+
+# 说明站点本身不可用的错误，会计入熔断器
+HOST_DOWN_ERRORS = {ERROR_TIMEOUT, ERROR_NETWORK, ERROR_SERVER}
+
+_NETWORK_KEYWORDS = ("net::err", "connection", "dns", "name resolution", "ssl", "refused", "reset")
+
+
+def classify_error(exc: Optional[BaseException] = None,
+                   status_code: Optional[int] = None,
+                   content: Optional[str] = None) -> str:
+    """
+    对一次失败的请求进行分类
+
+    参数:
+        exc: 请求抛出的异常
+        status_code: HTTP状态码
+        content: 返回的内容
+
+    返回:
+        str: 错误类型
+    """
+    if exc is not None:
+        if isinstance(exc, asyncio.TimeoutError):
+            return ERROR_TIMEOUT
+        message = str(exc).lower()
+        if "timeout" in message or "timed out" in message:
+            return ERROR_TIMEOUT
+        if any(keyword in message for keyword in _NETWORK_KEYWORDS):
+            return ERROR_NETWORK
+        return ERROR_OTHER
+    if status_code is not None:
+        if status_code == 429:
+            return ERROR_RATE_LIMITED
+        if 400 <= status_code < 500:
+            return ERROR_CLIENT
+        if status_code >= 500:
+            return ERROR_SERVER
+    if content is None or not content.strip():
+        return ERROR_EMPTY
+    return ERROR_OTHER
+
+
+@dataclass
+class RetryPolicy:
+    """
+    带抖动的指数退避重试策略
+
+    属性:
+        max_attempts: 最大尝试次数（包含第一次）
+        base_delay: 第一次重试前的基础等待时间（秒）
+        max_delay: 单次等待的上限（秒）
+        jitter: 抖动比例，实际等待时间在[delay*(1-jitter), delay]之间随机
+        retry_on: 需要重试的错误类型
+    """
+    max_attempts: int = 3
+    base_delay: float = 1.0
+    max_delay: float = 10.0
+    jitter: float = 0.5
+    retry_on: Set[str] = field(default_factory=lambda: {
+        ERROR_TIMEOUT, ERROR_NETWORK, ERROR_RATE_LIMITED, ERROR_SERVER, ERROR_EMPTY, ERROR_OTHER,
+    })
+
+    def should_retry(self, error_kind: str, attempt: int) -> bool:
+        """
+        判断是否需要继续重试
+
+        参数:
+            error_kind: 本次失败的错误类型
+            attempt: 已经进行的尝试次数
+
+        返回:
+            bool: 是否继续重试
+        """
+        return attempt < self.max_attempts and error_kind in self.retry_on
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        计算第attempt次失败后的等待时间
+
+        参数:
+            attempt: 已经进行的尝试次数，从1开始
+            retry_after: 服务端要求的等待时间（秒），优先使用
+
+        返回:
+            float: 等待时间（秒）
+        """
+        if retry_after is not None:
+            return min(max(retry_after, 0.0), self.max_delay)
+        delay = min(self.base_delay * (2 ** (attempt - 1)), self.max_delay)
+        return delay * (1 - self.jitter * random.random())
+
+    async def sleep(self, attempt: int, retry_after: Optional[float] = None) -> None:
+        """按退避策略等待"""
+        await asyncio.sleep(self.delay(attempt, retry_after))
+
+
+class CircuitBreaker:
+    """
+    按域名的熔断器
+
+    同一域名连续出现failure_threshold次站点级错误（超时、网络错误、5xx）后熔断，
+    本次运行内对该域名的后续请求直接失败，不再浪费重试时间。
+    """
+
+    def __init__(self, failure_threshold: int = 4):
+        """
+        参数:
+            failure_threshold: 触发熔断的连续失败次数
+        """
+        self.failure_threshold = failure_threshold
+        self._failures: Dict[str, int] = {}
+        self._open: Set[str] = set()
+
+    def allow(self, host: str) -> bool:
+        """判断是否允许请求该域名"""
+        return host not in self._open
+
+    def record_success(self, host: str) -> None:
+        """记录一次成功的请求，清零连续失败次数"""
+        self._failures.pop(host, None)
+
+    def record_failure(self, host: str, error_kind: str) -> None:
+        """
+        记录一次失败的请求
+
+        参数:
+            host: 域名
+            error_kind: 错误类型，只有站点级错误计入熔断
+        """
+        if error_kind not in HOST_DOWN_ERRORS:
+            return
+        self._failures[host] = self._failures.get(host, 0) + 1
+        if self._failures[host] >= self.failure_threshold and host not in self._open:
+            self._open.add(host)
+            logger.warning(f"{host}连续失败{self._failures[host]}次，本次运行内熔断")
+
+    @property
+    def open_hosts(self) -> Set[str]:
+        """已熔断的域名"""
+        return set(self._open)
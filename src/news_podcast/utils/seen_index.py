@@ -0,0 +1,344 @@
+"""
+已见新闻索引模块，记录每次运行考虑过和选中的新闻URL，用于跨天去重
+
+URL统一按url_key规范化后存储和查询，跟踪参数、www.前缀等写法差异不会导致漏判；
+每个URL每天一行，只追加不修改，按(url, day)主键查询，去重耗时不随历史增长；
+可选的布隆过滤器保存在数据库旁边，绝大多数从未出现过的URL不需要查询数据库。
+布隆过滤器在内存中更新，只在flush、compact和close时写回文件；有未写回的修改时删除旧文件，
+进程中途退出后下次打开会按数据库重建，不会因为文件过期而漏判。
+
+命令行:
+    python -m src.news_podcast.utils.seen_index stats
+    python -m src.news_podcast.utils.seen_index compact --days 365
+    python -m src.news_podcast.utils.seen_index import --root .
+"""
+import datetime
+import glob
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from argparse import ArgumentParser
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from src.news_podcast.utils.url_canon import url_key
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sightings (
+    url TEXT NOT NULL,
+    day TEXT NOT NULL,
+    selected INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (url, day)
+) WITHOUT ROWID
+"""
+
+# 每次查询的URL数上限，避免超过SQLite的参数个数限制
+_QUERY_CHUNK = 500
+
+
+class BloomFilter:
+    """
+    保存在文件中的布隆过滤器，只会误报不会漏报
+    """
+
+    def __init__(self, path: str, bits: int, hashes: int = 7):
+        """
+        参数:
+            path: 保存位数组的文件路径
+            bits: 位数组大小
+            hashes: 哈希函数个数
+        """
+        self.path = path
+        self.bits = bits
+        self.hashes = hashes
+        self._array = bytearray((bits + 7) // 8)
+        self.dirty = False
+        if os.path.exists(path) and os.path.getsize(path) == len(self._array):
+            with open(path, "rb") as f:
+                self._array = bytearray(f.read())
+            self.loaded = True
+        else:
+            self.loaded = False
+
+    def _positions(self, item: str) -> Iterable[int]:
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.bits for i in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self._array[pos >> 3] |= 1 << (pos & 7)
+        self._mark_dirty()
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._array[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def clear(self) -> None:
+        self._array = bytearray(len(self._array))
+        self._mark_dirty()
+
+    def _mark_dirty(self) -> None:
+        """内存中有了未写回的修改，删除已过期的文件"""
+        if self.dirty:
+            return
+        self.dirty = True
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def save(self) -> None:
+        """写回文件，先写临时文件再替换"""
+        if not self.dirty:
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(self._array)
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+
+class SeenIndex:
+    """
+    基于SQLite的已见新闻索引
+    """
+
+    def __init__(self, path: Optional[str] = None, bloom: Optional[bool] = None):
+        """
+        参数:
+            path: SQLite文件路径，默认读取SEEN_INDEX_PATH
+            bloom: 是否使用布隆过滤器，默认读取SEEN_INDEX_BLOOM（默认开启）
+        """
+        self.path = path or os.environ.get("SEEN_INDEX_PATH", ".cache/seen.sqlite3")
+        if bloom is None:
+            bloom = os.environ.get("SEEN_INDEX_BLOOM", "1").lower() not in ("0", "false", "no")
+        self.use_bloom = bloom
+        self._bloom: Optional[BloomFilter] = None
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """懒加载数据库连接和布隆过滤器"""
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(_SCHEMA)
+            self._conn.commit()
+            if self.use_bloom:
+                bits = int(os.environ.get("SEEN_INDEX_BLOOM_BITS", str(1 << 23)))
+                self._bloom = BloomFilter(f"{self.path}.bloom", bits)
+                if not self._bloom.loaded:
+                    self._rebuild_bloom(self._conn)
+        return self._conn
+
+    def _rebuild_bloom(self, conn: sqlite3.Connection) -> None:
+        """按数据库中的URL重建布隆过滤器"""
+        self._bloom.clear()
+        for (url,) in conn.execute("SELECT DISTINCT url FROM sightings"):
+            self._bloom.add(url)
+        self._bloom.save()
+
+    def is_empty(self) -> bool:
+        """索引中是否还没有任何记录"""
+        with self._lock:
+            return self._connect().execute("SELECT 1 FROM sightings LIMIT 1").fetchone() is None
+
+    def record(self, urls: Iterable[str], day: str, selected: bool = False) -> None:
+        """
+        记录某天考虑过或选中的URL
+
+        参数:
+            urls: 新闻URL
+            day: 日期，YYYYMMDD
+            selected: 是否被选入当天的日报
+        """
+        rows = [(key, day, int(selected)) for key in dict.fromkeys(url_key(url) for url in urls if url) if key]
+        if not rows:
+            return
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT INTO sightings (url, day, selected) VALUES (?, ?, ?) "
+                "ON CONFLICT(url, day) DO UPDATE SET selected = MAX(selected, excluded.selected)",
+                rows,
+            )
+            conn.commit()
+            if self._bloom is not None:
+                for url, _, _ in rows:
+                    self._bloom.add(url)
+
+    def flush(self) -> None:
+        """把布隆过滤器的修改写回文件"""
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.save()
+
+    def seen(self, urls: Iterable[str], day: str, lookback_days: int, selected_only: bool = True) -> Set[str]:
+        """
+        查询在day之前lookback_days天内出现过的URL，不包括day当天，当天重新运行时不会过滤掉自己
+
+        参数:
+            urls: 待查询的URL
+            day: 当前日期，YYYYMMDD
+            lookback_days: 回溯天数
+            selected_only: 只统计被选入日报的记录，否则考虑过的URL也算
+
+        返回:
+            Set[str]: 出现过的URL，为传入时的原始写法
+        """
+        current = datetime.datetime.strptime(day, "%Y%m%d")
+        since = (current - datetime.timedelta(days=lookback_days)).strftime("%Y%m%d")
+        by_key: Dict[str, List[str]] = {}
+        for url in urls:
+            if url:
+                by_key.setdefault(url_key(url), []).append(url)
+        with self._lock:
+            conn = self._connect()
+            candidates = [key for key in by_key if self._bloom is None or key in self._bloom]
+            found: Set[str] = set()
+            condition = " AND selected = 1" if selected_only else ""
+            for i in range(0, len(candidates), _QUERY_CHUNK):
+                chunk = candidates[i:i + _QUERY_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT DISTINCT url FROM sightings WHERE url IN ({placeholders}) "
+                    f"AND day >= ? AND day < ?{condition}",
+                    (*chunk, since, day),
+                ).fetchall()
+                for (key,) in rows:
+                    found.update(by_key[key])
+            return found
+
+    def compact(self, keep_days: int, today: Optional[str] = None) -> int:
+        """
+        删除keep_days天之前的记录并回收空间
+
+        参数:
+            keep_days: 保留的天数
+            today: 当前日期，YYYYMMDD，默认为今天
+
+        返回:
+            int: 删除的记录数
+        """
+        current = datetime.datetime.strptime(today, "%Y%m%d") if today else datetime.datetime.now()
+        cutoff = (current - datetime.timedelta(days=keep_days)).strftime("%Y%m%d")
+        with self._lock:
+            conn = self._connect()
+            removed = conn.execute("DELETE FROM sightings WHERE day < ?", (cutoff,)).rowcount
+            conn.commit()
+            conn.execute("VACUUM")
+            if self._bloom is not None:
+                self._rebuild_bloom(conn)
+        logger.info(f"已见新闻索引删除{cutoff}之前的{removed}条记录")
+        return removed
+
+    def import_history(self, root: str = ".") -> int:
+        """
+        从历史运行目录中的{日期}/log/*.news_list.json（考虑过）和selected_news.json（选中）导入记录
+
+        参数:
+            root: 运行目录所在的根目录
+
+        返回:
+            int: 导入的URL数
+        """
+        total = 0
+        for log_dir in sorted(glob.glob(os.path.join(root, "[0-9]" * 8, "log"))):
+            day = os.path.basename(os.path.dirname(log_dir))
+            for path in glob.glob(os.path.join(log_dir, "*.news_list.json")) + [os.path.join(log_dir, "selected_news.json")]:
+                if not os.path.exists(path):
+                    continue
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        urls = [news["url"] for news in json.load(f) if isinstance(news, dict) and "url" in news]
+                except (OSError, ValueError) as e:
+                    logger.warning(f"读取{path}时出错: {e}")
+                    continue
+                self.record(urls, day, selected=path.endswith("selected_news.json"))
+                total += len(urls)
+        self.flush()
+        logger.info(f"从历史运行目录导入了{total}个URL")
+        return total
+
+    def stats(self) -> Dict[str, Any]:
+        """索引中的记录数、URL数和日期范围"""
+        with self._lock:
+            conn = self._connect()
+            rows, urls, first, last = conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT url), MIN(day), MAX(day) FROM sightings"
+            ).fetchone()
+            selected = conn.execute("SELECT COUNT(*) FROM sightings WHERE selected = 1").fetchone()[0]
+        return {"rows": rows, "urls": urls, "selected": selected, "first_day": first, "last_day": last}
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            if self._bloom is not None:
+                self._bloom.save()
+                self._bloom = None
+
+
+_index: Optional[SeenIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_seen_index() -> SeenIndex:
+    """获取进程内共享的已见新闻索引，首次调用时按环境变量创建"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SeenIndex()
+        return _index
+
+
+def configure_seen_index(index: SeenIndex) -> None:
+    """
+    替换进程内共享的已见新闻索引
+
+    参数:
+        index: 新的索引
+    """
+    global _index
+    with _index_lock:
+        if _index is not None and _index is not index:
+            _index.close()
+        _index = index
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """已见新闻索引的维护命令"""
+    parser = ArgumentParser(description="已见新闻索引维护")
+    parser.add_argument("--path", type=str, default=None, help="索引文件路径，默认读取SEEN_INDEX_PATH")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("stats", help="显示索引统计")
+    compact = commands.add_parser("compact", help="删除过期记录并回收空间")
+    compact.add_argument("--days", type=int, default=int(os.environ.get("SEEN_INDEX_RETENTION_DAYS", "365")),
+                         help="保留的天数，默认读取SEEN_INDEX_RETENTION_DAYS")
+    importer = commands.add_parser("import", help="从历史运行目录导入记录")
+    importer.add_argument("--root", type=str, default=".", help="运行目录所在的根目录")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    index = SeenIndex(path=args.path)
+    try:
+        if args.command == "compact":
+            index.compact(args.days)
+        elif args.command == "import":
+            index.import_history(args.root)
+        print(json.dumps(index.stats(), ensure_ascii=False, indent=2))
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
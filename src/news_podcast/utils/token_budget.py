@@ -0,0 +1,188 @@
+"""
+Token预算模块，在发送前估算提示词的Token数，并按调用点的预算截断或压缩提示词中的可变部分
+
+Token数优先用tiktoken计算；编码文件无法加载时（如离线环境）退回按字符估算。
+"""
+import logging
+import os
+import threading
+from typing import List
+
+from src.news_podcast.api.rate_limiter import estimate_tokens
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+# 调用点名称
+SITE_PICK_NEWS = "pick_news"                      # 从单个首页挑选新闻
+SITE_PICK_IMPORTANT = "pick_important_news"       # 从所有来源中精选新闻
+SITE_GENERATE_PODCAST = "generate_podcast"        # 单条新闻分析
+SITE_AGGREGATE = "aggregate"                      # 整合日报
+SITE_AGGREGATE_MAP = "aggregate_map"              # 分组浓缩新闻分析
+SITE_EXTRACT_TITLE = "extract_title"              # 提取公众号标题和摘要
+
+# 各调用点可变部分（首页内容、新闻列表、正文等）的默认Token预算，可用TOKEN_BUDGET_<调用点>覆盖
+DEFAULT_BUDGETS = {
+    SITE_PICK_NEWS: 12000,
+    SITE_PICK_IMPORTANT: 12000,
+    SITE_GENERATE_PODCAST: 8000,
+    SITE_AGGREGATE: 48000,
+    SITE_AGGREGATE_MAP: 16000,
+    SITE_EXTRACT_TITLE: 6000,
+}
+
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    """懒加载tiktoken编码，加载失败时返回None"""
+    global _encoding, _encoding_loaded
+    with _encoding_lock:
+        if not _encoding_loaded:
+            _encoding_loaded = True
+            name = os.environ.get("TOKEN_ENCODING", "cl100k_base")
+            try:
+                import tiktoken
+                _encoding = tiktoken.get_encoding(name)
+            except Exception as e:
+                logger.warning(f"无法加载tiktoken编码{name}，按字符估算Token数: {e}")
+        return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """
+    计算文本的Token数
+
+    参数:
+        text: 文本
+
+    返回:
+        int: Token数，tiktoken不可用时为估算值
+    """
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def budget_for(site: str) -> int:
+    """
+    获取调用点的Token预算
+
+    参数:
+        site: 调用点名称
+
+    返回:
+        int: 可变部分的Token预算
+    """
+    value = os.environ.get(f"TOKEN_BUDGET_{site.upper()}")
+    return int(value) if value else DEFAULT_BUDGETS[site]
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    将文本截断到max_tokens以内，尽量在换行处截断
+
+    参数:
+        text: 文本
+        max_tokens: Token上限
+
+    返回:
+        str: 截断后的文本
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+    encoding = _get_encoding()
+    if encoding is not None:
+        truncated = encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+    else:
+        # 按字符二分查找满足预算的最长前缀
+        low, high = 0, len(text)
+        while low < high:
+            mid = (low + high + 1) // 2
+            if estimate_tokens(text[:mid]) <= max_tokens:
+                low = mid
+            else:
+                high = mid - 1
+        truncated = text[:low]
+    cut = truncated.rfind("\n")
+    if cut > len(truncated) * 0.8:
+        truncated = truncated[:cut]
+    return truncated
+
+
+def fit_text(text: str, site: str) -> str:
+    """
+    按调用点预算截断文本，如文章正文、首页内容
+
+    参数:
+        text: 提示词中的可变文本
+        site: 调用点名称
+
+    返回:
+        str: 不超过预算的文本
+    """
+    budget = budget_for(site)
+    tokens = count_tokens(text)
+    if tokens <= budget:
+        return text
+    truncated = truncate_to_tokens(text, budget)
+    logger.info(f"[{site}] 内容超出Token预算，截断: {tokens} -> {count_tokens(truncated)} (预算{budget})")
+    return truncated
+
+
+def fit_items(items: List[str], site: str, separator_tokens: int = 1) -> List[str]:
+    """
+    按顺序保留不超过调用点预算的列表项，如候选新闻列表，靠前的条目优先保留
+
+    参数:
+        items: 已格式化的列表项
+        site: 调用点名称
+        separator_tokens: 每个列表项之间分隔符的Token数
+
+    返回:
+        List[str]: 保留的列表项，是items的前缀
+    """
+    budget = budget_for(site)
+    used = 0
+    for idx, item in enumerate(items):
+        used += count_tokens(item) + separator_tokens
+        if used > budget:
+            logger.info(f"[{site}] 列表超出Token预算，保留前{idx}/{len(items)}项 (预算{budget})")
+            return items[:idx]
+    return items
+
+
+def fit_evenly(texts: List[str], site: str) -> List[str]:
+    """
+    在多段文本之间平均分配调用点预算，只截断超出平均份额的较长文本，如整合日报时的各条分析
+
+    参数:
+        texts: 多段文本
+        site: 调用点名称
+
+    返回:
+        List[str]: 与texts一一对应、总量不超过预算的文本
+    """
+    budget = budget_for(site)
+    sizes = [count_tokens(text) for text in texts]
+    if sum(sizes) <= budget:
+        return texts
+
+    # 从短到长依次分配：短文本完整保留，剩余预算由较长的文本平分
+    limits = [0] * len(texts)
+    remaining = budget
+    order = sorted(range(len(texts)), key=lambda i: sizes[i])
+    for rank, i in enumerate(order):
+        share = remaining // (len(texts) - rank)
+        limits[i] = min(sizes[i], share)
+        remaining -= limits[i]
+
+    logger.info(f"[{site}] 内容超出Token预算，按每段不超过{max(limits)}截断: {sum(sizes)} -> {budget}")
+    return [text if sizes[i] <= limits[i] else truncate_to_tokens(text, limits[i])
+            for i, text in enumerate(texts)]
+
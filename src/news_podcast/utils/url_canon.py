@@ -0,0 +1,265 @@
+"""
+URL规范化模块，把同一篇文章的不同URL写法统一为一个形式
+
+首页链接、模型输出和历史记录中的URL经常只在细节上不同：跟踪参数、www.前缀、末尾斜杠、AMP版本、
+被尖括号包裹的路径或句末标点。canonical_url给出可以直接爬取的规范URL，只去掉明确无关的部分；
+url_key在此基础上进一步忽略协议、www./m.前缀、末尾斜杠、/amp后缀和常见的来源统计参数，
+作为去重、任务映射和缓存的统一键。各站点的特殊规则在sources.yaml的url_rules中按域名配置。
+"""
+import logging
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+# 广告和营销平台的跟踪参数，不会有实际含义，规范URL中直接去掉
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "gbraid", "wbraid", "msclkid", "yclid", "twclid", "igshid",
+    "mc_cid", "mc_eid", "_hsenc", "_hsmi", "at_medium", "at_campaign", "guccounter",
+    "pk_campaign", "pk_kwd", "pk_source", "pk_medium",
+}
+# 以这些前缀开头的参数都视为跟踪参数
+TRACKING_PREFIXES = ("utm_",)
+# 常见的来源、分享和栏目统计参数以及AMP参数，在个别站点上可能有实际含义：规范URL中保留，只在比较键中忽略；
+# 需要在规范URL中去掉时在url_rules中按站点配置drop_query
+KEY_IGNORED_PARAMS = {
+    "ref", "ref_src", "referrer", "cmpid", "cmp", "smid", "smtyp", "ocid", "taid",
+    "s_cid", "ito", "traffic_source", "share", "sh", "amp", "outputtype",
+}
+
+# 模型输出的URL末尾可能带上的标点或引号
+_TRAILING_PUNCTUATION = ".,;:!?)]}>'\"，。；：！？）】」》"
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+# 缺少协议的URL，如www.bbc.com/news/...
+_BARE_HOST = re.compile(r"^[\w-]+(\.[\w-]+)+(/|$)")
+
+# 末尾斜杠的处理方式
+SLASH_KEEP = "keep"
+SLASH_STRIP = "strip"
+SLASH_ADD = "add"
+
+
+@dataclass
+class UrlRule:
+    """
+    单个站点的URL规范化规则
+
+    属性:
+        keep_query: 只保留这些查询参数，None表示保留除跟踪参数外的所有参数，空列表表示去掉全部参数
+        drop_query: 额外去掉的查询参数
+        trailing_slash: 末尾斜杠的处理方式，keep、strip或add
+        strip_index: 是否去掉末尾的index.html，同一文章的/path/和/path/index.html视为同一URL
+    """
+    keep_query: Optional[List[str]] = None
+    drop_query: List[str] = field(default_factory=list)
+    trailing_slash: str = SLASH_KEEP
+    strip_index: bool = False
+
+
+_DEFAULT_RULE = UrlRule()
+_rules: Dict[str, UrlRule] = {}
+_rules_lock = threading.Lock()
+
+
+def build_url_rules(config: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, UrlRule]:
+    """
+    根据配置文件中的url_rules构建各站点的规则
+
+    参数:
+        config: 域名到规则字段的映射，域名不带www.前缀，同时作用于其子域名
+
+    返回:
+        Dict[str, UrlRule]: 域名到规则的映射
+    """
+    rules = {}
+    for host, fields in (config or {}).items():
+        rule = UrlRule(**(fields or {}))
+        if rule.trailing_slash not in (SLASH_KEEP, SLASH_STRIP, SLASH_ADD):
+            raise ValueError(f"url_rules中{host}的trailing_slash无效: {rule.trailing_slash}")
+        rules[_strip_host_prefix(host.lower())] = rule
+    return rules
+
+
+def configure_url_rules(rules: Dict[str, UrlRule]) -> None:
+    """
+    替换进程内共享的站点规则
+
+    参数:
+        rules: 域名到规则的映射
+    """
+    global _rules
+    with _rules_lock:
+        _rules = dict(rules)
+
+
+def get_url_rules() -> Dict[str, UrlRule]:
+    """获取进程内共享的站点规则"""
+    with _rules_lock:
+        return _rules
+
+
+def _strip_host_prefix(host: str) -> str:
+    """去掉www.和m.前缀"""
+    for prefix in ("www.", "m."):
+        if host.startswith(prefix):
+            return host[len(prefix):]
+    return host
+
+
+def bare_host(url: str) -> str:
+    """
+    提取URL的域名，用于按站点分组（并发限制、熔断、站内链接判断）
+
+    参数:
+        url: 完整URL
+
+    返回:
+        str: 小写、去掉www.和m.前缀的域名，不含端口和用户信息；无法解析时返回空字符串
+    """
+    try:
+        host = urlsplit(url).hostname or ""
+    except ValueError:
+        return ""
+    return _strip_host_prefix(host)
+
+
+def _rule_for(host: str, rules: Dict[str, UrlRule]) -> UrlRule:
+    """按域名及其上级域名查找规则"""
+    host = _strip_host_prefix(host)
+    while host:
+        if host in rules:
+            return rules[host]
+        _, _, host = host.partition(".")
+    return _DEFAULT_RULE
+
+
+def fix_wrapped_url(url: str) -> str:
+    """
+    修正crawl4ai输出中被尖括号包裹的路径，如 https://time.com/</7200909/slug/> -> https://time.com/7200909/slug/
+
+    参数:
+        url: 原始URL
+
+    返回:
+        str: 修正后的URL
+    """
+    url = url.strip()
+    if url.startswith("<") and url.endswith(">"):
+        url = url[1:-1]
+    url = re.sub(r'/</', '/', url)
+    if url.endswith(">"):
+        url = url[:-1]
+    return url
+
+
+def _clean(url: str) -> str:
+    """去掉模型或crawl4ai引入的多余字符：尖括号包裹的路径、空白、末尾的标点"""
+    url = re.sub(r"\s+", "", fix_wrapped_url(url))
+    while url and url[-1] in _TRAILING_PUNCTUATION:
+        # 保留URL自身成对的括号，如维基百科的/wiki/Mercury_(planet)
+        if url[-1] == ")" and url.count("(") >= url.count(")"):
+            break
+        url = url[:-1]
+    return url
+
+
+def _keep_param(name: str, value: str, rule: UrlRule) -> bool:
+    """判断查询参数是否保留"""
+    lowered = name.lower()
+    if rule.keep_query is not None:
+        return name in rule.keep_query
+    if lowered in TRACKING_PARAMS or name in rule.drop_query:
+        return False
+    # 只去掉明确表示AMP版本的取值，如?amp=1、?outputType=amp
+    if (lowered == "amp" and value.lower() in ("", "1", "true")) or \
+            (lowered == "outputtype" and value.lower() == "amp"):
+        return False
+    return not lowered.startswith(TRACKING_PREFIXES)
+
+
+def _strip_amp(path: str) -> str:
+    """去掉路径中明确的AMP标记：其后还有路径的/amp/前缀、文件名上的.amp和.amp.html后缀"""
+    if re.match(r"/amp/[^/]", path):
+        path = path[len("/amp"):]
+    return re.sub(r"(?<=[^/])\.amp(\.html?)?$", r"\1", path)
+
+
+def canonical_url(url: str, base: Optional[str] = None,
+                  rules: Optional[Dict[str, UrlRule]] = None) -> str:
+    """
+    规范化URL，结果仍然可以直接爬取
+
+    小写协议和域名，去掉默认端口、片段、跟踪参数和明确的AMP标记，剩余查询参数按名称排序，再应用站点规则。
+
+    参数:
+        url: 原始URL，可以是相对路径或缺少协议
+        base: 补全相对路径使用的页面URL
+        rules: 站点规则，默认使用configure_url_rules设置的规则
+
+    返回:
+        str: 规范化后的URL，无法解析的输入原样返回去掉空白后的结果
+    """
+    url = _clean(url)
+    if not url:
+        return url
+    if base:
+        url = urljoin(base, url)
+    elif _BARE_HOST.match(url):
+        url = f"https://{url}"
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    if scheme not in ("http", "https"):
+        return url
+
+    host = (parts.hostname or "").lower()
+    if host.startswith("amp."):
+        host = host[len("amp."):]
+    netloc = host if port is None or port == _DEFAULT_PORTS.get(scheme) else f"{host}:{port}"
+    rule = _rule_for(host, get_url_rules() if rules is None else rules)
+
+    path = _strip_amp(re.sub(r"/{2,}", "/", parts.path or "/"))
+    if rule.strip_index:
+        path = re.sub(r"/index\.html?$", "/", path)
+    if path != "/":
+        if rule.trailing_slash == SLASH_STRIP:
+            path = path.rstrip("/")
+        elif rule.trailing_slash == SLASH_ADD and not path.endswith("/") and "." not in path.rsplit("/", 1)[-1]:
+            path += "/"
+
+    params = sorted((name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+                    if _keep_param(name, value, rule))
+    return urlunsplit((scheme, netloc, path, urlencode(params), ""))
+
+
+def url_key(url: str, base: Optional[str] = None,
+            rules: Optional[Dict[str, UrlRule]] = None) -> str:
+    """
+    URL的比较键，同一文章的不同写法得到相同的键
+
+    在canonical_url的基础上统一为https协议，去掉www.和m.前缀、末尾斜杠、文章路径后的/amp
+    以及KEY_IGNORED_PARAMS中的参数。
+
+    参数:
+        url: 原始URL
+        base: 补全相对路径使用的页面URL
+        rules: 站点规则，默认使用configure_url_rules设置的规则
+
+    返回:
+        str: 比较键
+    """
+    canonical = canonical_url(url, base=base, rules=rules)
+    parts = urlsplit(canonical)
+    if parts.scheme not in ("http", "https"):
+        return canonical
+    path = re.sub(r"(?<=[^/])/amp/?$", "", parts.path).rstrip("/") or "/"
+    query = urlencode([(name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+                       if name.lower() not in KEY_IGNORED_PARAMS])
+    return urlunsplit(("https", _strip_host_prefix(parts.netloc), path, query, ""))
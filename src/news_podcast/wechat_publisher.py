@@ -12,6 +12,7 @@ import markdown
 import html
 
 from src.news_podcast.api.llm_client import chat_with_deepseek
+from src.news_podcast.utils.token_budget import SITE_EXTRACT_TITLE, fit_text
 from src.news_podcast.api.wechat_client import get_access_token, create_news_draft, publish_draft, get_publish_status
 
 # 设置日志
@@ -56,6 +57,7 @@ def extract_title_and_summary(content: str) -> Tuple[str, str]:
     返回:
         Tuple[str, str]: (标题, 摘要)
     """
+    content = fit_text(content, SITE_EXTRACT_TITLE)
     prompt = f"""
 请从以下文章内容中提取一个吸引人的标题和简短的摘要（200字以内）。
 标题应简洁有力，能吸引读者点击阅读。
@@ -74,7 +76,7 @@ def extract_title_and_summary(content: str) -> Tuple[str, str]:
 """
 
     try:
-        response = chat_with_deepseek(prompt, stream=False)
+        response = chat_with_deepseek(prompt, stream=False, call_site=SITE_EXTRACT_TITLE)
         
         # 提取JSON部分
         json_match = re.search(r'({[\s\S]*})', response)
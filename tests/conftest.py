@@ -14,4 +14,47 @@ pytest_plugins = ["pytest_asyncio"]
 # 已在pyproject.toml中设置asyncio_mode，此处不需要重复设置
 # def pytest_configure(config):
 #     """配置pytest-asyncio默认模式"""
-#     config.addinivalue_line("asyncio_mode", "auto") 
\ No newline at end of file
+#     config.addinivalue_line("asyncio_mode", "auto") 
+
+@pytest.fixture(autouse=True)
+def isolated_llm_cache(tmp_path):
+    """每个测试使用独立的LLM响应缓存，不读写项目目录中的缓存"""
+    from src.news_podcast.api import llm_cache
+
+    cache = llm_cache.LLMCache(path=str(tmp_path / "llm.sqlite3"))
+    llm_cache.configure_cache(cache)
+    yield cache
+    cache.close()
+
+
+@pytest.fixture(autouse=True)
+def unlimited_rate_limiter():
+    """每个测试使用不限流的限流器，不受其他测试的429降速影响"""
+    from src.news_podcast.api import rate_limiter
+
+    rate_limiter.configure_rate_limiter(rate_limiter.RateLimiter(rpm=0, tpm=0))
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    """每个测试使用空的指标注册表"""
+    from src.news_podcast.utils import metrics
+
+    metrics.configure_metrics(metrics.MetricsRegistry())
+
+
+@pytest.fixture(autouse=True)
+def isolated_seen_index(tmp_path):
+    """每个测试使用独立的已见新闻索引"""
+    from src.news_podcast.utils import seen_index
+
+    index = seen_index.SeenIndex(path=str(tmp_path / "seen.sqlite3"))
+    seen_index.configure_seen_index(index)
+    yield index
+    index.close()
+
+
+@pytest.fixture(autouse=True)
+def run_in_tmp_path(tmp_path, monkeypatch):
+    """在临时目录中运行，运行目录（{日期}/log/checkpoints等）不会写入项目目录"""
+    monkeypatch.chdir(tmp_path)
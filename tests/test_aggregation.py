@@ -0,0 +1,71 @@
+"""
+日报分组浓缩整合测试
+"""
+import asyncio
+import time
+
+import pytest
+
+from src.news_podcast.utils.aggregation import (
+    MODE_MAP_REDUCE, MODE_SINGLE, aggregation_mode, group_by_theme, map_reduce,
+)
+
+
+def test_aggregation_mode(monkeypatch) -> None:
+    """测试默认新闻较少时一次性整合，超过阈值时分组浓缩"""
+    monkeypatch.setenv("AGGREGATE_MAP_THRESHOLD", "10")
+    assert aggregation_mode(10) == MODE_SINGLE
+    assert aggregation_mode(11) == MODE_MAP_REDUCE
+    assert aggregation_mode(50, MODE_SINGLE) == MODE_SINGLE
+    assert aggregation_mode(3, "unknown") == MODE_SINGLE
+
+
+def test_group_by_theme_clusters_similar_texts() -> None:
+    """测试词汇相近的文本分到同一组，组的大小平均"""
+    texts = [
+        "Nvidia unveils new GPU chips for datacenter",
+        "Climate summit agrees emissions targets",
+        "AMD answers Nvidia with datacenter GPU chips",
+        "Emissions targets criticised after climate summit",
+        "Intel delays datacenter chips",
+    ]
+    groups = group_by_theme(texts, 3)
+
+    assert sorted(i for group in groups for i in group) == [0, 1, 2, 3, 4]
+    assert [0, 2, 4] in groups
+    assert [1, 3] in groups
+
+
+@pytest.mark.asyncio
+async def test_map_reduce_condenses_in_parallel_levels() -> None:
+    """测试每层并行浓缩，直到条数不超过每组上限"""
+    calls = []
+
+    async def condense(sections, level):
+        calls.append((level, len(sections)))
+        await asyncio.sleep(0.2)
+        return f"L{level}[{'|'.join(sections)}]"
+
+    st = time.time()
+    result = await map_reduce([f"s{i}" for i in range(20)], condense, group_size=3, max_depth=3)
+
+    # 20 -> 7 -> 3
+    assert [level for level, _ in calls].count(1) == 7
+    assert [level for level, _ in calls].count(2) == 3
+    assert len(result) == 3
+    assert all(section.startswith("L2[") for section in result)
+    assert time.time() - st < 1.0
+
+
+@pytest.mark.asyncio
+async def test_map_reduce_keeps_raw_sections_when_group_fails() -> None:
+    """测试某组浓缩失败时保留该组的原始内容，深度用完后停止"""
+    async def condense(sections, level):
+        if "s0" in sections:
+            raise RuntimeError("boom")
+        return "+".join(sections)
+
+    result = await map_reduce([f"s{i}" for i in range(4)], condense, group_size=2, max_depth=1)
+
+    assert "s0" in result
+    assert sum(section.count("s") for section in result) == 4
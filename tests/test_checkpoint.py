@@ -0,0 +1,110 @@
+"""
+断点续跑检查点测试
+"""
+import os
+
+import pytest
+
+from src.news_podcast import podcast_creator
+from src.news_podcast.models.news_task import NewsTask
+from src.news_podcast.utils.checkpoint import STAGE_ANALYSIS, STAGE_HOMEPAGE, CheckpointStore, input_hash
+
+
+def test_get_put_and_invalidation(tmp_path) -> None:
+    """测试输入哈希一致时命中，输入变化后失效，写入后不留临时文件"""
+    store = CheckpointStore(str(tmp_path), resume=True)
+    digest = input_hash("正文", "https://a.com/1")
+    assert store.get(STAGE_ANALYSIS, "https://a.com/1", digest) is None
+
+    store.put(STAGE_ANALYSIS, "https://a.com/1", digest, "分析")
+    assert store.get(STAGE_ANALYSIS, "https://a.com/1", digest) == "分析"
+    assert store.get(STAGE_ANALYSIS, "https://a.com/1", input_hash("新正文", "https://a.com/1")) is None
+    assert store.stats() == {"hits": 1, "misses": 1, "invalidated": 1, "writes": 1}
+    assert not [name for name in os.listdir(tmp_path / STAGE_ANALYSIS) if name.endswith(".tmp")]
+
+    assert CheckpointStore(str(tmp_path), resume=False).get(STAGE_ANALYSIS, "https://a.com/1", digest) is None
+
+
+@pytest.mark.asyncio
+async def test_scan_news_resumes_from_checkpoint(monkeypatch) -> None:
+    """测试重新扫描来源时不再爬取首页和调用模型"""
+    calls = {"search": 0, "pick": 0}
+
+    async def fake_async_search(url, **kwargs):
+        calls["search"] += 1
+        return "[Trump unveils sweeping new tariffs on goods](https://a.com/2025/04/09/tariffs-on-goods)"
+
+    def fake_pick(content, news_url, sample_url, sample_url_output, candidates):
+        calls["pick"] += 1
+        return [{"title": candidates[0]["title"], "url": candidates[0]["url"]}]
+
+    monkeypatch.setattr(podcast_creator, "async_search", fake_async_search)
+    monkeypatch.setattr(podcast_creator, "pick_news_from_source", fake_pick)
+    os.makedirs("20250409/log")
+    task = NewsTask(url="https://a.com/", output_file="a", sample_url="", sample_url_output="")
+
+    assert await podcast_creator.scan_news(task, "20250409")
+    os.remove("20250409/log/a.news_list.json")
+    assert await podcast_creator.scan_news(task, "20250409")
+
+    assert calls == {"search": 1, "pick": 1}
+    assert os.path.exists("20250409/log/a.news_list.json")
+
+
+@pytest.mark.asyncio
+async def test_scan_news_does_not_checkpoint_failed_crawl(monkeypatch) -> None:
+    """测试首页爬取失败时不保存检查点，重新运行时再次爬取"""
+    results = iter(["爬取失败: 已达到最大重试次数",
+                    "[Trump unveils sweeping new tariffs on goods](https://a.com/2025/04/09/tariffs-on-goods)"])
+    calls = {"search": 0}
+
+    async def fake_async_search(url, **kwargs):
+        calls["search"] += 1
+        return next(results)
+
+    def fake_pick(content, news_url, sample_url, sample_url_output, candidates):
+        return [{"title": candidates[0]["title"], "url": candidates[0]["url"]}]
+
+    monkeypatch.setattr(podcast_creator, "async_search", fake_async_search)
+    monkeypatch.setattr(podcast_creator, "pick_news_from_source", fake_pick)
+    os.makedirs("20250409/log")
+    task = NewsTask(url="https://a.com/", output_file="a", sample_url="", sample_url_output="")
+
+    assert not await podcast_creator.scan_news(task, "20250409")
+    assert not os.path.exists(os.path.join("20250409", "log", "checkpoints", STAGE_HOMEPAGE))
+    assert await podcast_creator.scan_news(task, "20250409")
+    assert calls["search"] == 2
+
+
+@pytest.mark.asyncio
+async def test_analyze_news_stream_redoes_only_missing(monkeypatch) -> None:
+    """测试中途失败后重新运行，只爬取和分析上次没有完成的新闻"""
+    fetched, analyzed = [], []
+    failing = {"https://b.com/2"}
+
+    async def fake_async_search(url, **kwargs):
+        fetched.append(url)
+        return f"正文 {url}"
+
+    async def fake_generate_podcast(content, url):
+        analyzed.append(url)
+        if url in failing:
+            raise RuntimeError("LLM调用失败")
+        return f"分析 {url}"
+
+    monkeypatch.setattr(podcast_creator, "async_search", fake_async_search)
+    monkeypatch.setattr(podcast_creator, "async_generate_podcast", fake_generate_podcast)
+    selected = [{"title": "新闻1", "url": "https://a.com/1"}, {"title": "新闻2", "url": "https://b.com/2"}]
+
+    first = await podcast_creator.analyze_news_stream(selected, {}, "20250409")
+    assert first[1] is None
+
+    failing.clear()
+    fetched.clear()
+    analyzed.clear()
+    second = await podcast_creator.analyze_news_stream(selected, {}, "20250409")
+
+    assert second == [(0, "新闻1", "分析 https://a.com/1", "https://a.com/1"),
+                      (1, "新闻2", "分析 https://b.com/2", "https://b.com/2")]
+    assert fetched == []
+    assert analyzed == ["https://b.com/2"]
@@ -0,0 +1,73 @@
+"""
+正文提取模块测试
+"""
+from src.news_podcast.utils.content_extractor import extract_main_content, strip_lines
+
+NAV = "\n".join(f"  * [{name}](https://www.example.com/{name.lower()}/)"
+                for name in ["World", "Business", "Markets", "Technology", "Sports", "Science"])
+FOOTER = "\n".join([
+    "  * [Terms of Use](https://www.example.com/terms/)",
+    "  * [Privacy, opens new tab](https://www.example.com/privacy/)",
+    "  * [Careers](https://www.example.com/careers/)",
+    "All quotes delayed a minimum of 15 minutes.",
+])
+
+
+def test_extract_article_body() -> None:
+    """测试文章页去除首尾导航和页脚，只保留正文"""
+    body = "\n\n".join([
+        "# Amazon launches first Kuiper internet satellites",
+        "Amazon launched the first batch of its Kuiper satellites on Monday, taking on Starlink in a race "
+        "to provide broadband from low Earth orbit to consumers and governments around the world.",
+        "The launch marks a milestone for a project that has faced years of delays, and analysts said the "
+        "company still needs to deploy more than three thousand satellites to meet its license terms.",
+        "[Read more](https://www.example.com/related/)",
+        "Executives said commercial service could begin later this year if the remaining launches stay on schedule.",
+    ])
+    markdown = "\n".join([NAV, "", body, "", FOOTER])
+
+    content = extract_main_content(markdown, kind="article")
+
+    assert content.startswith("# Amazon launches first Kuiper internet satellites")
+    assert "Executives said commercial service" in content
+    assert "[World]" not in content
+    assert "Terms of Use" not in content
+
+
+def test_extract_article_drops_lines_shared_with_homepage() -> None:
+    """测试文章页中与首页重复的模板行会被剔除"""
+    banner = "Sign up for our daily briefing newsletter to get the top stories every morning in your inbox."
+    paragraph = ("Regulators in Brussels opened a formal investigation into the chipmaker's pricing practices, "
+                 "citing complaints from several European device makers about bundled discounts.")
+    markdown = "\n".join([paragraph, banner, paragraph.replace("Brussels", "Paris")])
+    homepage = "\n".join([NAV, banner])
+
+    content = extract_main_content(markdown, kind="article", reference=homepage)
+
+    assert banner not in content
+    assert "Brussels" in content and "Paris" in content
+
+
+def test_extract_homepage_headlines() -> None:
+    """测试首页保留新闻标题链接，去除菜单和页脚"""
+    headlines = "\n".join([
+        "[Inside the US battle with China over an island paradise deep in the Pacific]"
+        "(https://www.example.com/world/inside-us-battle-2025-04-30/)",
+        "Once the site of ferocious World War Two battles, Palau is again at the epicenter of a tussle.",
+        "[Amazon launches first Kuiper internet satellites, taking on Starlink]"
+        "(https://www.example.com/business/amazon-kuiper-2025-04-28/)",
+        "[Bosnian centre trains dogs for Ukrainian demining efforts]"
+        "(https://www.example.com/world/bosnian-dogs-2025-04-29/)",
+    ])
+    markdown = "\n".join([NAV, "", headlines, "", FOOTER])
+
+    content = extract_main_content(markdown, kind="homepage")
+
+    assert content == headlines
+
+
+def test_strip_lines_override() -> None:
+    """测试固定行数裁剪，包括尾部行数为0的情况"""
+    content = "a\nb\nc\nd"
+    assert strip_lines(content, 1, 1) == "b\nc"
+    assert strip_lines(content, 1, 0) == "b\nc\nd"
@@ -0,0 +1,73 @@
+"""
+爬取配置模块测试
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from src.news_podcast.crawlers.crawl_profiles import (
+    BUILTIN_PROFILES,
+    SHARED_DATA_KEY,
+    block_resources,
+    build_profiles,
+)
+
+
+def test_profile_blocks_resource_types_and_domains() -> None:
+    """测试按资源类型和域名（含子域名）拦截"""
+    profile = BUILTIN_PROFILES["article"]
+    assert profile.blocks("image", "https://www.cnn.com/logo.png")
+    assert profile.blocks("script", "https://securepubads.g.doubleclick.net/tag/js/gpt.js")
+    assert not profile.blocks("script", "https://www.cnn.com/app.js")
+    assert not profile.blocks("document", "https://www.cnn.com/2025/04/08/index.html")
+    assert not BUILTIN_PROFILES["full"].blocks("image", "https://www.cnn.com/logo.png")
+
+
+def test_build_profiles_merges_overrides() -> None:
+    """测试配置文件中的自定义配置与内置配置合并"""
+    profiles = build_profiles({
+        "article": {"page_timeout": 20000},
+        "slow_site": {"wait_until": "load", "page_timeout": 90000},
+    })
+    assert profiles["article"].page_timeout == 20000
+    assert profiles["article"].blocked_resource_types == ["image", "media", "font"]
+    assert profiles["slow_site"].wait_until == "load"
+    assert profiles["slow_site"].blocked_resource_types == []
+
+    config = profiles["article"].run_config()
+    assert config.page_timeout == 20000
+    assert config.shared_data[SHARED_DATA_KEY] is profiles["article"]
+
+
+@pytest.mark.asyncio
+async def test_block_resources_hook_aborts_blocked_requests() -> None:
+    """测试页面钩子按当前配置中止或放行请求"""
+    routes = {}
+
+    class FakePage:
+        async def route(self, pattern, handler):
+            routes[pattern] = handler
+
+    class FakeRoute:
+        def __init__(self, resource_type, url):
+            self.request = SimpleNamespace(resource_type=resource_type, url=url)
+            self.result = None
+
+        async def abort(self):
+            self.result = "abort"
+
+        async def continue_(self):
+            self.result = "continue"
+
+    config = BUILTIN_PROFILES["homepage"].run_config()
+    page = FakePage()
+    assert await block_resources(page, context=None, config=config) is page
+
+    image, html = FakeRoute("image", "https://bbc.com/a.jpg"), FakeRoute("document", "https://bbc.com/")
+    await routes["**/*"](image)
+    await routes["**/*"](html)
+    assert (image.result, html.result) == ("abort", "continue")
+
+    routes.clear()
+    await block_resources(FakePage(), config=BUILTIN_PROFILES["full"].run_config())
+    assert routes == {}
@@ -9,6 +9,8 @@ from typing import Optional
 import sys
 sys.path.insert(0, os.path.abspath('.'))
 
+from types import SimpleNamespace
+
 # 设置为自动异步模式
 pytestmark = pytest.mark.asyncio
 
@@ -60,4 +62,131 @@ async def test_url_crawl_with_params(url: str = "https://www.bbc.com/news", outp
         f.write(content)
     
     print(f"测试完成，结果已保存到{output_file}")
-    print(f"内容长度: {len(content)} 字符") 
\ No newline at end of file
+    print(f"内容长度: {len(content)} 字符") 
+
+class _FakeCrawler:
+    """模拟AsyncWebCrawler，记录启动和关闭次数"""
+    started = 0
+    closed = 0
+
+    def __init__(self, config=None):
+        self.config = config
+        self.crawler_strategy = SimpleNamespace(set_hook=lambda hook_type, hook: None)
+
+    async def start(self):
+        _FakeCrawler.started += 1
+
+    async def close(self):
+        _FakeCrawler.closed += 1
+
+    async def arun(self, url, config=None):
+        return url
+
+
+@pytest.mark.asyncio
+async def test_crawler_session_recycles_browser(monkeypatch):
+    """
+    测试爬虫会话复用浏览器，并在服务指定页面数后重启浏览器
+    """
+    from src.news_podcast.crawlers import web_crawler
+
+    monkeypatch.setattr(web_crawler, "AsyncWebCrawler", _FakeCrawler)
+    _FakeCrawler.started = 0
+    _FakeCrawler.closed = 0
+
+    async with web_crawler.CrawlerSession(max_pages_per_browser=2) as session:
+        results = [await session.arun(f"https://example.com/{i}", None) for i in range(5)]
+
+    assert results == [f"https://example.com/{i}" for i in range(5)]
+    # 5个页面，每个浏览器最多2个页面，共启动3次浏览器，结束时全部关闭
+    assert _FakeCrawler.started == 3
+    assert _FakeCrawler.closed == 3
+
+
+@pytest.mark.asyncio
+async def test_host_limiter_caps_per_host():
+    """
+    测试单个域名的并发数不超过限制，www.前缀视为同一域名
+    """
+    import asyncio
+    from src.news_podcast.crawlers import web_crawler
+    from src.news_podcast.utils.url_canon import bare_host
+
+    limiter = web_crawler.HostLimiter(max_concurrency=4, per_host_limit=2)
+    active = {}
+    peak = {}
+
+    async def fetch(url):
+        async with limiter.slot(url):
+            host = bare_host(url)
+            active[host] = active.get(host, 0) + 1
+            peak[host] = max(peak.get(host, 0), active[host])
+            await asyncio.sleep(0.01)
+            active[host] -= 1
+
+    urls = [f"https://{'www.reuters.com' if i % 2 else 'bbc.com'}/{i}" for i in range(8)]
+    await asyncio.gather(*(fetch(url) for url in urls))
+
+    assert peak == {"reuters.com": 2, "bbc.com": 2}
+
+
+@pytest.mark.asyncio
+async def test_async_search_http_tier_escalates_to_browser(monkeypatch):
+    """
+    测试HTTP快速爬取：正文足够长时直接返回，内容过短时回退到浏览器，并记录爬取层级
+    """
+    import httpx
+    from src.news_podcast.crawlers import web_crawler
+
+    class FakeBrowser(_FakeCrawler):
+        async def arun(self, url, config=None):
+            return SimpleNamespace(markdown="rendered by browser " * 10, response_headers={})
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/long":
+            body = "<html><body><article>" + "<p>Server rendered paragraph.</p>" * 100 + "</article></body></html>"
+        else:
+            body = "<html><body><div id=\"root\"></div></body></html>"
+        return httpx.Response(200, text=body, headers={"content-type": "text/html"})
+
+    monkeypatch.setattr(web_crawler, "AsyncWebCrawler", FakeBrowser)
+
+    async with web_crawler.CrawlerSession() as session:
+        session._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        long_content = await web_crawler.async_search("https://bbc.com/long", session=session, tier="http")
+        short_content = await web_crawler.async_search("https://bbc.com/short", session=session, tier="http")
+        stats = session.tier_stats()
+
+    assert "Server rendered paragraph." in long_content
+    assert short_content.startswith("rendered by browser")
+    assert stats["urls"]["https://bbc.com/long"] == {"tier": "http", "reason": "ok"}
+    assert stats["urls"]["https://bbc.com/short"] == {"tier": "browser", "reason": "js_only"}
+    assert stats["counts"] == {"http": 1, "browser": 1}
+
+
+@pytest.mark.asyncio
+async def test_async_search_fails_fast_after_circuit_opens(monkeypatch):
+    """
+    测试站点连续超时后熔断，后续URL不再发起爬取
+    """
+    from src.news_podcast.crawlers import web_crawler
+    from src.news_podcast.utils.retry import CircuitBreaker, RetryPolicy
+
+    calls = []
+
+    class TimeoutBrowser(_FakeCrawler):
+        async def arun(self, url, config=None):
+            calls.append(url)
+            raise Exception("Page.goto: Timeout 60000ms exceeded")
+
+    monkeypatch.setattr(web_crawler, "AsyncWebCrawler", TimeoutBrowser)
+
+    policy = RetryPolicy(max_attempts=2, base_delay=0.0)
+    async with web_crawler.CrawlerSession(retry_policy=policy, breaker=CircuitBreaker(2)) as session:
+        first = await web_crawler.async_search("https://cnn.com/a", session=session)
+        second = await web_crawler.async_search("https://cnn.com/b", session=session)
+
+    assert first.startswith("爬取失败")
+    assert second == "爬取失败: cnn.com已熔断"
+    # 第一个URL尝试2次后熔断，再尝试1次archive；第二个URL只尝试archive
+    assert [url for url in calls if "archive.ph" not in url] == ["https://cnn.com/a"] * 2
@@ -0,0 +1,95 @@
+"""
+跨来源近似重复新闻检测测试
+"""
+from unittest.mock import patch
+
+from src.news_podcast.utils.dedup import cluster_titles, collapse_near_duplicates
+from src.news_podcast.utils.news_processor import pick_important_news
+
+
+NEWS = [
+    {"title": "Trump announces new tariffs on Chinese goods", "url": "https://bbc.com/news/tariffs", "source": "bbc"},
+    {"title": "OpenAI releases GPT-5", "url": "https://reuters.com/tech/gpt5", "source": "reuters"},
+    {"title": "Trump announces sweeping tariffs on Chinese goods", "url": "https://cnn.com/tariffs", "source": "cnn"},
+    {"title": "Google releases Gemini 3", "url": "https://reuters.com/tech/gemini", "source": "reuters"},
+    {"title": "Labour wins UK general election in landslide", "url": "https://cnn.com/uk-election", "source": "cnn"},
+    {"title": "UK election: Labour wins landslide", "url": "https://bbc.com/news/uk-election", "source": "bbc"},
+]
+
+# 模板相同、主体不同的标题，不是同一事件
+UNRELATED = [
+    ("Apple unveils new iPhone with AI features", "Google unveils new Pixel with AI features"),
+    ("Stock markets fall as tariffs bite", "Stock markets rise as tariffs pause"),
+    ("What to know about the new tariffs", "What to know about the measles outbreak"),
+    ("The best laptops of 2025", "The best headphones of 2025"),
+]
+
+
+def test_cluster_titles() -> None:
+    """测试同一事件的不同标题归为一簇，不同事件不合并"""
+    assert cluster_titles([news["title"] for news in NEWS], 0.7) == [[0, 2], [1], [3], [4, 5]]
+
+
+def test_cluster_titles_keeps_template_titles_apart() -> None:
+    """测试只共用句式的不同新闻不合并"""
+    titles = [title for pair in UNRELATED for title in pair] + [news["title"] for news in NEWS]
+    clusters = cluster_titles(titles, 0.7)
+    for i in range(len(UNRELATED)):
+        assert [2 * i] in clusters and [2 * i + 1] in clusters
+
+
+def test_cluster_titles_does_not_chain() -> None:
+    """测试只并入与种子相似的条目：A~B、B~C但A与C不相似时，C不会经由B并入A"""
+    titles = [
+        "Nvidia unveils Blackwell chips",
+        "Nvidia unveils Blackwell AI chips for data centers",
+        "Blackwell AI chips for data centers ship to Microsoft",
+    ]
+    assert cluster_titles(titles, 0.55) == [[0, 1], [2]]
+
+
+def test_cluster_titles_same_source_not_merged() -> None:
+    """测试同一来源的相似标题不合并，同一簇中每个来源最多一条"""
+    titles = ["OpenAI releases GPT-5", "OpenAI releases GPT-5 model", "OpenAI releases GPT-5 today"]
+    assert cluster_titles(titles, 0.7, sources=["reuters", "reuters", "bbc"]) == [[0, 2], [1]]
+
+
+def test_collapse_keeps_alternate_urls() -> None:
+    """测试每簇保留最靠前的一条，其他来源的URL和标题记录在代表中"""
+    collapsed = collapse_near_duplicates(NEWS, threshold=0.7)
+
+    assert [news["url"] for news in collapsed] == [
+        "https://bbc.com/news/tariffs", "https://reuters.com/tech/gpt5",
+        "https://reuters.com/tech/gemini", "https://cnn.com/uk-election",
+    ]
+    assert collapsed[0]["alternate_urls"] == ["https://cnn.com/tariffs"]
+    assert collapsed[0]["alternate_titles"] == ["Trump announces sweeping tariffs on Chinese goods"]
+    assert "alternate_urls" not in collapsed[1]
+    assert "alternate_urls" not in NEWS[0]
+    assert collapse_near_duplicates(NEWS, threshold=1) == NEWS
+
+
+def test_pick_important_news_keeps_alternates() -> None:
+    """测试精选时模型给出其他来源的URL也能对应回代表，并保留其他来源的URL"""
+    collapsed = collapse_near_duplicates(NEWS, threshold=0.7)
+    response = '{"news": [{"title": "Tariffs", "url": "https://cnn.com/tariffs", "reason": "贸易"}]}'
+    with patch("src.news_podcast.utils.news_processor.chat_with_deepseek", return_value=response):
+        selected = pick_important_news(collapsed)
+
+    assert selected == [{
+        "title": "Trump announces new tariffs on Chinese goods", "url": "https://bbc.com/news/tariffs",
+        "reason": "贸易", "alternate_urls": ["https://cnn.com/tariffs"],
+    }]
+
+
+def test_collapse_merges_same_canonical_url() -> None:
+    """测试规范化后URL相同的新闻即使标题不同也合并，且不重复记录为其他来源"""
+    news_list = [
+        {"title": "Fed holds rates steady", "url": "https://www.reuters.com/markets/fed-2025-04-09/"},
+        {"title": "Markets react to central bank", "url": "https://reuters.com/markets/fed-2025-04-09?utm_source=x"},
+    ]
+    collapsed = collapse_near_duplicates(news_list, threshold=1)
+
+    assert len(collapsed) == 1
+    assert collapsed[0]["url"] == "https://www.reuters.com/markets/fed-2025-04-09/"
+    assert collapsed[0]["alternate_urls"] == []
@@ -0,0 +1,58 @@
+"""
+容错JSON列表解析测试
+"""
+from unittest.mock import patch
+
+from src.news_podcast.utils.json_parser import parse_json_list
+from src.news_podcast.utils.news_processor import pick_important_news
+
+
+def test_parse_clean_and_wrapped_arrays() -> None:
+    """测试普通数组、代码块中的数组和JSON模式下包在对象里的数组"""
+    assert parse_json_list('[1, 2, 3]') == [1, 2, 3]
+    assert parse_json_list('好的：\n```json\n[{"title": "A", "url": "u"}]\n```') == [{"title": "A", "url": "u"}]
+    assert parse_json_list('{"indices": [3, 1]}') == [3, 1]
+    assert parse_json_list("没有JSON") == []
+
+
+def test_parse_recovers_from_malformed_elements() -> None:
+    """测试多余的逗号、单引号和无法解析的元素不影响其他元素"""
+    text = """[
+        {"title": "A", "url": "https://a.com/1",},
+        {'title': 'B', 'url': 'https://b.com/2'},
+        {"title": "C" "url": broken},
+        {"title": "D [附图]", "url": "https://d.com/4"},
+    ]"""
+    assert parse_json_list(text) == [
+        {"title": "A", "url": "https://a.com/1"},
+        {"title": "B", "url": "https://b.com/2"},
+        {"title": "D [附图]", "url": "https://d.com/4"},
+    ]
+
+
+def test_parse_truncated_array() -> None:
+    """测试输出被截断时保留所有完整的元素"""
+    text = '[{"title": "A", "url": "https://a.com/1"}, {"title": "B", "url": "https://b.c'
+    assert parse_json_list(text) == [{"title": "A", "url": "https://a.com/1"}]
+    assert parse_json_list('[3, 1, 12') == [3, 1, 12]
+
+
+def test_pick_important_news_validates_against_candidates() -> None:
+    """测试精选结果对应回候选新闻：按URL或标题匹配，编造的新闻被丢弃"""
+    all_news = [
+        {"title": "Chip export rules tightened", "url": "https://a.com/chips"},
+        {"title": "New battery breakthrough", "url": "https://b.com/battery"},
+    ]
+    response = """{"news": [
+        {"title": "Chip export rules tightened", "url": "https://a.com/chips", "reason": "政策"},
+        {"title": "New battery breakthrough", "url": "https://b.com/wrong-url"},
+        {"title": "Invented story", "url": "https://c.com/fake", "reason": "编造"},
+    ]}"""
+    with patch("src.news_podcast.utils.news_processor.chat_with_deepseek", return_value=response) as chat:
+        selected = pick_important_news(all_news)
+
+    assert selected == [
+        {"title": "Chip export rules tightened", "url": "https://a.com/chips", "reason": "政策"},
+        {"title": "New battery breakthrough", "url": "https://b.com/battery", "reason": "未提供选择原因"},
+    ]
+    assert chat.call_args[1]["response_format"] == {"type": "json_object"}
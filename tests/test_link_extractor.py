@@ -0,0 +1,77 @@
+"""
+候选链接提取与按编号挑选新闻测试
+"""
+from unittest.mock import patch
+
+from src.news_podcast.utils.link_extractor import extract_link_candidates, format_candidates
+from src.news_podcast.utils.url_canon import fix_wrapped_url
+from src.news_podcast.utils.news_processor import pick_news_from_source
+
+HOMEPAGE = "\n".join([
+    "  * [World](https://time.com/section/world/)",
+    "  * [Subscribe now to get unlimited access](https://time.com/subscribe/)",
+    "![Lisa Su](https://api.time.com/wp-content/uploads/2024/12/lisa-su.jpg)",
+    "## [CEO of the Year 2024: Lisa Su](https://time.com/</7200909/ceo-of-the-year-2024-lisa-su/>)",
+    "[How AI chips are reshaping the global economy](/7201234/ai-chips-global-economy/)",
+    "[CEO of the Year 2024: Lisa Su](https://time.com/7200909/ceo-of-the-year-2024-lisa-su/#comments)",
+    "[Partner story about cloud computing trends](https://partner.example.com/2024/12/cloud-story/)",
+    "[Download the full report as PDF](https://time.com/7200000/report.pdf)",
+    "[Ukraine war live updates and analysis](https://time.com/section/ukraine-war/)",
+])
+
+
+def test_fix_wrapped_url() -> None:
+    """测试修正被尖括号包裹的路径"""
+    assert fix_wrapped_url("https://time.com/</7200909/ceo-of-the-year-2024-lisa-su/>") == \
+        "https://time.com/7200909/ceo-of-the-year-2024-lisa-su/"
+    assert fix_wrapped_url("<https://www.bbc.com/news/articles/c20g7705re3o>") == \
+        "https://www.bbc.com/news/articles/c20g7705re3o"
+    assert fix_wrapped_url("https://www.wired.com/story/slug/") == "https://www.wired.com/story/slug/"
+
+
+def test_extract_link_candidates_filters_and_dedupes() -> None:
+    """测试过滤导航、站外和静态资源链接，并按URL去重"""
+    candidates = extract_link_candidates(HOMEPAGE, "https://time.com")
+
+    assert [item["url"] for item in candidates] == [
+        "https://time.com/7200909/ceo-of-the-year-2024-lisa-su/",
+        "https://time.com/7201234/ai-chips-global-economy/",
+    ]
+    assert candidates[0]["title"] == "CEO of the Year 2024: Lisa Su"
+    assert format_candidates(candidates).split("\n")[1] == \
+        "2. How AI chips are reshaping the global economy (/7201234/ai-chips-global-economy/)"
+
+
+def test_extract_link_candidates_with_patterns() -> None:
+    """测试按来源配置的URL正则筛选候选链接"""
+    candidates = extract_link_candidates(
+        HOMEPAGE, "https://time.com",
+        include_patterns=[r"/section/"], exclude_patterns=[r"/world/"],
+    )
+
+    assert [item["url"] for item in candidates] == ["https://time.com/section/ukraine-war/"]
+
+
+def test_pick_news_by_index_maps_back_to_candidates() -> None:
+    """测试LLM只返回编号时，标题和URL取自候选列表，越界和重复的编号被忽略"""
+    candidates = [
+        {"title": f"Headline number {i} about the economy", "url": f"https://time.com/72000{i}/story-{i}/"}
+        for i in range(1, 6)
+    ]
+    response = '好的，选择如下：\n[3, {"index": 1}, "5", 3, 42, "abc"]'
+    with patch("src.news_podcast.utils.news_processor.chat_with_deepseek", return_value=response) as chat:
+        news_list = pick_news_from_source("", "https://time.com", "", "", candidates)
+
+    assert news_list == [candidates[2], candidates[0], candidates[4]]
+    prompt = chat.call_args[0][0]
+    assert "3. Headline number 3 about the economy (/720003/story-3/)" in prompt
+
+
+def test_pick_news_without_candidates_uses_content() -> None:
+    """测试候选不足时回退到让LLM直接阅读首页内容"""
+    response = '[{"title": "CEO of the Year", "url": "https://time.com/7200909/ceo-of-the-year-2024-lisa-su/"}]'
+    with patch("src.news_podcast.utils.news_processor.chat_with_deepseek", return_value=response) as chat:
+        news_list = pick_news_from_source(HOMEPAGE, "https://time.com", "sample", "sample_output", [])
+
+    assert news_list[0]["title"] == "CEO of the Year"
+    assert HOMEPAGE in chat.call_args[0][0]
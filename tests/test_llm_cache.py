@@ -0,0 +1,74 @@
+"""
+LLM响应缓存测试
+"""
+import time
+from types import SimpleNamespace
+
+from src.news_podcast.api import llm_client
+from src.news_podcast.api.llm_cache import LLMCache, make_key
+from src.news_podcast.utils.cache_modes import CACHE_REFRESH
+
+MESSAGES = [{"role": "user", "content": "总结今天的新闻"}]
+
+
+def test_make_key_covers_request() -> None:
+    """测试缓存键随模型、消息和参数变化，与参数顺序无关"""
+    key = make_key("m", MESSAGES, 100, temperature=0.5, top_p=1)
+    assert key == make_key("m", MESSAGES, 100, top_p=1, temperature=0.5)
+    assert key != make_key("m2", MESSAGES, 100, temperature=0.5, top_p=1)
+    assert key != make_key("m", MESSAGES, 200, temperature=0.5, top_p=1)
+    assert key != make_key("m", [{"role": "user", "content": "x"}], 100, temperature=0.5, top_p=1)
+
+
+def test_get_put_and_counters(tmp_path) -> None:
+    """测试读写缓存以及命中、未命中计数"""
+    cache = LLMCache(path=str(tmp_path / "cache.sqlite3"))
+    assert cache.get("k") is None
+    cache.put("k", "m", "响应")
+    assert cache.get("k") == "响应"
+    assert cache.stats() == {"hits": 1, "misses": 1}
+
+    refresh = LLMCache(path=str(tmp_path / "cache.sqlite3"), mode=CACHE_REFRESH)
+    assert refresh.get("k") is None
+    refresh.put("k", "m", "新响应")
+    assert cache.get("k") == "新响应"
+
+
+def test_eviction_by_age_and_size(tmp_path) -> None:
+    """测试过期条目失效，超过大小上限时淘汰最久未访问的条目"""
+    cache = LLMCache(path=str(tmp_path / "cache.sqlite3"), max_age=3600, max_bytes=25)
+    cache.put("a", "m", "a" * 10)
+    cache.put("b", "m", "b" * 10)
+    time.sleep(0.01)
+    assert cache.get("a") == "a" * 10  # a比b更近被访问
+    cache.put("c", "m", "c" * 10)
+    assert cache.get("b") is None
+    assert cache.get("a") == "a" * 10
+    assert cache.get("c") == "c" * 10
+
+    cache.max_age = 0.001
+    time.sleep(0.01)
+    assert cache.get("a") is None
+
+
+def test_chat_with_deepseek_uses_cache(monkeypatch, isolated_llm_cache) -> None:
+    """测试相同请求直接返回缓存，use_cache=False时跳过缓存"""
+    calls = []
+
+    def fake_create(**kwargs):
+        calls.append(kwargs)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=f"响应{len(calls)}"))],
+            usage=SimpleNamespace(prompt_tokens=1, completion_tokens=1),
+        )
+
+    client = llm_client.get_client("key", "http://127.0.0.1:9/v1")
+    monkeypatch.setattr(client.chat.completions, "create", fake_create)
+    kwargs = dict(api_key="key", base_url="http://127.0.0.1:9/v1", model="m")
+
+    assert llm_client.chat_with_deepseek("hi", **kwargs) == "响应1"
+    assert llm_client.chat_with_deepseek("hi", **kwargs) == "响应1"
+    assert llm_client.chat_with_deepseek("hi", use_cache=False, **kwargs) == "响应2"
+    assert llm_client.chat_with_deepseek("hi", max_tokens=10, **kwargs) == "响应3"
+    assert len(calls) == 3
+    assert isolated_llm_cache.stats() == {"hits": 1, "misses": 2}
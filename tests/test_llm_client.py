@@ -0,0 +1,76 @@
+"""
+LLM客户端测试
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.news_podcast.api import llm_client
+
+
+def _response(text: str) -> SimpleNamespace:
+    """构造非流式响应"""
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=text))],
+        usage=SimpleNamespace(prompt_tokens=10, completion_tokens=5),
+    )
+
+
+def test_sync_client_is_reused() -> None:
+    """测试同一API地址和密钥复用同一个客户端"""
+    first = llm_client.get_client("key", "http://127.0.0.1:9/v1")
+    assert llm_client.get_client("key", "http://127.0.0.1:9/v1") is first
+    assert llm_client.get_client("other", "http://127.0.0.1:9/v1") is not first
+
+
+def test_chat_with_deepseek_retries_empty_response(monkeypatch) -> None:
+    """测试空响应会使用同一个客户端重试"""
+    replies = iter(["", "你好"])
+    calls = []
+
+    def fake_create(**kwargs):
+        calls.append(kwargs)
+        return _response(next(replies))
+
+    client = llm_client.get_client("key", "http://127.0.0.1:9/v1")
+    monkeypatch.setattr(client.chat.completions, "create", fake_create)
+
+    assert llm_client.chat_with_deepseek("hi", api_key="key", base_url="http://127.0.0.1:9/v1", model="m") == "你好"
+    assert len(calls) == 2
+    assert calls[0]["messages"] == [{"role": "user", "content": "hi"}]
+
+
+def test_async_client_is_per_event_loop() -> None:
+    """测试异步客户端在同一事件循环内复用，不同事件循环之间互不共享"""
+    async def get():
+        return llm_client.get_async_client("key", "http://127.0.0.1:9/v1"), \
+            llm_client.get_async_client("key", "http://127.0.0.1:9/v1")
+
+    first, second = asyncio.run(get())
+    third, _ = asyncio.run(get())
+    assert first is second
+    assert third is not first
+
+
+@pytest.mark.asyncio
+async def test_async_chat_runs_concurrently(monkeypatch) -> None:
+    """测试异步调用可以并发进行"""
+    active = {"now": 0, "max": 0}
+
+    async def fake_create(**kwargs):
+        active["now"] += 1
+        active["max"] = max(active["max"], active["now"])
+        await asyncio.sleep(0.05)
+        active["now"] -= 1
+        return _response(kwargs["messages"][-1]["content"].upper())
+
+    client = llm_client.get_async_client("key", "http://127.0.0.1:9/v1")
+    monkeypatch.setattr(client.chat.completions, "create", fake_create)
+
+    results = await asyncio.gather(*(
+        llm_client.async_chat_with_deepseek(text, api_key="key", base_url="http://127.0.0.1:9/v1", model="m")
+        for text in ["a", "b", "c"]
+    ))
+    assert results == ["A", "B", "C"]
+    assert active["max"] == 3
@@ -0,0 +1,178 @@
+"""
+LLM多端点故障切换、超时和对冲请求测试，使用本地的OpenAI兼容假服务
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.news_podcast.api import llm_client
+from src.news_podcast.api.llm_endpoints import LatencyTracker, load_endpoints
+
+
+class FakeServer:
+    """本地OpenAI兼容服务，按mode返回正常响应、500、429、延迟响应或拒绝JSON输出模式(400)"""
+
+    def __init__(self, reply: str, mode: str = "ok", delay: float = 0.0):
+        self.reply = reply
+        self.mode = mode
+        self.delay = delay
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("content-length", 0))
+                body = json.loads(self.rfile.read(length))
+                server.requests += 1
+                if server.mode == "no_json" and "response_format" in body:
+                    self._send(400, {"error": {"message": "response_format is not supported"}})
+                    return
+                if server.mode == "error":
+                    self._send(500, {"error": {"message": "internal error"}})
+                    return
+                if server.mode == "rate_limited" and server.requests == 1:
+                    self._send(429, {"error": {"message": "slow down"}}, {"retry-after": "0"})
+                    return
+                time.sleep(server.delay)
+                self._send(200, {
+                    "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": "fake",
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": server.reply}}],
+                    "usage": {"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5},
+                })
+
+            def _send(self, status, body, headers=None):
+                data = json.dumps(body).encode("utf-8")
+                try:
+                    self.send_response(status)
+                    self.send_header("content-type", "application/json")
+                    self.send_header("content-length", str(len(data)))
+                    for key, value in (headers or {}).items():
+                        self.send_header(key, value)
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.block_on_close = False
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/v1"
+
+    def close(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def servers(monkeypatch):
+    """创建假服务并通过LLM_ENDPOINTS按顺序配置"""
+    created = []
+
+    def make(*specs):
+        for reply, mode, delay in specs:
+            created.append(FakeServer(reply, mode, delay))
+        monkeypatch.setenv("LLM_ENDPOINTS", json.dumps([
+            {"name": f"s{i}", "base_url": server.base_url, "api_key": "test", "model": "fake"}
+            for i, server in enumerate(created)
+        ]))
+        return created
+
+    monkeypatch.setenv("LLM_BACKOFF_BASE", "0.01")
+    yield make
+    for server in created:
+        server.close()
+
+
+def test_load_endpoints(monkeypatch) -> None:
+    """测试端点配置缺省字段使用ARK_*，显式参数只使用一个端点"""
+    monkeypatch.setenv("ARK_MODEL", "primary-model")
+    monkeypatch.setenv("ARK_API_KEY", "ark-key")
+    monkeypatch.setenv("BACKUP_KEY", "backup-key")
+    monkeypatch.setenv("LLM_ENDPOINTS", json.dumps([
+        {"name": "main", "base_url": "http://a/v1"},
+        {"name": "backup", "base_url": "http://b/v1", "model": "other", "api_key_env": "BACKUP_KEY"},
+    ]))
+
+    main, backup = load_endpoints()
+    assert (main.model, main.api_key) == ("primary-model", "ark-key")
+    assert (backup.model, backup.api_key) == ("other", "backup-key")
+    assert [e.base_url for e in load_endpoints(base_url="http://c/v1")] == ["http://c/v1"]
+
+
+def test_failover_to_backup_endpoint(servers) -> None:
+    """测试主端点返回500时切换到备用端点"""
+    primary, backup = servers(("主端点", "error", 0), ("备用端点", "ok", 0))
+
+    assert llm_client.chat_with_deepseek("hi", max_retries=2) == "备用端点"
+    assert primary.requests == 1
+    assert backup.requests == 1
+
+
+def test_failover_response_not_cached_as_primary(servers) -> None:
+    """测试备用端点的响应不以主端点模型的名义写入缓存，下次请求仍先尝试主端点"""
+    primary, backup = servers(("主端点", "error", 0), ("备用端点", "ok", 0))
+
+    assert llm_client.chat_with_deepseek("hi", max_retries=2) == "备用端点"
+    assert llm_client.chat_with_deepseek("hi", max_retries=2) == "备用端点"
+    assert primary.requests == 2
+    assert backup.requests == 2
+
+
+def test_timeout_then_failover(servers) -> None:
+    """测试主端点超时后切换到备用端点"""
+    servers(("主端点", "ok", 3), ("备用端点", "ok", 0))
+
+    st = time.time()
+    assert llm_client.chat_with_deepseek("hi", timeout=0.5) == "备用端点"
+    assert time.time() - st < 2.5
+
+
+def test_rate_limited_retries_same_endpoint(servers) -> None:
+    """测试429由限流器处理后重试，不切换端点"""
+    primary, backup = servers(("主端点", "rate_limited", 0), ("备用端点", "ok", 0))
+
+    assert llm_client.chat_with_deepseek("hi", max_retries=0) == "主端点"
+    assert primary.requests == 2
+    assert backup.requests == 0
+
+
+def test_json_mode_falls_back_when_unsupported(servers, monkeypatch) -> None:
+    """测试端点拒绝JSON输出模式时改用普通模式重发，之后不再请求JSON输出模式"""
+    monkeypatch.setattr(llm_client, "_json_unsupported", set())
+    primary, = servers(("[1, 2]", "no_json", 0))
+    response_format = {"type": "json_object"}
+
+    assert llm_client.chat_with_deepseek("hi", response_format=response_format) == "[1, 2]"
+    assert primary.requests == 2
+    assert llm_client.chat_with_deepseek("again", response_format=response_format) == "[1, 2]"
+    assert primary.requests == 3
+
+
+@pytest.mark.asyncio
+async def test_hedged_request_takes_faster_endpoint(servers, monkeypatch) -> None:
+    """测试主端点慢于历史分位数时向备用端点发起对冲请求，取先返回的结果"""
+    primary, backup = servers(("主端点", "ok", 3), ("备用端点", "ok", 0))
+    tracker = LatencyTracker()
+    for _ in range(5):
+        tracker.record("generate_podcast", 0.1)
+    monkeypatch.setattr(llm_client, "_latency", tracker)
+    monkeypatch.setenv("LLM_HEDGE_PERCENTILE", "90")
+    monkeypatch.setenv("LLM_HEDGE_MIN_DELAY", "0.2")
+
+    st = time.time()
+    result = await llm_client.async_chat_with_deepseek("hi", call_site="generate_podcast")
+    assert result == "备用端点"
+    assert time.time() - st < 2
+    assert primary.requests == 1 and backup.requests == 1
@@ -0,0 +1,39 @@
+"""
+日志工具测试
+"""
+import gzip
+import json
+import logging
+
+import pytest
+
+from src.news_podcast.utils.logger import PAYLOAD_FILE, log_payload, setup_logging, stop_logging, truncate_payload
+
+
+def test_truncate_payload(monkeypatch) -> None:
+    """测试超出长度的内容被截断并注明总长度"""
+    monkeypatch.setenv("LOG_PAYLOAD_CHARS", "5")
+    assert truncate_payload("短文本") == "短文本"
+    assert truncate_payload("0123456789") == "01234...（共10字符，已截断）"
+    assert truncate_payload("0123456789", limit=0) == "0123456789"
+    assert truncate_payload(None) == ""
+
+
+@pytest.mark.parametrize("use_queue", [True, False])
+def test_log_payload_archives_full_text(tmp_path, monkeypatch, use_queue) -> None:
+    """测试普通日志只记录开头部分，完整内容写入压缩归档文件"""
+    monkeypatch.setenv("LOG_PAYLOAD_CHARS", "20")
+    setup_logging(log_dir=str(tmp_path), use_queue=use_queue)
+    try:
+        log_payload(logging.getLogger("src.news_podcast.api.llm_client"), "得到响应", "日报" * 100)
+    finally:
+        stop_logging()
+
+    log_text = (tmp_path / "news_podcast.log").read_text(encoding="utf-8")
+    assert "得到响应: " + "日报" * 10 + "...（共200字符，已截断）" in log_text
+    with gzip.open(tmp_path / PAYLOAD_FILE, "rt", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert len(records) == 1
+    assert records[0]["text"] == "日报" * 100
+    assert records[0]["label"] == "得到响应"
+    assert records[0]["logger"] == "src.news_podcast.api.llm_client"
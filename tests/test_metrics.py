@@ -0,0 +1,81 @@
+"""
+运行指标测试
+"""
+import json
+
+import pytest
+
+from src.news_podcast.api.llm_client import chat_with_deepseek
+from src.news_podcast.utils.metrics import MetricsRegistry, get_metrics
+
+
+def test_snapshot_aggregates_stages(monkeypatch) -> None:
+    """测试按阶段累计指标、计算平均耗时和费用"""
+    monkeypatch.setenv("LLM_PRICE_PROMPT_PER_MTOK", "2")
+    monkeypatch.setenv("LLM_PRICE_COMPLETION_PER_MTOK", "8")
+    registry = MetricsRegistry()
+    registry.record_llm_call("pick_news", prompt_tokens=1000, completion_tokens=100,
+                             estimated_prompt_tokens=1200, latency=2.0, retries=1)
+    registry.record_llm_call("pick_news", prompt_tokens=500, completion_tokens=50, latency=4.0)
+    registry.record_llm_call("pick_news", cache_hit=True)
+    registry.record_llm_call(None, latency=1.0, failed=True, ttft=0.5)
+
+    data = registry.snapshot()
+    pick = data["stages"]["pick_news"]
+    assert pick["calls"] == 3
+    assert pick["cache_hits"] == 1
+    assert pick["retries"] == 1
+    assert pick["latency_avg"] == 3.0
+    assert pick["latency_max"] == 4.0
+    assert pick["cost"] == pytest.approx((1500 * 2 + 150 * 8) / 1_000_000)
+    assert data["stages"]["other"]["failures"] == 1
+    assert data["stages"]["other"]["ttft_avg"] == 0.5
+    assert data["totals"]["calls"] == 4
+    assert registry.total_tokens == 1650
+
+
+def test_write(tmp_path) -> None:
+    """测试写入metrics.json并附加其他统计"""
+    registry = MetricsRegistry()
+    registry.record_llm_call("aggregate", prompt_tokens=10, completion_tokens=5)
+    path = tmp_path / "metrics.json"
+    registry.write(str(path), extra={"llm_cache": {"hits": 1}})
+
+    data = json.loads(path.read_text(encoding="utf-8"))
+    assert data["stages"]["aggregate"]["prompt_tokens"] == 10
+    assert data["llm_cache"] == {"hits": 1}
+
+
+def test_chat_records_cache_hit(monkeypatch) -> None:
+    """测试对话请求按调用点记录Token用量，再次请求命中缓存"""
+    class Usage:
+        prompt_tokens = 7
+        completion_tokens = 3
+
+    def fake_request(endpoint, messages, stream, max_tokens, timeout, sink=None, response_format=None):
+        return "回答", Usage(), None, endpoint
+
+    monkeypatch.setattr("src.news_podcast.api.llm_client._request", fake_request)
+    for _ in range(2):
+        assert chat_with_deepseek("问题", call_site="generate_podcast", model="m") == "回答"
+
+    stage = get_metrics().snapshot()["stages"]["generate_podcast"]
+    assert stage["calls"] == 2
+    assert stage["cache_hits"] == 1
+    assert stage["prompt_tokens"] == 7
+    assert stage["completion_tokens"] == 3
+
+
+def test_streamed_call_without_usage_is_estimated(monkeypatch) -> None:
+    """测试流式响应没有返回用量时按估算值记录Token数，并标记为估算"""
+    def fake_request(endpoint, messages, stream, max_tokens, timeout, sink=None, response_format=None):
+        return "今天的科技新闻", None, None, endpoint
+
+    monkeypatch.setattr("src.news_podcast.api.llm_client._request", fake_request)
+    assert chat_with_deepseek("问题", call_site="aggregate", model="m", stream=True,
+                              on_chunk=lambda chunk: None) == "今天的科技新闻"
+
+    stage = get_metrics().snapshot()["stages"]["aggregate"]
+    assert stage["prompt_tokens"] > 0
+    assert stage["completion_tokens"] > 0
+    assert stage["estimated_usage"] == 1
@@ -0,0 +1,86 @@
+"""
+页面缓存模块测试
+"""
+import os
+import time
+
+import httpx
+import pytest
+
+from src.news_podcast.crawlers.page_cache import PageCache
+from src.news_podcast.utils.cache_modes import CACHE_DISABLED, CACHE_REFRESH
+
+
+def test_cache_key_uses_canonical_url(tmp_path) -> None:
+    """测试同一页面的不同URL写法命中同一缓存条目"""
+    cache = PageCache(cache_dir=str(tmp_path))
+    cache.put("HTTPS://WWW.BBC.com/news/?utm_source=x#top", "article", "article body")
+    entry = cache.get("https://bbc.com/news")
+    assert entry is not None and entry.content == "article body"
+    assert entry.url == "https://www.bbc.com/news/"
+    assert cache.get("https://time.com") is None
+
+
+@pytest.mark.asyncio
+async def test_lookup_respects_ttl(tmp_path) -> None:
+    """测试缓存按页面类型的有效期命中和过期"""
+    cache = PageCache(cache_dir=str(tmp_path), ttls={"homepage": 60, "article": 3600})
+    cache.put("https://bbc.com/news/1", "article", "article body")
+    cache.put("https://bbc.com/", "homepage", "homepage body")
+
+    assert await cache.lookup("https://bbc.com/news/1/", "article") == "article body"
+    assert await cache.lookup("https://bbc.com/", "homepage") == "homepage body"
+
+    # 把首页的爬取时间调到有效期之前
+    entry = cache.get("https://bbc.com/")
+    entry.fetched_at = time.time() - 120
+    cache._write("https://bbc.com/", entry)
+    assert await cache.lookup("https://bbc.com/", "homepage") is None
+
+
+@pytest.mark.asyncio
+async def test_stale_entry_revalidated_with_etag(tmp_path) -> None:
+    """测试过期缓存通过ETag条件请求验证后继续使用"""
+    cache = PageCache(cache_dir=str(tmp_path), ttls={"article": 0})
+    cache.put("https://bbc.com/news/1", "article", "article body", {"ETag": '"v1"'})
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, text="changed")
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        assert await cache.lookup("https://bbc.com/news/1", "article", client) == "article body"
+
+        cache.put("https://bbc.com/news/2", "article", "other body", {"ETag": '"v2"'})
+        assert await cache.lookup("https://bbc.com/news/2", "article", client) is None
+
+
+@pytest.mark.asyncio
+async def test_refresh_and_disabled_modes(tmp_path) -> None:
+    """测试refresh模式只写不读，disabled模式不读不写"""
+    PageCache(cache_dir=str(tmp_path)).put("https://bbc.com/", "homepage", "old body")
+
+    refresh = PageCache(cache_dir=str(tmp_path), mode=CACHE_REFRESH)
+    assert await refresh.lookup("https://bbc.com/", "homepage") is None
+    refresh.put("https://bbc.com/", "homepage", "new body")
+    assert refresh.get("https://bbc.com/").content == "new body"
+
+    disabled = PageCache(cache_dir=str(tmp_path / "off"), mode=CACHE_DISABLED)
+    disabled.put("https://bbc.com/", "homepage", "body")
+    assert not os.path.exists(tmp_path / "off")
+
+
+def test_evict_oldest_entries(tmp_path) -> None:
+    """测试缓存超过大小上限时淘汰最久未访问的条目"""
+    cache = PageCache(cache_dir=str(tmp_path), max_bytes=10 ** 9)
+    for i in range(5):
+        cache.put(f"https://bbc.com/news/{i}", "article", "x" * 1000)
+        path = cache._path(f"https://bbc.com/news/{i}")
+        os.utime(path, (1000 + i, 1000 + i))
+
+    cache.max_bytes = 2500
+    cache.evict()
+
+    remaining = [i for i in range(5) if cache.get(f"https://bbc.com/news/{i}") is not None]
+    assert remaining == [3, 4]
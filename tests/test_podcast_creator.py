@@ -0,0 +1,75 @@
+"""
+播客生成流程测试
+"""
+import asyncio
+import pytest
+
+from src.news_podcast.models.news_task import NewsTask
+from src.news_podcast import podcast_creator
+
+
+def _make_task(name: str) -> NewsTask:
+    """构造测试用的新闻任务"""
+    return NewsTask(
+        url=f"https://{name}.com/",
+        output_file=name,
+        sample_url="",
+        sample_url_output="",
+    )
+
+
+@pytest.mark.asyncio
+async def test_scan_all_news_isolates_failures(monkeypatch):
+    """
+    测试并行扫描时，单个来源的异常或超时不会影响其他来源
+    """
+    async def fake_scan_news(task, timestamp, session=None):
+        if task.output_file == "hang":
+            await asyncio.sleep(10)
+        if task.output_file == "broken":
+            raise RuntimeError("boom")
+        return True
+
+    monkeypatch.setattr(podcast_creator, "scan_news", fake_scan_news)
+
+    tasks = [_make_task(name) for name in ["ok1", "hang", "broken", "ok2"]]
+    results = await podcast_creator.scan_all_news(tasks, "20250101", workers=4, task_timeout=0.2)
+
+    assert results == {"ok1": True, "hang": False, "broken": False, "ok2": True}
+
+
+@pytest.mark.asyncio
+async def test_analyze_news_stream_overlaps_and_keeps_order(monkeypatch):
+    """
+    测试文章爬取完成后立即分析，结果顺序与输入一致，爬取失败的新闻对应None
+    """
+    delays = {"https://a.com/1": 0.3, "https://b.com/2": 0.05, "https://c.com/3": 0.1, "https://d.com/4": 0.0}
+    events = []
+
+    async def fake_async_search(url, session=None, tier=None, profile=None, **kwargs):
+        await asyncio.sleep(delays[url])
+        events.append(("fetched", url))
+        if url == "https://d.com/4":
+            return "爬取失败: 已达到最大重试次数"
+        return f"正文 {url}"
+
+    async def fake_generate_podcast(content, url):
+        events.append(("analyzed", url))
+        return f"分析 {content}"
+
+    monkeypatch.setattr(podcast_creator, "async_search", fake_async_search)
+    monkeypatch.setattr(podcast_creator, "async_generate_podcast", fake_generate_podcast)
+
+    selected = [{"title": f"新闻{i}", "url": url} for i, url in enumerate(delays, start=1)]
+    results = await podcast_creator.analyze_news_stream(
+        selected, {}, "20250101", max_concurrency=4, per_host_limit=1, llm_workers=1,
+    )
+
+    assert results == [
+        (0, "新闻1", "分析 正文 https://a.com/1", "https://a.com/1"),
+        (1, "新闻2", "分析 正文 https://b.com/2", "https://b.com/2"),
+        (2, "新闻3", "分析 正文 https://c.com/3", "https://c.com/3"),
+        None,
+    ]
+    # 较快的文章在最慢的文章爬取完成之前就已经分析完毕
+    assert events.index(("analyzed", "https://b.com/2")) < events.index(("fetched", "https://a.com/1"))
@@ -0,0 +1,78 @@
+"""
+新闻预排序测试
+"""
+import datetime
+
+import pytest
+
+from src.news_podcast.utils.pre_ranker import (
+    RankingConfig,
+    TopicProfile,
+    build_ranking_config,
+    pre_rank,
+    score_news,
+    url_date,
+)
+
+
+def test_url_date() -> None:
+    """测试从常见的URL形式中解析发布日期"""
+    assert url_date("https://www.cnn.com/2025/04/08/europe/slug/index.html") == datetime.date(2025, 4, 8)
+    assert url_date("https://www.reuters.com/world/slug-2025-04-09/") == datetime.date(2025, 4, 9)
+    assert url_date("https://example.com/news/20250410/slug") == datetime.date(2025, 4, 10)
+    assert url_date("https://www.bbc.com/news/articles/c20g7705re3o") is None
+    assert url_date("https://example.com/2025/13/40/slug") is None
+
+
+def test_score_signals() -> None:
+    """测试主题、时效、来源、位置和覆盖来源数各项信号"""
+    config = RankingConfig(
+        topics={"ai": TopicProfile(keywords=["openai", "chip"])},
+        source_weights={"reuters": 2.0},
+    )
+    news_list = [
+        {"title": "OpenAI unveils new chip", "url": "https://reuters.com/tech/openai-chip-2025-04-09/",
+         "source": "reuters", "position": 0, "alternate_urls": ["https://bbc.com/news/1"]},
+        {"title": "Local council election results", "url": "https://cnn.com/2025/04/05/politics/council",
+         "source": "cnn", "position": 9},
+    ] + [{"title": f"Weather update for region {i}", "url": f"https://example.com/weather-{i}"} for i in range(3)]
+    first, second, *_ = score_news(news_list, config, today="20250409")
+
+    assert first["signals"] == {"topic": 1.0, "freshness": 1.0, "source": 1.0, "position": 1.0, "coverage": 0.5}
+    assert second["signals"]["topic"] == 0.0
+    assert second["signals"]["freshness"] == 0.25
+    assert second["signals"]["source"] == 0.5
+    assert first["score"] > second["score"]
+
+
+def test_pre_rank_keeps_top_k() -> None:
+    """测试按得分保留前K条，打分记录包含所有新闻并标记是否保留"""
+    news_list = [{"title": f"Story {i}", "url": f"https://example.com/story-{i}", "position": i}
+                 for i in range(5)]
+    kept, ranking = pre_rank(news_list, top_k=2, config=RankingConfig(topics={}), today="20250409")
+
+    assert kept == news_list[:2]
+    assert [item["index"] for item in ranking] == [0, 1, 2, 3, 4]
+    assert [item["kept"] for item in ranking] == [True, True, False, False, False]
+
+    kept, ranking = pre_rank(news_list[::-1], top_k=0, config=RankingConfig(topics={}), today="20250409")
+    assert kept == news_list
+    assert all(item["kept"] for item in ranking)
+
+
+def test_build_ranking_config() -> None:
+    """测试配置文件中的ranking与默认配置合并"""
+    config = build_ranking_config({
+        "weights": {"topic": 0.5},
+        "topics": {"space": {"keywords": ["nasa", "rocket"]}},
+        "source_weights": {"bbc": 1.5},
+        "freshness_half_life": 3,
+    })
+    assert config.weights["topic"] == 0.5
+    assert config.weights["position"] == 0.2
+    assert "ai" in config.topics and config.topics["space"].keywords == ["nasa", "rocket"]
+    assert config.source_weights == {"bbc": 1.5}
+    assert config.freshness_half_life == 3.0
+
+    with pytest.raises(ValueError):
+        build_ranking_config({"weights": {"popularity": 1}})
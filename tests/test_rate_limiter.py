@@ -0,0 +1,86 @@
+"""
+LLM限流器测试
+"""
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from openai import RateLimitError
+
+from src.news_podcast.api import llm_client, rate_limiter
+from src.news_podcast.api.rate_limiter import RateLimiter, estimate_tokens
+
+
+def test_estimate_tokens() -> None:
+    """测试中文按字、其他文字按4个字符估算Token数"""
+    assert estimate_tokens("今天的新闻") == 6
+    assert estimate_tokens("a" * 400) == 101
+
+
+def test_requests_per_minute() -> None:
+    """测试超过每分钟请求数后需要等待"""
+    limiter = RateLimiter(rpm=2, tpm=0)
+    assert limiter.reserve(0) == 0
+    assert limiter.reserve(0) == 0
+    assert limiter.reserve(0) == pytest.approx(30, abs=0.5)
+
+
+def test_tokens_per_minute_and_usage_correction() -> None:
+    """测试按预估Token预约配额，并按实际用量修正"""
+    limiter = RateLimiter(rpm=0, tpm=6000)
+    assert limiter.reserve(5000) == 0
+    limiter.record_usage(5000, 1000)  # 实际只用了1000，退还4000
+    assert limiter.reserve(4000) == 0
+    assert limiter.reserve(2000) == pytest.approx(10, abs=0.5)
+
+
+def test_rate_limited_slows_down_and_recovers() -> None:
+    """测试429后暂停并降低补充速率，成功后逐步恢复"""
+    limiter = RateLimiter(rpm=60, tpm=0)
+    limiter.on_rate_limited(retry_after=2)
+    assert limiter.requests.throttle == 0.5
+    assert limiter.reserve(0) >= 2
+    limiter.on_success()
+    assert limiter.requests.throttle == pytest.approx(0.6)
+
+
+@pytest.mark.asyncio
+async def test_async_chat_retries_after_429(monkeypatch) -> None:
+    """测试429不算作失败，降速后重试直到成功"""
+    limiter = RateLimiter(rpm=0, tpm=0)
+    rate_limiter.configure_rate_limiter(limiter)
+    calls = []
+
+    async def fake_create(**kwargs):
+        calls.append(kwargs)
+        if len(calls) <= 4:
+            response = httpx.Response(429, headers={"retry-after": "0"},
+                                      request=httpx.Request("POST", "http://127.0.0.1:9/v1/chat/completions"))
+            raise RateLimitError("rate limited", response=response, body=None)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="完成"))],
+            usage=SimpleNamespace(prompt_tokens=1, completion_tokens=1),
+        )
+
+    client = llm_client.get_async_client("key", "http://127.0.0.1:9/v1")
+    monkeypatch.setattr(client.chat.completions, "create", fake_create)
+
+    result = await llm_client.async_chat_with_deepseek(
+        "hi", api_key="key", base_url="http://127.0.0.1:9/v1", model="m", max_retries=1,
+    )
+    assert result == "完成"
+    assert limiter.rate_limited == 4
+
+
+def test_empty_response_does_not_recover(monkeypatch) -> None:
+    """测试空响应不算作成功，不恢复补充速率"""
+    limiter = RateLimiter(rpm=60, tpm=0)
+    limiter.requests.throttle = 0.5
+    rate_limiter.configure_rate_limiter(limiter)
+    call = llm_client._CallMetrics("pick_news")
+
+    with pytest.raises(llm_client.EmptyResponseError):
+        llm_client._finish("", None, call)
+    assert limiter.requests.throttle == 0.5
+    assert llm_client._finish("完成", None, call) == "完成"
+    assert limiter.requests.throttle == pytest.approx(0.6)
@@ -0,0 +1,52 @@
+"""
+重试策略模块测试
+"""
+import asyncio
+
+from src.news_podcast.utils.retry import (
+    ERROR_CLIENT,
+    ERROR_EMPTY,
+    ERROR_NETWORK,
+    ERROR_SERVER,
+    ERROR_TIMEOUT,
+    CircuitBreaker,
+    RetryPolicy,
+    classify_error,
+)
+
+
+def test_classify_error() -> None:
+    """测试错误分类"""
+    assert classify_error(exc=asyncio.TimeoutError()) == ERROR_TIMEOUT
+    assert classify_error(exc=Exception("Page.goto: Timeout 60000ms exceeded")) == ERROR_TIMEOUT
+    assert classify_error(exc=Exception("net::ERR_NAME_NOT_RESOLVED")) == ERROR_NETWORK
+    assert classify_error(status_code=403) == ERROR_CLIENT
+    assert classify_error(status_code=503) == ERROR_SERVER
+    assert classify_error(content="  ") == ERROR_EMPTY
+
+
+def test_retry_policy_backoff() -> None:
+    """测试指数退避、抖动范围和不重试的错误类型"""
+    policy = RetryPolicy(max_attempts=4, base_delay=1.0, max_delay=5.0, jitter=0.5)
+    for attempt, full_delay in [(1, 1.0), (2, 2.0), (3, 4.0), (4, 5.0)]:
+        delay = policy.delay(attempt)
+        assert full_delay * 0.5 <= delay <= full_delay
+    assert policy.delay(1, retry_after=3) == 3
+    assert policy.should_retry(ERROR_TIMEOUT, 1)
+    assert not policy.should_retry(ERROR_CLIENT, 1)
+    assert not policy.should_retry(ERROR_TIMEOUT, 4)
+
+
+def test_circuit_breaker_opens_on_host_errors() -> None:
+    """测试只有站点级错误会触发熔断，成功会清零计数"""
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record_failure("cnn.com", ERROR_CLIENT)
+    breaker.record_failure("cnn.com", ERROR_TIMEOUT)
+    breaker.record_success("cnn.com")
+    breaker.record_failure("cnn.com", ERROR_TIMEOUT)
+    assert breaker.allow("cnn.com")
+
+    breaker.record_failure("cnn.com", ERROR_SERVER)
+    assert not breaker.allow("cnn.com")
+    assert breaker.allow("bbc.com")
+    assert breaker.open_hosts == {"cnn.com"}
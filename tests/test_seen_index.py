@@ -0,0 +1,102 @@
+"""
+已见新闻索引测试
+"""
+import json
+import os
+
+import pytest
+
+from src.news_podcast.podcast_creator import record_seen_news, remove_duplicate_news
+from src.news_podcast.utils.seen_index import SeenIndex, get_seen_index, main
+
+
+@pytest.fixture(params=[True, False], ids=["bloom", "sqlite"])
+def index(tmp_path, request) -> SeenIndex:
+    index = SeenIndex(path=str(tmp_path / "seen.sqlite3"), bloom=request.param)
+    yield index
+    index.close()
+
+
+def test_seen_within_lookback_window(index) -> None:
+    """测试只返回回溯期内（不含当天）出现过的URL"""
+    index.record(["https://a.com/1", "https://a.com/2"], "20250101")
+    index.record(["https://a.com/1"], "20250101", selected=True)
+    index.record(["https://a.com/3"], "20250110", selected=True)
+    urls = ["https://a.com/1", "https://a.com/2", "https://a.com/3", "https://a.com/new"]
+
+    assert index.seen(urls, "20250105", 7) == {"https://a.com/1"}
+    assert index.seen(urls, "20250105", 7, selected_only=False) == {"https://a.com/1", "https://a.com/2"}
+    assert index.seen(urls, "20250110", 7) == set()
+    assert index.seen(urls, "20250111", 7) == {"https://a.com/3"}
+    assert index.seen(urls, "20250111", 90) == {"https://a.com/1", "https://a.com/3"}
+
+
+def test_seen_matches_url_variants(index) -> None:
+    """测试记录和查询都按规范化后的URL进行，返回查询时的原始写法"""
+    index.record(["https://www.bbc.com/news/articles/c20g?at_medium=RSS"], "20250101", selected=True)
+    urls = ["http://bbc.com/news/articles/c20g/", "https://bbc.com/news/articles/other"]
+
+    assert index.seen(urls, "20250102", 7) == {"http://bbc.com/news/articles/c20g/"}
+
+
+def test_compact_and_reopen(tmp_path) -> None:
+    """测试压缩后删除过期记录，重新打开后布隆过滤器从文件加载"""
+    path = str(tmp_path / "seen.sqlite3")
+    index = SeenIndex(path=path)
+    index.record(["https://old.com/1"], "20240101", selected=True)
+    index.record(["https://new.com/1"], "20250101", selected=True)
+    assert index.compact(30, today="20250115") == 1
+    index.close()
+
+    reopened = SeenIndex(path=path)
+    assert os.path.exists(f"{path}.bloom")
+    assert reopened.seen(["https://old.com/1", "https://new.com/1"], "20250115", 365) == {"https://new.com/1"}
+    assert reopened.stats()["rows"] == 1
+    reopened.close()
+
+
+def test_remove_duplicate_news_imports_history(tmp_path, monkeypatch, capsys) -> None:
+    """测试首次使用时导入历史运行目录，之后按回溯期去重"""
+    log_dir = tmp_path / "20250101" / "log"
+    log_dir.mkdir(parents=True)
+    (log_dir / "selected_news.json").write_text(json.dumps([{"title": "旧", "url": "https://a.com/old"}]))
+    (log_dir / "bbc.news_list.json").write_text(json.dumps([{"title": "未选", "url": "https://a.com/skipped"}]))
+    monkeypatch.chdir(tmp_path)
+
+    news = [{"title": "旧", "url": "https://a.com/old"}, {"title": "未选", "url": "https://a.com/skipped"}]
+    assert remove_duplicate_news(news, "20250103") == news[1:]
+    assert remove_duplicate_news(news, "20250120") == news
+    monkeypatch.setenv("SEEN_DEDUP_SCOPE", "considered")
+    assert remove_duplicate_news(news, "20250103") == []
+    assert get_seen_index().stats()["urls"] == 2
+
+    main(["--path", str(tmp_path / "cli.sqlite3"), "import", "--root", str(tmp_path)])
+    assert json.loads(capsys.readouterr().out)["selected"] == 1
+
+
+def test_remove_duplicate_news_zero_lookback(tmp_path, monkeypatch) -> None:
+    """测试显式传入lookback_days=0时不回溯，不使用SEEN_LOOKBACK_DAYS"""
+    monkeypatch.chdir(tmp_path)
+    news = [{"title": "昨天", "url": "https://a.com/yesterday"}]
+    record_seen_news(news, news, "20250102")
+
+    assert remove_duplicate_news(news, "20250103") == []
+    assert remove_duplicate_news(news, "20250103", lookback_days=0) == news
+
+
+def test_bloom_saved_on_flush_not_every_record(tmp_path) -> None:
+    """测试记录时只更新内存中的布隆过滤器，未写回时删除过期文件，重新打开后按数据库重建"""
+    path = str(tmp_path / "seen.sqlite3")
+    index = SeenIndex(path=path)
+    index.record(["https://a.com/1"], "20250101", selected=True)
+    index.flush()
+    assert os.path.exists(f"{path}.bloom")
+
+    index.record(["https://a.com/2"], "20250101", selected=True)
+    assert not os.path.exists(f"{path}.bloom")
+
+    # 未写回就退出，重新打开时重建布隆过滤器，不会漏判
+    reopened = SeenIndex(path=path)
+    assert reopened.seen(["https://a.com/1", "https://a.com/2"], "20250102", 7) == {"https://a.com/1", "https://a.com/2"}
+    reopened.close()
+    index.close()
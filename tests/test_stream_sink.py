@@ -0,0 +1,167 @@
+"""
+流式输出接收端测试
+"""
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from openai import BadRequestError
+
+from src.news_podcast.api import llm_client
+from src.news_podcast.api.stream_sink import FileSink, StreamSink, StreamStats
+
+
+def _chunk(text):
+    """构造流式片段"""
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))], usage=None)
+
+
+class RecordingSink(StreamSink):
+    """记录调用过程的接收端"""
+
+    def __init__(self):
+        self.events = []
+        self.stats = None
+
+    def begin(self, attempt):
+        self.events.append(("begin", attempt))
+
+    def write(self, chunk):
+        self.events.append(("write", chunk))
+
+    def end(self, stats):
+        self.events.append(("end",))
+        self.stats = stats
+
+
+def _patch_stream(monkeypatch, attempts):
+    """让异步客户端按attempts依次返回片段列表，列表中的异常在该位置抛出"""
+    calls = iter(attempts)
+
+    async def fake_create(**kwargs):
+        assert kwargs["stream"] is True
+        items = next(calls)
+
+        async def gen():
+            for item in items:
+                if isinstance(item, Exception):
+                    raise item
+                yield _chunk(item)
+        return gen()
+
+    client = llm_client.get_async_client("key", "http://127.0.0.1:9/v1")
+    monkeypatch.setattr(client.chat.completions, "create", fake_create)
+    monkeypatch.setenv("LLM_BACKOFF_BASE", "0.01")
+
+
+@pytest.mark.asyncio
+async def test_stream_to_callback_with_stats(monkeypatch) -> None:
+    """测试片段依次交给接收端，结束时提供首Token耗时和生成速度"""
+    _patch_stream(monkeypatch, [["今天", "", "的", "新闻"]])
+    sink = RecordingSink()
+
+    result = await llm_client.async_chat_with_deepseek(
+        "hi", api_key="key", base_url="http://127.0.0.1:9/v1", model="m", stream=True, on_chunk=sink,
+    )
+
+    assert result == "今天的新闻"
+    assert sink.events == [("begin", 1), ("write", "今天"), ("write", "的"), ("write", "新闻"), ("end",)]
+    assert sink.stats.ttft is not None
+    assert sink.stats.completion_tokens > 0
+
+    chunks = []
+    assert await llm_client.async_chat_with_deepseek(
+        "hi", api_key="key", base_url="http://127.0.0.1:9/v1", model="m", stream=True, on_chunk=chunks.append,
+    ) == "今天的新闻"
+    assert chunks == ["今天的新闻"]  # 命中缓存时一次性交给回调
+
+
+@pytest.mark.asyncio
+async def test_file_sink_keeps_partial_output(monkeypatch, tmp_path) -> None:
+    """测试流式写入文件，中途失败重试时上一次的部分输出保存到.partial"""
+    _patch_stream(monkeypatch, [["第一段", ConnectionError("connection reset")], ["第一段", "第二段"]])
+    path = tmp_path / "daily.md"
+
+    result = await llm_client.async_chat_with_deepseek(
+        "hi", api_key="key", base_url="http://127.0.0.1:9/v1", model="m", stream=True,
+        on_chunk=FileSink(str(path)),
+    )
+
+    assert result == "第一段第二段"
+    assert path.read_text(encoding="utf-8") == "第一段第二段"
+    assert (tmp_path / "daily.md.partial").read_text(encoding="utf-8") == "第一段"
+
+
+@pytest.mark.asyncio
+async def test_stream_options_dropped_when_rejected(monkeypatch) -> None:
+    """测试流式请求要求返回用量，端点拒绝stream_options时去掉后重发，之后不再请求"""
+    monkeypatch.setattr(llm_client, "_stream_usage_unsupported", set())
+    calls = []
+
+    async def fake_create(**kwargs):
+        calls.append(kwargs)
+        if "stream_options" in kwargs:
+            response = httpx.Response(400, request=httpx.Request("POST", "http://127.0.0.1:9/v1/chat/completions"))
+            raise BadRequestError("stream_options is not supported", response=response, body=None)
+
+        async def gen():
+            yield _chunk("新闻")
+        return gen()
+
+    client = llm_client.get_async_client("key", "http://127.0.0.1:9/v1")
+    monkeypatch.setattr(client.chat.completions, "create", fake_create)
+
+    for prompt in ("hi", "again"):
+        assert await llm_client.async_chat_with_deepseek(
+            prompt, api_key="key", base_url="http://127.0.0.1:9/v1", model="m", stream=True, on_chunk=lambda c: None,
+        ) == "新闻"
+    assert calls[0]["stream_options"] == {"include_usage": True}
+    assert ["stream_options" in call for call in calls] == [True, False, False]
+
+
+def test_file_sink_keeps_output_of_previous_run(tmp_path) -> None:
+    """测试上次运行中途退出留下的输出在第一次尝试时不会被覆盖"""
+    path = tmp_path / "daily.md"
+    path.write_text("上次运行的部分输出", encoding="utf-8")
+
+    with FileSink(str(path)) as sink:
+        sink.begin(1)
+        sink.write("新的输出")
+
+    assert path.read_text(encoding="utf-8") == "新的输出"
+    partials = list(tmp_path.glob("daily.md.*.partial"))
+    assert len(partials) == 1
+    assert partials[0].read_text(encoding="utf-8") == "上次运行的部分输出"
+
+
+def test_file_sink_closes_on_exit(tmp_path) -> None:
+    """测试作为上下文管理器使用时，请求失败没有调用end也会关闭文件"""
+    path = tmp_path / "daily.md"
+    with pytest.raises(RuntimeError):
+        with FileSink(str(path)) as sink:
+            sink.write("部分")
+            raise RuntimeError("failed")
+    assert sink._file is None
+    assert path.read_text(encoding="utf-8") == "部分"
+
+
+def test_stream_sink_requires_write() -> None:
+    """测试StreamSink的子类必须实现write"""
+    class NoWrite(StreamSink):
+        pass
+
+    with pytest.raises(TypeError):
+        NoWrite()
+
+
+def test_stream_stats_summary() -> None:
+    """测试生成速度按首Token之后的时间计算"""
+    stats = StreamStats()
+    stats.started_at = 0.0
+    stats.first_token_at = 2.0
+    stats.finished_at = 12.0
+    stats.completion_tokens = 500
+
+    assert stats.ttft == 2.0
+    assert stats.tokens_per_second == 50.0
+    assert "50.0 tokens/s" in stats.summary()
@@ -0,0 +1,49 @@
+"""
+Token预算测试
+"""
+import pytest
+
+from src.news_podcast.utils import token_budget
+from src.news_podcast.utils.token_budget import (
+    SITE_AGGREGATE, SITE_GENERATE_PODCAST, SITE_PICK_NEWS,
+    count_tokens, fit_evenly, fit_items, fit_text,
+)
+
+
+@pytest.fixture(autouse=True)
+def char_estimate(monkeypatch):
+    """使用按字符估算的Token数，结果不依赖tiktoken编码文件"""
+    monkeypatch.setattr(token_budget, "_encoding", None)
+    monkeypatch.setattr(token_budget, "_encoding_loaded", True)
+
+
+def test_fit_text_truncates_at_line_break(monkeypatch) -> None:
+    """测试正文超出预算时在换行处截断"""
+    monkeypatch.setenv("TOKEN_BUDGET_GENERATE_PODCAST", "50")
+    text = "\n".join(["段落" * 10] * 10)  # 每行20个Token
+    fitted = fit_text(text, SITE_GENERATE_PODCAST)
+
+    assert count_tokens(fitted) <= 50
+    assert fitted == "\n".join(["段落" * 10] * 2)
+    assert fit_text("短文本", SITE_GENERATE_PODCAST) == "短文本"
+
+
+def test_fit_items_keeps_prefix(monkeypatch) -> None:
+    """测试列表超出预算时保留靠前的条目"""
+    monkeypatch.setenv("TOKEN_BUDGET_PICK_NEWS", "25")
+    items = [f"{i}. 一条十个字的新闻标题" for i in range(1, 6)]  # 每项约11个Token
+
+    assert fit_items(items, SITE_PICK_NEWS) == items[:2]
+
+
+def test_fit_evenly_only_shrinks_long_texts(monkeypatch) -> None:
+    """测试总量超出预算时，短分析完整保留，长分析平分剩余预算"""
+    monkeypatch.setenv("TOKEN_BUDGET_AGGREGATE", "100")
+    texts = ["短" * 10, "长" * 200, "中" * 300]
+    fitted = fit_evenly(texts, SITE_AGGREGATE)
+
+    assert fitted[0] == texts[0]
+    assert count_tokens(fitted[1]) <= 46
+    assert count_tokens(fitted[2]) <= 46
+    assert sum(count_tokens(text) for text in fitted) <= 100
+
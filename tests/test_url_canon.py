@@ -0,0 +1,83 @@
+"""
+URL规范化测试
+"""
+import pytest
+
+from src.news_podcast.utils.url_canon import bare_host, build_url_rules, canonical_url, url_key
+
+
+def test_canonical_url_removes_tracking_and_amp() -> None:
+    """测试去掉跟踪参数、片段、默认端口和AMP标记，剩余参数排序"""
+    assert canonical_url("HTTPS://WWW.BBC.com:443/news/articles/c20g?at_medium=RSS&utm_source=x#top") == \
+        "https://www.bbc.com/news/articles/c20g"
+    assert canonical_url("https://www.reuters.com/world/slug-2025-04-09/?b=2&fbclid=abc&a=1") == \
+        "https://www.reuters.com/world/slug-2025-04-09/?a=1&b=2"
+    assert canonical_url("https://amp.cnn.com/cnn/2025/04/08/x/index.html?outputType=amp") == \
+        "https://cnn.com/cnn/2025/04/08/x/index.html"
+    assert canonical_url("https://www.bbc.com/news/articles/c20g.amp") == "https://www.bbc.com/news/articles/c20g"
+    assert canonical_url("https://example.com/amp/2025/04/slug") == "https://example.com/2025/04/slug"
+
+
+def test_canonical_url_keeps_ambiguous_parts() -> None:
+    """测试规范URL保留可能有实际含义的通用参数和名为amp的路径，这些只在比较键中忽略"""
+    assert canonical_url("https://example.com/search?ref=main&share=1&sh=2") == \
+        "https://example.com/search?ref=main&sh=2&share=1"
+    assert canonical_url("https://example.com/tags/amp") == "https://example.com/tags/amp"
+    assert canonical_url("https://example.com/amp/") == "https://example.com/amp/"
+    assert canonical_url("https://example.com/list?amp=guitar") == "https://example.com/list?amp=guitar"
+
+    assert url_key("https://www.theverge.com/news/123/amp?ref=homepage") == "https://theverge.com/news/123"
+    assert url_key("https://example.com/amp") == "https://example.com/amp"
+    assert url_key("https://example.com/story?id=3&cmpid=x") == "https://example.com/story?id=3"
+
+
+def test_canonical_url_cleans_model_output() -> None:
+    """测试修正模型或crawl4ai引入的尖括号、句末标点、缺少协议和相对路径"""
+    assert canonical_url("https://time.com/</7200909/ceo/>") == "https://time.com/7200909/ceo/"
+    assert canonical_url("www.wired.com/story/slug/。") == "https://www.wired.com/story/slug/"
+    assert canonical_url("https://en.wikipedia.org/wiki/Mercury_(planet)") == \
+        "https://en.wikipedia.org/wiki/Mercury_(planet)"
+    assert canonical_url("/news/articles/c20g", base="https://www.bbc.com/") == \
+        "https://www.bbc.com/news/articles/c20g"
+    assert canonical_url("mailto:news@bbc.com") == "mailto:news@bbc.com"
+
+
+def test_url_key_matches_variants() -> None:
+    """测试同一文章的不同写法得到相同的比较键"""
+    variants = [
+        "https://www.bbc.com/news/articles/c20g",
+        "http://bbc.com/news/articles/c20g/",
+        "https://m.bbc.com/news/articles/c20g?utm_campaign=y",
+        "<https://www.bbc.com/news/articles/c20g>",
+    ]
+    assert {url_key(url) for url in variants} == {"https://bbc.com/news/articles/c20g"}
+    assert url_key("https://time.com") == "https://time.com/"
+    assert url_key("https://bbc.com/news/a") != url_key("https://bbc.com/news/b")
+
+
+def test_bare_host() -> None:
+    """测试按站点分组的域名去掉www.和m.前缀、端口和用户信息"""
+    assert bare_host("https://WWW.BBC.com:8443/news") == "bbc.com"
+    assert bare_host("https://user:pw@m.cnn.com/x") == "cnn.com"
+    assert bare_host("https://edition.cnn.com/") == "edition.cnn.com"
+    assert bare_host("not a url") == ""
+
+
+def test_site_rules() -> None:
+    """测试按域名配置的规则作用于子域名"""
+    rules = build_url_rules({
+        "www.cnn.com": {"strip_index": True, "keep_query": []},
+        "example.com": {"keep_query": ["id"], "trailing_slash": "strip"},
+        "nytimes.com": {"drop_query": ["smid"]},
+    })
+    assert canonical_url("https://www.nytimes.com/2025/04/09/x.html?smid=tw&page=2", rules=rules) == \
+        "https://www.nytimes.com/2025/04/09/x.html?page=2"
+    assert canonical_url("https://edition.cnn.com/2025/04/08/x/index.html?iid=abc", rules=rules) == \
+        "https://edition.cnn.com/2025/04/08/x/"
+    assert canonical_url("https://www.example.com/story/?id=3&page=2", rules=rules) == \
+        "https://www.example.com/story?id=3"
+    assert url_key("https://cnn.com/2025/04/08/x/", rules=rules) == \
+        url_key("https://www.cnn.com/2025/04/08/x/index.html", rules=rules)
+
+    with pytest.raises(ValueError):
+        build_url_rules({"example.com": {"trailing_slash": "sometimes"}})